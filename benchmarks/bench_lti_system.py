@@ -0,0 +1,151 @@
+"""
+Benchmarks the construction of LtiSystem for random stable systems.
+
+Each case builds an LtiSystem and records the wall time of every stage from LtiSystem.stage_times. The results are
+written as JSON so that runs on different versions of the library can be compared:
+
+    python bench_lti_system.py --output new.json --compare old.json
+
+The scaling methods that only support SISO systems are left out of the MIMO cases. Cases that still raise an exception
+are recorded with the error message instead of timings.
+"""
+import argparse
+import itertools
+import json
+import platform
+import time
+import numpy as np
+import scipy
+import scipy.linalg as linalg
+import controlinverilog as civ
+
+
+ORDERS = (2, 4, 8, 16, 32, 64)
+SHAPES = ((1, 1), (2, 2))
+OPERATORS = ('delta', 'shift')
+SIG_SCALING_METHODS = ('hinf', 'h2', 'overshoot', 'safe')
+COF_SCALING_METHODS = ('hinf', 'h2', 'impulse', 'pole', 'fixed')
+SISO_SIG_SCALING_METHODS = ('overshoot', 'safe')
+SISO_COF_SCALING_METHODS = ('impulse',)
+STAGES = ('cont2shift', 'realization', 'sys_to_delta', 'LtiFormatsCoefficients',
+          'LtiFormatsSignals', 'LtiVerilog')
+
+
+def random_system(order, n_input, n_output, fs, rng):
+    """
+    Returns a random stable continuous time system. The poles are lightly to moderately damped resonances, with a real
+    pole for odd orders, between fs/1e4 and fs/20 so that the discretized system is well conditioned.
+    """
+    blocks = []
+    for _ in range(order // 2):
+        w = 2 * np.pi * rng.uniform(fs / 1e4, fs / 20)
+        z = rng.uniform(0.05, 0.7)
+        blocks.append(np.array([[0, w], [-w, -2 * z * w]]))
+    if order % 2 == 1:
+        blocks.append(np.array([[-2 * np.pi * rng.uniform(fs / 1e4, fs / 20)]]))
+    mat_a = linalg.block_diag(*blocks)
+    mat_b = rng.standard_normal((order, n_input)) * np.sqrt(np.abs(np.diag(mat_a)) + 1)[:, np.newaxis]
+    mat_c = rng.standard_normal((n_output, order)) / np.sqrt(order)
+    mat_d = np.zeros((n_output, n_input))
+    return mat_a, mat_b, mat_c, mat_d
+
+
+def is_supported(shape, sig_method, cof_method):
+    """
+    Returns False for the MIMO cases of the scaling methods that only support SISO systems.
+    """
+    if shape == (1, 1):
+        return True
+    return sig_method not in SISO_SIG_SCALING_METHODS and cof_method not in SISO_COF_SCALING_METHODS
+
+
+def run_case(order, n_input, n_output, operator, sig_method, cof_method, fs=1e6, seed=0):
+
+    rng = np.random.default_rng((seed, order, n_input, n_output))
+    sys = random_system(order, n_input, n_output, fs, rng)
+    result = {'order': order,
+              'n_input': n_input,
+              'n_output': n_output,
+              'operator': operator,
+              'sig_scaling_method': sig_method,
+              'cof_scaling_method': cof_method,
+              'seed': seed}
+
+    start = time.perf_counter()
+    try:
+        lti = civ.LtiSystem(name='bench', fs=fs, sys=sys, operator=operator, sig_scaling_method=sig_method,
+                            cof_scaling_method=cof_method, verbose=False)
+    except Exception as ex:
+        result['error'] = '%s: %s' % (type(ex).__name__, ex)
+        result['total'] = time.perf_counter() - start
+        return result
+
+    ctx = lti.lti_verilog.context
+    result['error'] = None
+    result['total'] = time.perf_counter() - start
+    result['stages'] = {stage: lti.stage_times.get(stage) for stage in STAGES}
+    result['formats'] = {key: ctx[key] for key in ('cw', 'cf', 'sw', 'sf', 'ow')}
+    return result
+
+
+def case_key(result):
+    keys = ('order', 'n_input', 'n_output', 'operator', 'sig_scaling_method', 'cof_scaling_method', 'seed')
+    return tuple(result[k] for k in keys)
+
+
+def compare(results, baseline):
+    """
+    Prints the ratio of the total time of each case to the same case in `baseline`.
+    """
+    previous = {case_key(r): r for r in baseline['results'] if r['error'] is None}
+    print('%-48s %10s %10s %8s' % ('case', 'baseline', 'current', 'ratio'))
+    for r in results:
+        key = case_key(r)
+        if r['error'] is not None or key not in previous:
+            continue
+        old = previous[key]['total']
+        print('%-48s %10.4f %10.4f %8.2f' % (' '.join(map(str, key)), old, r['total'], r['total'] / old))
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark the construction of LtiSystem.')
+    parser.add_argument('--orders', type=int, nargs='+', default=ORDERS)
+    parser.add_argument('--operators', nargs='+', default=OPERATORS)
+    parser.add_argument('--sig-methods', nargs='+', default=SIG_SCALING_METHODS)
+    parser.add_argument('--cof-methods', nargs='+', default=COF_SCALING_METHODS)
+    parser.add_argument('--siso-only', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_lti_system.json')
+    parser.add_argument('--compare', default=None, help='A previous output file to compare against.')
+    args = parser.parse_args()
+
+    shapes = SHAPES[:1] if args.siso_only else SHAPES
+    cases = [(order, shape, operator, sig_method, cof_method) for order, shape, operator, sig_method, cof_method
+             in itertools.product(args.orders, shapes, args.operators, args.sig_methods, args.cof_methods)
+             if is_supported(shape, sig_method, cof_method)]
+
+    results = []
+    for order, (n_input, n_output), operator, sig_method, cof_method in cases:
+        result = run_case(order, n_input, n_output, operator, sig_method, cof_method, seed=args.seed)
+        results.append(result)
+        status = 'error' if result['error'] is not None else '%.4f s' % result['total']
+        print('order=%d %dx%d %s sig=%s cof=%s: %s' % (order, n_output, n_input, operator, sig_method,
+                                                       cof_method, status))
+
+    report = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'python': platform.python_version(),
+              'numpy': np.__version__,
+              'scipy': scipy.__version__,
+              'machine': platform.machine(),
+              'results': results}
+    with open(args.output, 'w') as fp:
+        json.dump(report, fp, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as fp:
+            compare(results, json.load(fp))
+
+
+if __name__ == '__main__':
+    main()
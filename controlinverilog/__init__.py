@@ -5,4 +5,7 @@ from controlinverilog.lut import LookUpTable
 from controlinverilog.nonlinear_function import NonlinearFunction
 from controlinverilog.dds import DDS
 from controlinverilog.saturation import Saturation
+from controlinverilog.sos_system import SosSystem
+from controlinverilog.sweep import design_sweep
 from controlinverilog.time_delay import TimeDelay
+from controlinverilog.word_length_explorer import WordLengthExplorer
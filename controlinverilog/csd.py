@@ -0,0 +1,174 @@
+import numpy as np
+
+
+def csd_digits(value):
+    """
+    Returns the canonical signed digit (non adjacent form) representation of an integer.
+
+    Parameters
+    ----------
+    value : int
+        The integer to represent.
+
+    Returns
+    -------
+    digits : list of tuple
+        The (shift, sign) of each nonzero digit, from the least significant. `value` is the sum of sign * 2**shift.
+    """
+    value = int(value)
+    digits, shift = [], 0
+    while value != 0:
+        if value & 1:
+            # A digit of -1 when the next bit is also set leaves a zero in its place, so no two digits are adjacent.
+            sign = 2 - (value & 3)
+            digits.append((shift, sign))
+            value -= sign
+        value >>= 1
+        shift += 1
+    return digits
+
+
+def round_digits(x, max_digits=None):
+    """
+    Rounds to the nearest integers with at most `max_digits` nonzero signed digits. Each digit is the power of two
+    nearest to the remaining value, which is the nearest integer once the remainder drops below one half.
+
+    Parameters
+    ----------
+    x : ndarray
+        The values to round, already scaled by the fractional length.
+    max_digits : None | int
+        The largest number of nonzero digits, None to round to the nearest integer.
+
+    Returns
+    -------
+    y : ndarray
+        The rounded values.
+    """
+    if max_digits is None:
+        return np.around(x)
+
+    remainder = np.array(x, dtype=float)
+    y = np.zeros(remainder.shape)
+    for _ in range(max_digits):
+        mag = np.abs(remainder)
+        active = mag >= 0.5
+        if not np.any(active):
+            break
+        # The nearest power of two is 2^k or 2^(k+1), with 2^k <= |r| < 2^(k+1), and the digits are integers.
+        k = np.floor(np.log2(np.where(active, mag, 1.0)))
+        k = np.maximum(np.where(mag > 1.5 * 2 ** k, k + 1, k), 0)
+        digit = np.where(active, np.sign(remainder) * 2 ** k, 0.0)
+        y += digit
+        remainder -= digit
+    return y
+
+
+def _format_terms(terms):
+    """
+    Formats a sum of shifted signals as a verilog expression. The shifts are parenthesized because they bind less
+    tightly than the additions.
+    """
+    terms = sorted(terms, key=lambda t: (t[2] < 0, -t[1]))
+    if len(terms) == 1:
+        signal, shift, sign = terms[0]
+        expr = signal if shift == 0 else '%s <<< %d' % (signal, shift)
+        return ('-' if sign < 0 else '') + expr
+
+    expr = ''
+    for ii, (signal, shift, sign) in enumerate(terms):
+        operand = signal if shift == 0 else '(%s <<< %d)' % (signal, shift)
+        if ii == 0:
+            expr = ('-' if sign < 0 else '') + operand
+        else:
+            expr += (' - ' if sign < 0 else ' + ') + operand
+    return expr
+
+
+def _pattern(t1, t2):
+    """
+    Returns the pattern shared by two terms, normalized so that the term with the smaller shift is positive and
+    unshifted, along with the shift and sign of the occurrence.
+    """
+    if (t2[1], t2[0]) < (t1[1], t1[0]):
+        t1, t2 = t2, t1
+    return (t1[0], t2[0], t2[1] - t1[1], t1[2] * t2[2]), t1[1], t1[2]
+
+
+class ShiftAddNetwork(object):
+
+    def __init__(self, signal, values):
+        """
+        Implements the products of one signal by several integer constants with shifts and additions. Each constant
+        is written in canonical signed digits, then pairs of digits that recur across the constants are extracted as
+        shared subexpressions, most frequent first, in the manner of Hartley's common subexpression elimination.
+
+        Parameters
+        ----------
+        signal : string
+            The name of the verilog signal multiplied by the constants.
+        values : list of int
+            The constants.
+        """
+        self.signal = signal
+        self.values = [int(v) for v in values]
+        self.n_digits = [len(csd_digits(v)) for v in self.values]
+        self.terms = [[(signal, shift, sign) for shift, sign in csd_digits(v)] for v in self.values]
+        self.subexpressions = []
+        self._share()
+
+    def _matches(self, terms, key):
+        """
+        Returns the disjoint pairs of `terms` that match the pattern `key`.
+        """
+        used, matches = set(), []
+        for ii in range(len(terms)):
+            for jj in range(ii + 1, len(terms)):
+                if ii in used or jj in used:
+                    continue
+                pattern, shift, sign = _pattern(terms[ii], terms[jj])
+                if pattern == key:
+                    used.update((ii, jj))
+                    matches.append((ii, jj, shift, sign))
+        return matches
+
+    def _share(self):
+
+        while True:
+            counts = {}
+            for terms in self.terms:
+                keys = set(_pattern(terms[ii], terms[jj])[0]
+                           for ii in range(len(terms)) for jj in range(ii + 1, len(terms)))
+                for key in keys:
+                    counts[key] = counts.get(key, 0) + len(self._matches(terms, key))
+
+            best = max(sorted(counts), key=lambda k: counts[k], default=None)
+            if best is None or counts[best] < 2:
+                return
+
+            name = '%s_s%d' % (self.signal, len(self.subexpressions) + 1)
+            s1, s2, shift, sign = best
+            self.subexpressions.append((name, _format_terms([(s1, 0, 1), (s2, shift, sign)])))
+            for index, terms in enumerate(self.terms):
+                matches = self._matches(terms, best)
+                merged = set(ii for m in matches for ii in m[:2])
+                self.terms[index] = [t for ii, t in enumerate(terms) if ii not in merged]
+                self.terms[index] += [(name, m[2], m[3]) for m in matches]
+
+    def expression(self, index):
+        """
+        Returns
+        -------
+        expr : string
+            The verilog expression of the product by the constant `values[index]`.
+        """
+        return _format_terms(self.terms[index])
+
+    def n_adders(self, index):
+        """
+        Returns
+        -------
+        n_adders : int
+            The number of adders of the product by `values[index]`, not counting the shared subexpressions.
+        """
+        return max(len(self.terms[index]) - 1, 0)
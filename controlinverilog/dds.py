@@ -1,10 +1,14 @@
+import os
 import numpy as np
-import jinja2
+from . import memory_file
+from . import templating
+from .estimate import ResourceEstimate
 
 
 class DDS(object):
 
-    def __init__(self, name, f_exe, n_phase=24, n_amplitude=16, n_sine=8, n_fine=6, n_fine_word=8):
+    def __init__(self, name, f_exe, n_phase=24, n_amplitude=16, n_sine=8, n_fine=6, n_fine_word=8, keep_verilog=True,
+                 rom_format='inline'):
 
         # This ensures that the LUTs don't have excessive entries.
         assert (n_phase - n_sine - n_fine - 2) >= 0
@@ -12,6 +16,14 @@ class DDS(object):
         sine_lut = self._generate_sine_lut(n_sine, n_amplitude)
         fine_lut, n_fine_frac = self._generate_fine_lut(n_fine, n_sine, n_fine_word)
 
+        # The LUTs are read from '<name>_sine.mem' and '<name>_fine.mem' unless they are initialized inline.
+        readmem = memory_file.readmem_task(rom_format)
+        if readmem is None:
+            self.roms = []
+        else:
+            self.roms = [('%s_sine.mem' % name, sine_lut, n_amplitude, rom_format),
+                         ('%s_fine.mem' % name, fine_lut, n_fine_word, rom_format)]
+
         context = {'name': name,
                    'pw': n_phase,
                    'sw': n_sine,
@@ -20,19 +32,26 @@ class DDS(object):
                    'faw': n_fine_word,
                    'faf': n_fine_frac,
                    'sine_lut': sine_lut,
-                   'fine_lut': fine_lut}
+                   'fine_lut': fine_lut,
+                   'sine_file': self.roms[0][0] if self.roms else None,
+                   'fine_file': self.roms[1][0] if self.roms else None,
+                   'readmem': readmem}
 
         self.name = name
         self.f_exe = f_exe
+        self.n_phase = n_phase
+        self.n_sine = n_sine
+        self.n_fine = n_fine
+        self.n_fine_word = n_fine_word
+        self.n_fine_frac = n_fine_frac
         self.freq_res = f_exe / 2.0 ** n_phase
         self.phase_res = 360.0 / 2.0 ** n_phase
         self.output_word_len = n_amplitude
         self.output_frac_len = n_amplitude - 1
 
-        loader = jinja2.PackageLoader('controlinverilog', 'templates')
-        env = jinja2.Environment(loader=loader, trim_blocks=True, lstrip_blocks=True)
-        template = env.get_template('dds_v2.v')
-        self.verilog = template.render(context)
+        self._template = templating.get_template('dds_v2.v', trim_blocks=True)
+        self._context = context
+        self.verilog = self._template.render(context) if keep_verilog is True else None
 
     def print_summary(self):
 
@@ -42,13 +61,33 @@ class DDS(object):
         print('Phase Resolution (Degree/unit): %g' % self.phase_res)
         print('Output Format: s(%d,%d)' % (self.output_word_len, self.output_frac_len))
 
+    def estimate(self):
+        """
+        Returns
+        -------
+        estimate : controlinverilog.estimate.ResourceEstimate
+            The phase accumulator, the sine and fine angle tables and the two products of the circular
+            interpolation.
+        """
+        aw, faw, faf = self.output_word_len, self.n_fine_word, self.n_fine_frac
+        # The reset and clock enable pipeline, the phase and table addresses, the coarse and fine values and the sums.
+        register_bits = 1 + 3 + 1 + self.n_phase + 2 + self.n_fine + 4 * aw + faw + 2 * (aw + faf)
+        return ResourceEstimate(self.name,
+                                multipliers=[(faw, aw), (faw, aw)],
+                                register_bits=register_bits,
+                                n_adders=6,
+                                rom_bits=2 ** self.n_sine * aw + 2 ** self.n_fine * faw,
+                                latency=4)
+
     def print_verilog(self, filename=None):
 
-        if filename is None:
-            print(self.verilog)
-        else:
-            with open(filename, 'w') as text_file:
-                text_file.write(self.verilog)
+        templating.write_verilog(filename, self.verilog, self._template, self._context)
+        if isinstance(filename, str):
+            memory_file.write_memories(self.roms, os.path.dirname(filename))
+
+    def print_memory(self, directory='.'):
+
+        memory_file.write_memories(self.roms, directory)
 
     @staticmethod
     def calc_freqword(n_phase=24, f_exe=122.88e6, f_dds=50e3):
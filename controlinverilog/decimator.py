@@ -1,29 +1,35 @@
-import jinja2
+from . import templating
+from .estimate import ResourceEstimate
 
 
 class Decimator(object):
 
-    def __init__(self, name, freq_in, top, dw):
+    def __init__(self, name, freq_in, top, dw, keep_verilog=True):
 
+        self.name = name
         self.freq_out = freq_in / (top + 1)
         self.dw = dw
 
         context = {'NAME': name, 'TOP': top, 'DW': dw}
 
-        loader = jinja2.PackageLoader('controlinverilog', 'templates')
-        env = jinja2.Environment(loader=loader)
-        template = env.get_template('decimator.v')
-        self.verilog = template.render(context)
+        self._template = templating.get_template('decimator.v')
+        self._context = context
+        self.verilog = self._template.render(context) if keep_verilog is True else None
 
     def print_summary(self):
 
         print('Output sampling frequency (Hz): %g' % self.freq_out)
         print('Data word length: %d' % self.dw)
 
+    def estimate(self):
+        """
+        Returns
+        -------
+        estimate : controlinverilog.estimate.ResourceEstimate
+            The 10 bit down counter and the output register.
+        """
+        return ResourceEstimate(self.name, register_bits=10 + self.dw + 1, n_adders=2, latency=1)
+
     def print_verilog(self, filename=None):
 
-        if filename is None:
-            print(self.verilog)
-        else:
-            with open(filename, 'w') as text_file:
-                text_file.write(self.verilog)
+        templating.write_verilog(filename, self.verilog, self._template, self._context)
@@ -0,0 +1,77 @@
+class ResourceEstimate(object):
+
+    def __init__(self, name, multipliers=(), register_bits=0, n_adders=0, rom_bits=0, ram_bits=0, latency=0,
+                 cycles_per_sample=1):
+        """
+        An estimate of the resources and timing of a generated module. It is counted from the formats and tables
+        the generator computed, before any verilog is rendered, so candidate designs can be compared without
+        synthesis. Constant shifts and wiring are free, and comparisons and negations count as adders.
+
+        Parameters
+        ----------
+        name : string
+            The name of the module.
+        multipliers : list of tuple
+            The word lengths (a, b) of the operands of each multiplier.
+        register_bits : int
+            The number of flip-flops, including the clock enable pipeline.
+        n_adders : int
+            The number of two input adders, subtracters and comparators.
+        rom_bits : int
+            The number of bits of the lookup tables and coefficient memories.
+        ram_bits : int
+            The number of bits of the buffers written at run time.
+        latency : int
+            The number of clock cycles from `ce_in` to `ce_out`.
+        cycles_per_sample : int
+            The smallest number of clock cycles between two `ce_in` pulses.
+        """
+        self.name = name
+        self.multipliers = [tuple(m) for m in multipliers]
+        self.register_bits = register_bits
+        self.n_adders = n_adders
+        self.rom_bits = rom_bits
+        self.ram_bits = ram_bits
+        self.latency = latency
+        self.cycles_per_sample = cycles_per_sample
+
+    @property
+    def n_multipliers(self):
+        return len(self.multipliers)
+
+    @property
+    def max_sample_rate(self):
+        """
+        The highest sampling frequency relative to the clock frequency.
+        """
+        return 1.0 / self.cycles_per_sample
+
+    def as_dict(self):
+        """
+        Returns
+        -------
+        estimate : dictionary
+            The estimate as a flat dictionary, e.g. a row of the results of a parameter sweep.
+        """
+        return {'name': self.name,
+                'n_multipliers': self.n_multipliers,
+                'multiplier_bits': sum(a * b for a, b in self.multipliers),
+                'register_bits': self.register_bits,
+                'n_adders': self.n_adders,
+                'rom_bits': self.rom_bits,
+                'ram_bits': self.ram_bits,
+                'latency': self.latency,
+                'max_sample_rate': self.max_sample_rate}
+
+    def print_summary(self):
+
+        widths = ['%dx%d (%d)' % (a, b, self.multipliers.count((a, b))) for a, b in sorted(set(self.multipliers))]
+        print('--- Resource Estimate: %s ---' % self.name)
+        print('Multipliers: %s' % (', '.join(widths) if widths else '0'))
+        print('Register bits: %d' % self.register_bits)
+        print('Adders: %d' % self.n_adders)
+        print('ROM bits: %d' % self.rom_bits)
+        print('RAM bits: %d' % self.ram_bits)
+        print('Latency (cycles): %d' % self.latency)
+        print('Maximum sampling frequency: clk/%d' % self.cycles_per_sample)
+        print()
@@ -1,4 +1,5 @@
-import jinja2
+from . import templating
+from .estimate import ResourceEstimate
 
 
 def real2int(val, vf):
@@ -21,7 +22,7 @@ def int2verilog(val, vw):
 
 class Integrator(object):
 
-    def __init__(self, gain, ts, dw, df, cw, cf, min_, max_, name='integrator'):
+    def __init__(self, gain, ts, dw, df, cw, cf, min_, max_, name='integrator', keep_verilog=True):
         """
         gain      The analog integral gain.
         ts        The sampling period.
@@ -32,6 +33,7 @@ class Integrator(object):
         min_      The minimum analog saturation value.
         max_      The maximum analog saturation value.
         name      The name of the verilog module.
+        keep_verilog    True to keep the rendered verilog in memory, otherwise it is rendered when printed.
         """
 
         self.af = cf + df
@@ -58,10 +60,9 @@ class Integrator(object):
             'MAX': int2verilog(self.max, self.aw),
             'MIN': int2verilog(self.min, self.aw)
         }
-        loader = jinja2.PackageLoader('controlinverilog', 'templates')
-        env = jinja2.Environment(loader=loader)
-        template = env.get_template('integrator.v')
-        self.verilog = template.render(context)
+        self._template = templating.get_template('integrator.v')
+        self._context = context
+        self.verilog = self._template.render(context) if keep_verilog is True else None
 
     def print_summary(self):
 
@@ -77,10 +78,20 @@ class Integrator(object):
         print('parameter signed [IW-1:0] MAX = %d;' % self.max)
         print('parameter signed [IW-1:0] MIN = %d;' % self.min)
 
+    def estimate(self):
+        """
+        Returns
+        -------
+        estimate : controlinverilog.estimate.ResourceEstimate
+            The gain multiplier, the three input sum and the two saturation comparisons, with a single cycle
+            feedback loop.
+        """
+        return ResourceEstimate(self.name,
+                                multipliers=[(self.cw, self.dw)],
+                                register_bits=2 + self.dw + 2 * self.aw,
+                                n_adders=4,
+                                latency=2)
+
     def print_verilog(self, filename=None):
 
-        if filename is None:
-            print(self.verilog)
-        else:
-            with open(filename, 'w') as text_file:
-                text_file.write(self.verilog)
+        templating.write_verilog(filename, self.verilog, self._template, self._context)
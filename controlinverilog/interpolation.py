@@ -0,0 +1,182 @@
+import numpy as np
+from .estimate import ResourceEstimate
+
+
+def _signed_width(values):
+    """
+    Returns the word length of the smallest two's complement format that holds every integer in `values`.
+    """
+    hi = int(np.amax(values))
+    lo = int(np.amin(values))
+    return max(hi.bit_length(), (-lo - 1).bit_length()) + 1
+
+
+def _wrap(x, width):
+    half = 1 << (width - 1)
+    return ((x + half) & ((1 << width) - 1)) - half
+
+
+class PiecewiseLinear(object):
+
+    def __init__(self, y, input_word_length, output_word_length, output_frac_length, max_error, valid=None,
+                 max_guard=8):
+        """
+        Approximates a table indexed by an `input_word_length`-bit code by linear interpolation between segments. The
+        upper bits of the code address a table of segment bases and deltas and the lower bits interpolate within the
+        segment:
+
+            out = (base * 2^LW + delta * frac + 2^(LW + GW - 1)) >> (LW + GW)
+
+        where LW is the number of interpolation bits and GW the number of guard bits of the base. Every segment count
+        and number of guard bits is evaluated bit accurately, and the format with the fewest ROM bits that keeps the
+        error under `max_error` is selected.
+
+        Parameters
+        ----------
+        y : ndarray
+            The exact value of the function at every input code, indexed by the unsigned code.
+        input_word_length : int
+            The number of bits of the input code.
+        output_word_length : int
+            The output word length.
+        output_frac_length : int
+            The output fractional length.
+        max_error : float
+            The largest absolute error allowed between the output and `y`.
+        valid : None | ndarray
+            A boolean mask of the input codes that are used, None if they all are.
+        max_guard : int
+            The largest number of guard bits tried.
+        """
+        self.iw = input_word_length
+        self.ow = output_word_length
+        self.of = output_frac_length
+
+        y = np.asarray(y, dtype=float)
+        valid = np.ones(y.shape, dtype=bool) if valid is None else np.asarray(valid)
+        codes = np.arange(2 ** self.iw)
+
+        best = None
+        for sw in range(1, self.iw):
+            lw = self.iw - sw
+            lines = self._fit(y, valid, sw, lw)
+            for gw in range(max_guard + 1):
+                base, delta = (np.around(2.0 ** gw * v).astype(np.int64) for v in lines)
+                out = self._evaluate(codes, base, delta, lw, gw)
+                error = np.amax(np.abs(2.0 ** -self.of * out - y)[valid])
+                if error <= max_error:
+                    bw = _signed_width(base)
+                    dw = _signed_width(delta)
+                    n_bits = 2 ** sw * (bw + dw)
+                    if best is None or n_bits < best[0]:
+                        best = (n_bits, sw, gw, bw, dw, base, delta, error)
+                    break
+
+        if best is None:
+            msg = 'No piecewise linear approximation meets the maximum error, use a lookup table instead.'
+            raise ValueError(msg)
+
+        self.n_rom_bits, self.sw, self.gw, self.bw, self.dw, self.base, self.delta, self.max_error = best
+        self.lw = self.iw - self.sw
+        self.n_segments = 2 ** self.sw
+        # The accumulator holds the shifted base, the product and the rounding constant without overflowing.
+        self.aw = max(self.bw + self.lw, self.dw + self.lw + 1, self.lw + self.gw + self.ow) + 1
+        self.rnd = 1 << (self.lw + self.gw - 1)
+
+    def _fit(self, y, valid, sw, lw):
+        """
+        Fits a line to each segment by least squares and centers it between the largest positive and negative
+        residuals, which is the minimax line for convex and concave segments. Unused codes get no weight.
+
+        Returns
+        -------
+        base : ndarray
+            The value of each line at the first code of its segment, in output LSBs.
+        delta : ndarray
+            The change of each line over the segment, in output LSBs.
+        """
+        y = 2.0 ** self.of * y.reshape(2 ** sw, 2 ** lw)
+        w = valid.reshape(2 ** sw, 2 ** lw).astype(float)
+        t = np.arange(2 ** lw) / 2.0 ** lw
+
+        # Segments with a single used code are held constant and segments without one are zero.
+        n_used = np.maximum(np.sum(w, axis=1), 1)
+        t_mean = np.sum(w * t, axis=1) / n_used
+        y_mean = np.sum(w * y, axis=1) / n_used
+        t_var = np.sum(w * (t - t_mean[:, np.newaxis]) ** 2, axis=1)
+        t_cov = np.sum(w * (t - t_mean[:, np.newaxis]) * (y - y_mean[:, np.newaxis]), axis=1)
+        delta = np.where(t_var > 0, t_cov / np.where(t_var > 0, t_var, 1), 0)
+        base = y_mean - delta * t_mean
+
+        residual = y - base[:, np.newaxis] - delta[:, np.newaxis] * t
+        r_max = np.amax(np.where(w > 0, residual, -np.inf), axis=1)
+        r_min = np.amin(np.where(w > 0, residual, np.inf), axis=1)
+        unused = ~np.any(w > 0, axis=1)
+        r_max[unused] = r_min[unused] = 0
+        base += (r_max + r_min) / 2
+        return base, delta
+
+    def _evaluate(self, codes, base, delta, lw, gw):
+
+        seg = codes >> lw
+        frac = codes & ((1 << lw) - 1)
+        acc = (base[seg] << lw) + delta[seg] * frac + (1 << (lw + gw - 1))
+        return _wrap(acc >> (lw + gw), self.ow)
+
+    def evaluate(self, codes):
+        """
+        Returns
+        -------
+        out : ndarray
+            The output words of the interpolator for the unsigned input `codes`, as computed by the verilog.
+        """
+        return self._evaluate(np.asarray(codes, dtype=np.int64), self.base, self.delta, self.lw, self.gw)
+
+    def context(self):
+        """
+        Returns
+        -------
+        context : dictionary
+            The template variables of the interpolator.
+        """
+        return {'SW': self.sw,
+                'LW': self.lw,
+                'GW': self.gw,
+                'BW': self.bw,
+                'DW': self.dw,
+                'AW': self.aw,
+                'RND': self.rnd,
+                'N_SEG': self.n_segments,
+                'BASE': self.base,
+                'DELTA': self.delta}
+
+    def estimate(self, name):
+        """
+        Returns
+        -------
+        estimate : controlinverilog.estimate.ResourceEstimate
+            The segment tables, the interpolation product and the three input sum of the rounded output.
+        """
+        register_bits = 4 + self.iw + 2 * self.bw + self.dw + self.lw + self.dw + self.lw + 1 + self.ow
+        return ResourceEstimate(name,
+                                multipliers=[(self.dw, self.lw + 1)],
+                                register_bits=register_bits,
+                                n_adders=2,
+                                rom_bits=self.n_rom_bits,
+                                latency=4)
+
+    def roms(self, name, radix):
+        """
+        Returns
+        -------
+        roms : list of tuple
+            The memory files of the base and delta tables, as written by `memory_file.write_memories`.
+        """
+        return [('%s_base.mem' % name, self.base, self.bw, radix),
+                ('%s_delta.mem' % name, self.delta, self.dw, radix)]
+
+    def print_summary(self):
+        print('Interpolating %d segments of %d codes' % (self.n_segments, 2 ** self.lw))
+        print('Base format is s(%d,%d), delta format is s(%d,%d)' % (self.bw, self.of + self.gw, self.dw,
+                                                                      self.of + self.gw))
+        print('The tables have %d bits, the maximum error is %g' % (self.n_rom_bits, self.max_error))
@@ -1,5 +1,4 @@
 import math
-import itertools
 import numpy as np
 from . import mechatronics
 
@@ -21,10 +20,27 @@ class LtiFormatsCoefficients(object):
             - cof_word_length: The word length for the 'fixed' method.
             - cof_frac_length: The fractional length for the 'fixed' method.
             - cof_threshold: The bound on the error between the quantized and unquantized systems.
+            - max_csd_digits: The largest number of nonzero canonical signed digits of each coefficient, None for no
+              limit. The search then finds the fractional length for which the rounded coefficients meet the
+              threshold.
+            - word_lengths: 'uniform' for one format for all the coefficients, 'nonuniform' for a fractional length
+              per coefficient set by its sensitivity, at most `cof_frac_length`.
         """
 
+        self._init_metrics()
+        self._n_metric_evals = 0
+        self._max_digits = params.get('max_csd_digits')
+        self._cfs = None
+
         method = params['cof_scaling_method']
         metric = self._select_cof_scaling_method(method)
+        word_lengths = params.get('word_lengths', 'uniform')
+        if word_lengths not in ('uniform', 'nonuniform'):
+            msg = 'Valid word_lengths values: uniform | nonuniform.'
+            raise ValueError(msg)
+        if word_lengths == 'nonuniform' and (metric is None or self._max_digits is not None):
+            msg = 'The non-uniform word lengths require a cof_scaling_method other than fixed and no max_csd_digits.'
+            raise ValueError(msg)
 
         if metric is None:
             self._cw = params['cof_word_length']
@@ -32,6 +48,8 @@ class LtiFormatsCoefficients(object):
         else:
             self._threshold = params['cof_threshold']
             self._cw, self._cf = self._set_coefficient_format(metric, system)
+            if word_lengths == 'nonuniform':
+                self._cw, self._cf, self._cfs = self._set_nonuniform_frac_lengths(metric, system)
 
     @property
     def cof_word_length(self):
@@ -41,6 +59,48 @@ class LtiFormatsCoefficients(object):
     def cof_frac_length(self):
         return self._cf
 
+    @property
+    def cof_frac_lengths(self):
+        """
+        The fractional lengths of each coefficient of A, B, C and D, None for a uniform format.
+        """
+        return self._cfs
+
+    @property
+    def max_csd_digits(self):
+        return self._max_digits
+
+    @property
+    def n_metric_evals(self):
+        """
+        The number of candidate formats whose metric was evaluated by the search.
+        """
+        return self._n_metric_evals
+
+    def _init_metrics(self):
+
+        self._hinf_context = mechatronics.HinfNormContext()
+        self._ref_norms = {}
+
+    @classmethod
+    def cof_metric(cls, method):
+        """
+        Returns the metric of a cof_scaling_method other than 'fixed', to score quantized systems outside of the format
+        search. The metric keeps its own reference norms, so it must only be applied to one unquantized system.
+
+        Returns
+        -------
+        metric : function: (controlinverilog.StateSpace, controlinverilog.StateSpace)->float
+            The error of the quantized system, the second argument, relative to the unquantized one.
+        """
+        formats = cls.__new__(cls)
+        formats._init_metrics()
+        metric = formats._select_cof_scaling_method(method)
+        if metric is None:
+            msg = 'Valid cof_scaling_method values: hinf | h2 | pole | impulse.'
+            raise ValueError(msg)
+        return metric
+
     def _select_cof_scaling_method(self, method):
 
         funcs = {'hinf': self.metric_hinf,
@@ -62,62 +122,207 @@ class LtiFormatsCoefficients(object):
         This function selects the coefficient word and fractional lengths.
         """
 
-        # Find the largest coefficient to determine the location of the most
-        # significant bit.
-        max_param = max(map(lambda x: np.amax(np.abs(x)), sys.cofs[:3]))
-        int_w = math.ceil(math.log2(max_param))
+        int_w = self.integer_length(sys)
 
         def eval_metric(cf):
-            # scale = 2 ** cf
-            # func = lambda mat: np.around(scale * mat) / scale
-            # sys_q = sys.transform_params(func)
-            sys_q = sys.quantized_system(cf)
-            met = metric(sys, sys_q)
-            return met
+            if cf not in evaluated:
+                sys_q = sys.quantized_system(cf, self._max_digits)
+                err = metric(sys, sys_q)
+                # The metric of a nearly exact quantized system may be lost to roundoff.
+                evaluated[cf] = None if np.isnan(err) else err < self._threshold
+            return evaluated[cf]
 
         # Find the location of the least significant bit.
-        flt = filter(lambda cf: eval_metric(cf) < self._threshold, itertools.count(1 - int_w))
-
-        cf_ = next(flt)
+        evaluated = {}
+        # A double has 53 bits, so longer fractional lengths don't change the coefficients. Limiting the number of
+        # digits limits the precision of the coefficients, so the threshold may then not be met at any of them.
+        cf_ = self._search_frac_length(eval_metric, max(1 - int_w, 1), cf_max=max(54 - int_w, 1))
+        self._n_metric_evals = len(evaluated)
+        if cf_ is None:
+            if self._max_digits is None:
+                msg = 'No coefficient format meets the threshold.'
+            else:
+                msg = 'No coefficient format meets the threshold with %d nonzero digits.' % self._max_digits
+            raise ValueError(msg)
         cw = 1 + int_w + cf_
 
         return cw, cf_
 
+    def _set_nonuniform_frac_lengths(self, metric, sys):
+        """
+        Assigns each coefficient its own fractional length, at most the uniform one. A coefficient half as sensitive
+        contributes the same error with one fractional bit less, so a coefficient drops one bit per halving of its
+        sensitivity below that of the most sensitive one. The drops are capped at the largest value for which the
+        metric still meets the threshold, so no coefficient, and no register, is wider than with the uniform format.
+        """
+        sens = self.sensitivities(sys)
+        s_max = max(np.amax(s) for s in sens)
+        drops = [np.floor(np.log2(s_max / np.maximum(s, s_max * 2.0 ** -60))).astype(int) for s in sens]
+        max_drop = int(max(np.amax(drop) for drop in drops))
+
+        def frac_lengths(cap):
+            return tuple(self._cf - np.minimum(drop, cap) for drop in drops)
+
+        def eval_metric(k):
+            if k not in evaluated:
+                sys_q = sys.nonuniform_quantized_system(frac_lengths(max_drop - k))
+                evaluated[k] = metric(sys, sys_q) < self._threshold
+            return evaluated[k]
+
+        # Without drops the coefficients are those of the uniform format, which meet the threshold.
+        evaluated = {max_drop: True}
+        k = self._search_frac_length(eval_metric, 0, cf_max=max_drop)
+        self._n_metric_evals += len(evaluated) - 1
+        return self._cw, self._cf, frac_lengths(max_drop - k)
+
+    @staticmethod
+    def sensitivities(sys):
+        """
+        The L2 sensitivity of the transfer function to a coefficient is bounded by the product of the norms of the
+        transfer functions into and out of it. The norm from the inputs to state j is the square root of Wc[j, j] of
+        the controllability Gramian and from state i to the outputs that of Wo[i, i] of the observability Gramian, so
+        a_ij has the sensitivity sqrt(Wo[i, i] * Wc[j, j]). A and B of a delta operator system are scaled by delta in
+        the equivalent shift operator system.
+
+        Returns
+        -------
+        sens_a, sens_b, sens_c, sens_d : ndarray
+            The sensitivity to each coefficient of A, B, C and D.
+        """
+        sysz = sys.delta2shift() if sys.is_delta() else sys
+        wc = np.sqrt(np.diag(sysz.controllability_gramian()))
+        wo = np.sqrt(np.diag(sysz.observability_gramian()))
+        scale = sys.delta if sys.is_delta() else 1.0
+        sens_a = scale * np.outer(wo, wc)
+        sens_b = scale * np.outer(wo, np.ones(sys.n_input))
+        sens_c = np.outer(np.ones(sys.n_output), wc)
+        sens_d = np.ones((sys.n_output, sys.n_input))
+        return sens_a, sens_b, sens_c, sens_d
+
+    @staticmethod
+    def integer_length(sys):
+        """
+        Returns
+        -------
+        int_w : int
+            The location of the most significant bit of the largest coefficient, D included.
+        """
+        max_param = max(map(lambda x: np.amax(np.abs(x)), sys.cofs))
+        return math.ceil(math.log2(max_param))
+
+    @staticmethod
+    def _search_frac_length(accept, cf_min, n_verify=2, cf_max=None):
+        """
+        Finds the smallest fractional length accepted by `accept`, assuming the quantization error roughly decreases
+        as the fractional length grows. The step from `cf_min` doubles until a fractional length is accepted, then the
+        boundary is bisected. The error isn't strictly monotonic, so the `n_verify` fractional lengths below the
+        boundary are also checked and the search continues downwards if one of them is accepted. If `accept` can't
+        decide a step, the search is limited to the fractional lengths below it and the step is halved.
+
+        Parameters
+        ----------
+        accept : function: int->None|bool
+            Returns True if the fractional length meets the threshold, None if that can't be decided.
+        cf_min : int
+            The smallest fractional length to consider.
+        n_verify : int
+            The number of fractional lengths below the boundary to verify.
+        cf_max : None | int
+            The largest fractional length to consider, None for no limit.
+
+        Returns
+        -------
+        cf : None | int
+            The smallest accepted fractional length, None if none up to `cf_max` is accepted.
+        """
+        if accept(cf_min):
+            return cf_min
+
+        lo, step = cf_min, 1
+        while True:
+            if cf_max is not None and lo + step >= cf_max:
+                if cf_max <= lo:
+                    return None
+                step = cf_max - lo
+            accepted = accept(lo + step)
+            if accepted is None:
+                cf_max, step = lo + step - 1, max(step // 2, 1)
+            elif accepted:
+                break
+            elif lo + step == cf_max:
+                return None
+            else:
+                lo, step = lo + step, 2 * step
+        hi = lo + step
+
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if accept(mid):
+                hi = mid
+            else:
+                lo = mid
+
+        cf = hi - 2
+        while cf >= max(cf_min, hi - 1 - n_verify):
+            if accept(cf):
+                hi = cf
+            cf -= 1
+        return hi
+
     def print_summary(self):
 
         print('--- Coefficient Format Information ---')
         print('Coefficient format: s(%d,%d)' % (self.cof_word_length, self.cof_frac_length))
+        if self._max_digits is not None:
+            print('Nonzero digits per coefficient: %d' % self._max_digits)
+        if self._cfs is not None:
+            cfs = np.concatenate([cfs.ravel() for cfs in self._cfs])
+            print('Coefficient fractional lengths: %d to %d' % (np.amin(cfs), np.amax(cfs)))
+        print('Metric evaluations: %d' % self.n_metric_evals)
         print()
 
     ####################################################################################################################
     # Metrics that measure the difference between two system.
     ####################################################################################################################
-    @staticmethod
-    def metric_h2(sys, sys_q):
+    def _reference_norm(self, key, norm_func, sys):
+        """
+        The norm of the unquantized system is the same for every candidate format, so it is only computed once.
+        """
+        if key not in self._ref_norms:
+            self._ref_norms[key] = norm_func(sys)
+        return self._ref_norms[key]
+
+    def metric_h2(self, sys, sys_q):
 
         if sys.is_delta() is True:
             sys = sys.delta2shift()
             sys_q = sys_q.delta2shift()
 
-        sys_diff = sys - sys_q
-        if np.any(sys_diff.poles() == 1.0):
+        # The poles of the error system are those of both systems, and those of `sys` are cached across candidates.
+        if np.any(sys.poles() == 1.0) or np.any(sys_q.poles() == 1.0):
             return np.inf
-        a = mechatronics.norm_h2_discrete(*sys_diff.cofs)
-        b = mechatronics.norm_h2_discrete(*sys.cofs)
-        return a / b
+        sys_diff = sys - sys_q
+        a = mechatronics.norm_h2_discrete(*sys_diff.cofs[:3])
+        def norm_func(x):
+            return mechatronics.norm_h2_discrete(*x.cofs[:3], wo=x.observability_gramian())
 
-    @staticmethod
-    def metric_hinf(sys, sys_q):
+        b = self._reference_norm('h2', norm_func, sys)
+        return a / b
 
+    def metric_hinf(self, sys, sys_q):
+        """
+        The error systems of successive candidate formats share a context that seeds each H∞ norm evaluation with
+        the peak frequency of the previous one.
+        """
         if sys.is_delta() is True:
             sys = sys.delta2shift()
             sys_q = sys_q.delta2shift()
 
-        sys_diff = sys - sys_q
-        if np.any(sys_diff.poles() == 1.0):
+        if np.any(sys.poles() == 1.0) or np.any(sys_q.poles() == 1.0):
             return np.inf
-        a = mechatronics.norm_hinf_discrete(*sys_diff.cofs)
-        b = mechatronics.norm_hinf_discrete(*sys.cofs)
+        sys_diff = sys - sys_q
+        a = self._hinf_context.norm(*sys_diff.cofs)
+        b = self._reference_norm('hinf', lambda x: mechatronics.norm_hinf_discrete(*x.cofs, schur=x.schur()), sys)
         return a / b
 
     @staticmethod
@@ -144,6 +349,9 @@ class LtiFormatsCoefficients(object):
         if not sys.is_siso():
             message = 'cof_scaling_method `impulse` only for SISO systems.'
             raise ValueError(message)
+        # The impulse response of an unstable quantized system doesn't decay.
+        if not sys_q.is_asymtotically_stable():
+            return np.inf
         sys_diff = sys - sys_q
         _, y = sys.discrete_siso_impulse_response(n_tc=20.0)
         _, yd = sys_diff.discrete_siso_impulse_response(n_tc=20.0)
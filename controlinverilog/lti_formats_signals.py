@@ -1,9 +1,6 @@
 import math
-import itertools
 import numpy as np
-import scipy.linalg as linalg
 from . import mechatronics
-from .state_space import StateSpace
 
 
 class LtiFormatsSignals(object):
@@ -24,6 +21,8 @@ class LtiFormatsSignals(object):
             - input_word_length: The word length of the input signals.
             - input_frac_length: The fractional length of the input signals.
             - sig_scaling_method: 'hinf' | 'h2' | 'overshoot' | 'safe'
+            - word_lengths: 'uniform' for one format for all the states, 'nonuniform' for a format per state set by its
+              norm and its noise gain, at most `state_word_length` and `state_frac_length`.
         lti_format_cofs : controlinverilog.lti_formats_coefficients.LtiFormatsCoefficients
             The object containing the coefficient fixed point formats.
         """
@@ -35,14 +34,25 @@ class LtiFormatsSignals(object):
         self._if = params['input_frac_length']
 
         method = params['sig_scaling_method']
-        metric = self._select_signal_scaling_method(method)
-        if metric is None:
+        metrics = self.select_signal_scaling_method(method)
+        word_lengths = params.get('word_lengths', 'uniform')
+        if word_lengths not in ('uniform', 'nonuniform'):
+            msg = 'Valid word_lengths values: uniform | nonuniform.'
+            raise ValueError(msg)
+        if word_lengths == 'nonuniform' and metrics is None:
+            msg = 'The non-uniform word lengths require a sig_scaling_method other than fixed.'
+            raise ValueError(msg)
+
+        if metrics is None:
             self._sf = params['state_frac_length']
             self._sw = params['state_word_length']
             self._of = params['output_frac_length']
             self._ow = params['output_word_length']
         else:
-            self._sf, self._of, self._sw, self._ow = self._set_signal_format(metric, system)
+            self._sf, self._of, self._sw, self._ow = self._set_signal_format(*metrics, system)
+        self._sfs = self._sws = None
+        if word_lengths == 'nonuniform':
+            self._sf, self._of, self._sw, self._ow, self._sfs, self._sws = self._set_nonuniform_state_formats(system)
         self._rw = self._cw + self._sw - 1
         self._rf = self._cf + self._sf
 
@@ -54,6 +64,20 @@ class LtiFormatsSignals(object):
     def state_word_length(self):
         return self._sw
 
+    @property
+    def state_frac_lengths(self):
+        """
+        The fractional length of each state, None for a uniform format.
+        """
+        return self._sfs
+
+    @property
+    def state_word_lengths(self):
+        """
+        The word length of each state, None for a uniform format.
+        """
+        return self._sws
+
     @property
     def output_frac_length(self):
         return self._of
@@ -70,15 +94,27 @@ class LtiFormatsSignals(object):
     def register_word_length(self):
         return self._rw
 
-    def _select_signal_scaling_method(self, method):
+    @classmethod
+    def select_signal_scaling_method(cls, method):
+        """
+        Returns
+        -------
+        func : function: controlinverilog.StateSpace->float
+            The norm of a system.
+        norms_func : function: controlinverilog.StateSpace->ndarray
+            The norm from the inputs to each output of a system. The H∞ and H2 norms are computed in a batch, the
+            others evaluate `func` for each output in turn.
+        """
 
         if method == 'fixed':
             return None
         
-        funcs = {'hinf': self._discrete_siso_hinf_gain,
-                 'h2': self._discrete_siso_h2_gain,
-                 'overshoot': self._discrete_siso_overshoot_gain,
-                 'safe': self._discrete_siso_safe_gain}
+        funcs = {'hinf': cls._discrete_siso_hinf_gain,
+                 'h2': cls._discrete_siso_h2_gain,
+                 'overshoot': cls._discrete_siso_overshoot_gain,
+                 'safe': cls._discrete_siso_safe_gain}
+        batch_funcs = {'hinf': cls._discrete_hinf_gains,
+                       'h2': cls._discrete_h2_gains}
 
         if method not in funcs:
             vals = ' | '.join(funcs.keys())
@@ -86,9 +122,10 @@ class LtiFormatsSignals(object):
             raise ValueError(msg)
 
         func = funcs[method]
-        return func
+        norms_func = batch_funcs.get(method, cls._per_output(func))
+        return func, norms_func
 
-    def _set_signal_format(self, norm_func, sys):
+    def _set_signal_format(self, norm_func, norms_func, sys):
         """
         Set the word length of the output, state and intermediate registers. The coefficient word length must be set
         before calling this function for accurate results.
@@ -98,26 +135,102 @@ class LtiFormatsSignals(object):
             the final realization.
         """
 
-        state_norms = self.state_norms(sys, norm_func)
+        state_norms = self.state_norms(sys, norms_func)
         state_norm = np.amax(state_norms)
-        output_norms = self.output_norms(sys, norm_func)
+        output_norms = self.output_norms(sys, norms_func)
         output_norm = np.amax(output_norms)
         sys_norm = norm_func(sys)
+        self._norms = state_norms, output_norm, sys_norm
 
-        no = math.ceil(math.log(output_norm, 2))
-        ns = math.ceil(math.log(state_norm, 2))
-
-        def eval_dynamic_range(sf):
-            return self._dynamic_range(sys, sf, self._cf, sys_norm)
+        ns, no = self.integer_growth(state_norm, output_norm, self._cw, self._cf)
 
-        flt = filter(lambda sf: eval_dynamic_range(sf) > self._sig_threshold, itertools.count(0))
-        sf_ = of = next(flt)
+        gains = self.noise_gains(sys, self._cf)
+        sf_ = of = self._min_frac_length(gains, sys_norm)
 
         ow = self._iw + no + of - self._if
         sw = self._iw + ns + sf_ - self._if
 
         return sf_, of, sw, ow
 
+    def _set_nonuniform_state_formats(self, sys):
+        """
+        Sets a word and fractional length per state, at most the uniform ones. The integer bits of a state follow its
+        own norm rather than the largest one. The roundoff noise of a state reaches the outputs with the gains of
+        `state_noise_gains`, so a state whose largest gain is four times smaller adds the same noise with one
+        fractional bit less. The drops are capped at the largest value for which the dynamic range still exceeds
+        `sig_threshold`, so the inputs, the outputs and the registers keep the uniform formats.
+        """
+        state_norms, _, sys_norm = self._norms
+        gains = self.state_noise_gains(sys)
+        if sys.is_delta():
+            df = int(math.log(1 / sys.delta, 2))
+            fixed_gains = 1 + 4.0 ** (df - self._cf) * self._noise_gains_delta(sys)[1]
+        else:
+            fixed_gains = np.ones(sys.n_output)
+
+        state_gains = np.amax(gains, axis=0)
+        g_max = np.amax(state_gains)
+        drops = np.floor(0.5 * np.log2(g_max / np.maximum(state_gains, g_max * 2.0 ** -60))).astype(int)
+
+        def dynamic_range(cap):
+            variances = 1.0 / 12.0 * 4.0 ** -self._sf * (gains @ 4.0 ** np.minimum(drops, cap) + fixed_gains)
+            return 10 * np.log10(sys_norm ** 2 / np.amax(variances))
+
+        # Without drops the noise is that of the uniform format, which exceeds the threshold.
+        cap = int(np.amax(drops))
+        while cap > 0 and dynamic_range(cap) <= self._sig_threshold:
+            cap -= 1
+
+        # A state keeps at least a sign and one more bit.
+        ints = self._iw - self._if + np.ceil(np.log2(state_norms)).astype(int)
+        sfs = np.clip(self._sf - np.minimum(drops, cap), 2 - ints, self._sf)
+        sws = np.maximum(ints + sfs, 2)
+        return self._sf, self._of, self._sw, self._ow, sfs, sws
+
+    @staticmethod
+    def state_noise_gains(sys):
+        """
+        The roundoff noise of state j enters the outputs through C and the state equation through column j of A. Its
+        gain to output o is C[o, j]^2 + [C Wc C'][o, o], where Wc is the controllability Gramian of column j of A
+        under the state transition matrix, A for the shift operator and I + delta * A for the delta operator, or
+        equivalently C[o, j]^2 + [A' Wo A][j, j], where Wo is the observability Gramian of output o. The gains of all
+        the states add up to the state part of `_noise_gains_shift` and `_noise_gains_delta`, which is read off a single
+        Gramian. Each gain is quadratic in both C and A, so splitting it by state takes one Gramian per output or one
+        per state. The fewer are solved, at most min(n_output, n_order).
+
+        Returns
+        -------
+        gains : ndarray
+            The variance of each output due to unit variance roundoff noise on each state, with shape
+            (n_output, n_order).
+        """
+        mat_a, _, mat_c, _ = sys.cofs
+        a_bar = np.identity(sys.n_order) + sys.delta * mat_a if sys.is_delta() else mat_a
+        gains = mat_c ** 2
+        if sys.n_output <= sys.n_order:
+            for o in range(sys.n_output):
+                mat_wo = mechatronics.observability_gramian_discrete(a_bar, mat_c[[o], :])
+                gains[o] += np.einsum('ij,ik,kj->j', mat_a, mat_wo, mat_a)
+        else:
+            for j in range(sys.n_order):
+                mat_wc = mechatronics.controllability_gramian_discrete(a_bar, mat_a[:, [j]])
+                gains[:, j] += np.einsum('ij,jk,ik->i', mat_c, mat_wc, mat_c)
+        return gains
+
+    @staticmethod
+    def integer_growth(state_norm, output_norm, cw, cf):
+        """
+        Returns
+        -------
+        ns, no : int
+            The number of integer bits the states and the outputs have over the input.
+        """
+        no = math.ceil(math.log(output_norm, 2))
+        # The inputs are buffered in registers of the state format, so it has at least the integer bits of the input.
+        # The outputs are accumulated in registers of the state times the coefficient format, so these must hold them.
+        ns = max(math.ceil(math.log(state_norm, 2)), 0, no - (cw - cf - 1))
+        return ns, no
+
     @staticmethod
     def _discrete_siso_overshoot_gain(sys):
         """
@@ -125,7 +238,7 @@ class LtiFormatsSignals(object):
         -------
         The overshoot due to a unit step of the system.
         """
-        _, y = sys.discrete_siso_step_response(sys)
+        _, y = sys.discrete_siso_step_response()
         return np.amax(y)
 
     @staticmethod
@@ -148,7 +261,7 @@ class LtiFormatsSignals(object):
             sysz = sys.delta2shift()
         else:
             sysz = sys
-        return mechatronics.norm_hinf_discrete(*sysz.cofs)
+        return mechatronics.norm_hinf_discrete(*sysz.cofs, schur=sysz.schur())
 
     @staticmethod
     def _discrete_siso_h2_gain(sys):
@@ -156,7 +269,42 @@ class LtiFormatsSignals(object):
             sysz = sys.delta2shift()
         else:
             sysz = sys
-        return mechatronics.norm_h2_discrete(*sysz.cofs)
+        return mechatronics.norm_h2_discrete(*sysz.cofs[:3], wo=sysz.observability_gramian())
+
+    @staticmethod
+    def _discrete_hinf_gains(sys):
+        if sys.is_delta() is True:
+            sysz = sys.delta2shift()
+        else:
+            sysz = sys
+        return mechatronics.norms_hinf_discrete(*sysz.cofs, schur=sysz.schur())
+
+    @staticmethod
+    def _discrete_h2_gains(sys):
+        if sys.is_delta() is True:
+            sysz = sys.delta2shift()
+        else:
+            sysz = sys
+        return mechatronics.norms_h2_discrete(*sysz.cofs[:3])
+
+    @staticmethod
+    def _per_output(func):
+        """
+        Returns
+        -------
+        norms_func : function: controlinverilog.StateSpace->ndarray
+            Evaluates `func` on the system from the inputs to each output in turn.
+        """
+        def norms_func(sys):
+            _, b0, c0, d0 = sys.cofs
+
+            def idx2norm(idx):
+                sys_out = sys.with_io(b0, c0[[idx], :], d0[[idx], :])
+                return func(sys_out)
+
+            return np.array(list(map(idx2norm, range(sys.n_output))))
+
+        return norms_func
 
     def print_summary(self):
 
@@ -164,6 +312,8 @@ class LtiFormatsSignals(object):
         # print('Input word length (IW): s(%d,%d)' % (self.iw, self.if_))
         print('Output word length (OW): s(%d,%d)' % (self.output_word_length, self.output_frac_length))
         print('State word length (SW): s(%d,%d)' % (self.state_word_length, self.state_frac_length))
+        if self._sws is not None:
+            print('State word lengths: ' + ', '.join('s(%d,%d)' % f for f in zip(self._sws, self._sfs)))
         print('Register word length (RW): s(%d,%d)' % (self.register_word_length, self.register_frac_length))
 
         # print()
@@ -175,110 +325,132 @@ class LtiFormatsSignals(object):
         print()
 
     @staticmethod
-    def _variances_shift(sys, var_e):
+    def _noise_gains_shift(sys):
+        """
+        The state roundoff noise enters the state equation through A. Its contribution to every output is read off
+        the diagonal of C P C', where P is the controllability Gramian of the noise, so a single Lyapunov equation is
+        solved regardless of the number of outputs.
 
+        Returns
+        -------
+        gains : ndarray
+            The variance of each output due to unit variance roundoff noise on the state and output registers.
+        """
         mat_a, _, mat_c, _ = sys.cofs
-
-        def variance_single_output(idx):
-            c_idx = mat_c[[idx], :]
-            a_bar = mat_a
-            b_bar = np.hstack((mat_a, np.zeros((sys.n_order, 1))))
-            c_bar = c_idx
-            d_bar = np.hstack((c_idx, np.ones((1, 1))))
-            sigma = np.identity(sys.n_order + 1) * var_e
-            wo = mechatronics.observability_gramian_discrete(a_bar, c_bar)
-            var_y = np.trace(sigma @ (d_bar.T @ d_bar + b_bar.T @ wo @ b_bar))
-            return var_y
-
-        vfunc = np.vectorize(variance_single_output)
-        variances = vfunc(np.arange(sys.n_output))
-        return variances
+        mat_p = mechatronics.controllability_gramian_discrete(mat_a, mat_a)
+        gains = np.einsum('ij,ij->i', mat_c @ (mat_p + np.identity(sys.n_order)), mat_c) + 1
+        return gains
 
     @staticmethod
-    def _variances_delta(sys, var_e, var_delta):
+    def _noise_gains_delta(sys):
+        """
+        The state roundoff noise enters the state equation through A and the delta shift noise through delta*I. The
+        contribution of each source to every output is read off the diagonal of C P C', where P is the controllability
+        Gramian of that source.
 
+        Returns
+        -------
+        gains_e : ndarray
+            The variance of each output due to unit variance roundoff noise on the state and output registers.
+        gains_delta : ndarray
+            The variance of each output due to unit variance roundoff noise from the delta operator shift.
+        """
         mat_a, _, mat_c, _ = sys.cofs
+        a_bar = np.identity(sys.n_order) + sys.delta * mat_a
+        mat_pe = mechatronics.controllability_gramian_discrete(a_bar, mat_a)
+        mat_pd = mechatronics.controllability_gramian_discrete(a_bar, sys.delta * np.identity(sys.n_order))
+        gains_e = np.einsum('ij,ij->i', mat_c @ (mat_pe + np.identity(sys.n_order)), mat_c) + 1
+        gains_delta = np.einsum('ij,ij->i', mat_c @ mat_pd, mat_c)
+        return gains_e, gains_delta
 
-        def variance_single_output(idx):
-            c_idx = mat_c[[idx], :]
-            a_bar = np.identity(sys.n_order) + sys.delta * mat_a
-            b_bar = np.hstack((mat_a, np.zeros((sys.n_order, 1)), sys.delta * np.identity(sys.n_order)))
-            c_bar = c_idx
-            d_bar = np.hstack((c_idx, np.ones((1, 1)), np.zeros((1, sys.n_order))))
-            sigma = linalg.block_diag(np.identity(sys.n_order + 1) * var_e, np.identity(sys.n_order) * var_delta)
-            wo = mechatronics.observability_gramian_discrete(a_bar, c_bar)
-            var_y = np.trace(sigma @ (d_bar.T @ d_bar + b_bar.T @ wo @ b_bar))
-            return var_y
-
-        vfunc = np.vectorize(variance_single_output)
-        variances = vfunc(np.arange(sys.n_output))
-        return variances
+    @staticmethod
+    def _variances_shift(sys, var_e):
+        return var_e * LtiFormatsSignals._noise_gains_shift(sys)
 
-    def _dynamic_range(self, sys, sf, cf, sys_norm):
+    @staticmethod
+    def _variances_delta(sys, var_e, var_delta):
+        gains_e, gains_delta = LtiFormatsSignals._noise_gains_delta(sys)
+        return var_e * gains_e + var_delta * gains_delta
 
-        var_e = 1.0 / 12.0 * (2 ** (-sf)) ** 2
+    @staticmethod
+    def noise_gains(sys, cf):
+        """
+        The output variances are linear in the roundoff noise variances. For the delta operator, the variance of the
+        noise from the delta shift is a fixed multiple of the state roundoff noise variance, 2^(2*(df-cf)), so both
+        sources combine into a single gain that doesn't depend on the state fractional length.
+
+        Returns
+        -------
+        gains : ndarray
+            The variance of each output relative to the variance of the state roundoff noise.
+        """
         if sys.is_shift():
-            variances = self._variances_shift(sys, var_e)
+            return LtiFormatsSignals._noise_gains_shift(sys)
         elif sys.is_delta():
             df = int(math.log(1 / sys.delta, 2))
-            exponent = -sf - cf + df
-            var_d = 1.0 / 12.0 * (2 ** exponent) ** 2
-            variances = self._variances_delta(sys, var_e, var_d)
-        else:
-            msg = 'This function applies to shift or delta operator systems only.'
-            raise ValueError(msg)
-        metric = 10 * np.log10(sys_norm ** 2 / np.amax(variances))
+            gains_e, gains_delta = LtiFormatsSignals._noise_gains_delta(sys)
+            return gains_e + 4.0 ** (df - cf) * gains_delta
+
+        msg = 'This function applies to shift or delta operator systems only.'
+        raise ValueError(msg)
+
+    @staticmethod
+    def dynamic_range_from_gains(gains, sf, sys_norm):
+        var_e = 1.0 / 12.0 * (2 ** (-sf)) ** 2
+        metric = 10 * np.log10(sys_norm ** 2 / (var_e * np.amax(gains)))
         return metric
 
+    def _dynamic_range(self, sys, sf, cf, sys_norm):
+        gains = self.noise_gains(sys, cf)
+        return self.dynamic_range_from_gains(gains, sf, sys_norm)
+
+    def _min_frac_length(self, gains, sys_norm):
+        """
+        The dynamic range grows by 20*log10(2) dB for each fractional bit of the states, so the smallest fractional
+        length exceeding `sig_threshold` is solved in closed form. The candidate is then checked against the dynamic
+        range itself to guard against rounding at the boundary.
+        """
+        def exceeds(sf):
+            return self.dynamic_range_from_gains(gains, sf, sys_norm) > self._sig_threshold
+
+        dr0 = self.dynamic_range_from_gains(gains, 0, sys_norm)
+        sf = max(0, math.floor((self._sig_threshold - dr0) / (20 * math.log10(2))) + 1)
+        while not exceeds(sf):
+            sf += 1
+        while sf > 0 and exceeds(sf - 1):
+            sf -= 1
+        return sf
+
     @staticmethod
     def state_norms(sys, func):
         """
-        A SISO system for each state is created to evaluate the state norms. First, an equivalent single input is made
-        where all inputs are equal. Then the output is equal to the selected state. This function returns the norms of
-        this set of SISO systems.
+        First, an equivalent single input is made where all inputs are equal. Then a system whose outputs are the
+        states is created. This function returns the norms from the combined input to each state.
 
         Parameters
         ----------
         sys : controlinverilog.state_space.StateSpace
             The system to evaluate the norms from a combined input to each state.
-        func : function: controlinverilog.State->float
-            The function to calculate the norm of the SISO systems.
+        func : function: controlinverilog.StateSpace->ndarray
+            The function to calculate the norm from the input to each output of a system.
 
         Returns
         -------
         state_norms : ndarray
             The norms of the system from the combined input to each state.
         """
-        a0, b0, c0, d0 = sys.cofs
-
-        def state_system(idx):
-            b = b0 @ np.ones((sys.n_input, 1))
-            c = np.zeros((1, sys.n_order))
-            c[0, idx] = 1
-            d = np.zeros((1, 1))
-            sys_state = StateSpace((a0, b, c, d), dt=sys.dt, delta=sys.delta)
-            return sys_state
-
-        def idx2norm(idx):
-            return func(state_system(idx))
-
-        state_norms = np.array(list(map(idx2norm, range(sys.n_order))))
-        return state_norms
+        b0 = sys.cofs[1]
+        b = b0 @ np.ones((sys.n_input, 1))
+        c = np.identity(sys.n_order)
+        d = np.zeros((sys.n_order, 1))
+        sys_states = sys.with_io(b, c, d)
+        return func(sys_states)
 
     @staticmethod
     def output_norms(sys, func):
 
-        a0, b0, c0, d0 = sys.cofs
-
-        def output_system(idx):
-            bn = b0 @ np.ones((sys.n_input, 1))
-            cn = c0[[idx], :]
-            dn = d0[[idx], :] @ np.ones((sys.n_input, 1))
-            sys_out = StateSpace((a0, bn, cn, dn), dt=sys.dt, delta=sys.delta)
-            return sys_out
-
-        def idx2norm(idx):
-            return func(output_system(idx))
-
-        output_norms = np.array(list(map(idx2norm, range(sys.n_output))))
-        return output_norms
+        _, b0, c0, d0 = sys.cofs
+        bn = b0 @ np.ones((sys.n_input, 1))
+        dn = d0 @ np.ones((sys.n_input, 1))
+        sys_outputs = sys.with_io(bn, c0, dn)
+        return func(sys_outputs)
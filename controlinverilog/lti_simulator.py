@@ -0,0 +1,178 @@
+import numpy as np
+
+
+def _wrap(x, width):
+    """
+    Reinterprets the two's complement integers `x` as signed `width`-bit words, discarding the higher bits as the
+    verilog part selects and register assignments do. int64 arithmetic wraps modulo 2^64, so the result is exact for
+    widths up to 64 bits even when the intermediate values overflowed. Wider words are held in object arrays of python
+    integers, which don't overflow.
+    """
+    if x.dtype == object:
+        width = np.asarray(width, dtype=object)
+        half = 1 << (width - 1)
+        return ((x + half) & ((half << 1) - 1)) - half
+    if np.all(width >= 64):
+        return x
+    half = np.int64(1) << np.int64(width - 1)
+    mask = (np.int64(1) << np.int64(width)) - np.int64(1)
+    return ((x + half) & mask) - half
+
+
+class LtiSimulator(object):
+
+    def __init__(self, sys, params):
+        """
+        A bit accurate model of the datapath generated by LtiVerilog from `templates/lti_system.v`. It evaluates the
+        module one sample at a time, so it assumes consecutive `ce_in` pulses are further apart than the pipeline
+        latency, as they must be for the verilog to be correct. Registers of up to 64 bits are evaluated with int64
+        arithmetic, wider ones with python integers, which is much slower.
+
+        Parameters
+        ----------
+        sys : controlinverilog.state_space.StateSpace
+            The fixed point system, the coefficients are integers with the fractional length `params['cf']`.
+        params : dictionary
+            The same parameters passed to LtiVerilog: 'iw', 'ow', 'sw', 'cw', 'cf', 'if', 'sf' and 'del_par', and
+            optionally the non-uniform 'state_word_lengths' and 'state_frac_lengths'.
+        """
+        self.n_order = sys.n_order
+        self.n_inputs = sys.n_input
+        self.n_outputs = sys.n_output
+        self.iw = params['iw']
+        self.ow = params['ow']
+        self.sw = params['sw']
+        self.cw = params['cw']
+        self.cf = params['cf']
+        self.if_ = params['if']
+        self.sf = params['sf']
+        self.del_par = params['del_par']
+        self.rw = self.sw + self.cw - 1
+        self.dtype = np.int64 if self.rw <= 64 else object
+
+        # A state of fractional length sf is read from its register below the binary point at CF + SF - sf, and is
+        # shifted back to SF by the product.
+        if params.get('state_word_lengths') is None:
+            self.x_widths, self.x_offsets = self.sw, 0
+        else:
+            self.x_widths = np.asarray(params['state_word_lengths'], dtype=np.int64).astype(self.dtype)
+            self.x_offsets = self.sf - np.asarray(params['state_frac_lengths'], dtype=np.int64).astype(self.dtype)
+
+        mat_a, mat_b, mat_c, mat_d = (np.asarray(mat).astype(np.int64).astype(self.dtype) for mat in sys.cofs)
+        self.mat_a = mat_a
+        self.mat_b = mat_b
+        self.mat_c = mat_c
+        self.mat_d = mat_d
+
+    def initial_state(self, n_streams=1):
+        """
+        Returns
+        -------
+        state : ndarray
+            The zero initial value of the state registers `x_long` of each stream, with shape (n_streams, n_order).
+        """
+        return np.zeros((n_streams, self.n_order), dtype=self.dtype)
+
+    def simulate(self, sig_in):
+        """
+        Simulates the module from its initial state of zero.
+
+        Parameters
+        ----------
+        sig_in : ndarray
+            The input words with shape (n_samples, n_inputs). A one dimensional array is accepted for single input
+            systems. The words are read as IW-bit two's complement values.
+
+        Returns
+        -------
+        sig_out : ndarray
+            The signed OW-bit output words with shape (n_samples, n_outputs).
+        """
+        sig_in = np.asarray(sig_in, dtype=np.int64)
+        if sig_in.ndim == 1:
+            sig_in = sig_in[:, np.newaxis]
+        sig_out, _ = self.simulate_batch(sig_in[np.newaxis, :, :])
+        return sig_out[0]
+
+    def simulate_batch(self, sig_in, state=None):
+        """
+        Simulates independent input streams at once. The streams share the per sample loop over the state recursion,
+        so the cost per sample falls as the number of streams grows. The returned state resumes the simulation, so a
+        long recording can be processed in chunks.
+
+        Parameters
+        ----------
+        sig_in : ndarray
+            The input words with shape (n_streams, n_samples, n_inputs). An array with shape (n_streams, n_samples) is
+            accepted for single input systems. The words are read as IW-bit two's complement values.
+        state : None | ndarray
+            The state returned by the previous chunk, None to start from zero.
+
+        Returns
+        -------
+        sig_out : ndarray
+            The signed OW-bit output words with shape (n_streams, n_samples, n_outputs).
+        state : ndarray
+            The state registers after the last sample, with shape (n_streams, n_order).
+        """
+        sig_in = np.asarray(sig_in, dtype=np.int64).astype(self.dtype)
+        if sig_in.ndim == 2:
+            sig_in = sig_in[:, :, np.newaxis]
+        if sig_in.ndim != 3 or sig_in.shape[2] != self.n_inputs:
+            msg = 'The input must have shape (n_streams, n_samples, %d).' % self.n_inputs
+            raise ValueError(msg)
+
+        n_streams, n_samples, _ = sig_in.shape
+        if state is None:
+            state = self.initial_state(n_streams)
+        elif state.shape != (n_streams, self.n_order):
+            msg = 'The state must have shape (%d, %d).' % (n_streams, self.n_order)
+            raise ValueError(msg)
+
+        # The input buffer sign extends the input and aligns its binary point with the states.
+        u = _wrap(_wrap(sig_in, self.iw) << (self.sf - self.if_), self.sw)
+
+        # The input products don't depend on the state so they are evaluated for all samples at once.
+        bu = u @ self.mat_b.T
+        du = u @ self.mat_d.T
+
+        x = np.zeros((n_streams, n_samples, self.n_order), dtype=self.dtype)
+        x_long = np.array(state, dtype=self.dtype)
+        mat_at = self.mat_a.T
+        x_widths, x_offsets, cf, rw, dp = self.x_widths, self.x_offsets, self.cf, self.rw, self.del_par
+
+        for k in range(n_samples):
+            x_k = _wrap(x_long >> (cf + x_offsets), x_widths) << x_offsets
+            x[:, k, :] = x_k
+            dx = _wrap(x_k @ mat_at + bu[:, k, :], rw)
+            if dp is None:
+                x_long = dx
+            else:
+                x_long = _wrap(x_long + (dx >> dp), rw)
+
+        y_long = _wrap(x @ self.mat_c.T + du, rw)
+        sig_out = _wrap(y_long >> cf, self.ow)
+        if self.ow <= 64:
+            sig_out = sig_out.astype(np.int64)
+        return sig_out, x_long
+
+    def simulate_chunks(self, chunks, state=None):
+        """
+        Streams chunks of input through the module, carrying the state from one chunk to the next. Only one chunk is
+        held in memory at a time, so the chunks can be read lazily from a file or a memory mapped array.
+
+        Parameters
+        ----------
+        chunks : iterable of ndarray
+            Input chunks in the format accepted by `simulate_batch`. Every chunk must have the same number of streams.
+        state : None | ndarray
+            The initial state, None to start from zero.
+
+        Yields
+        ------
+        sig_out : ndarray
+            The output words of each chunk with shape (n_streams, n_samples, n_outputs).
+        """
+        for chunk in chunks:
+            sig_out, state = self.simulate_batch(chunk, state)
+            yield sig_out
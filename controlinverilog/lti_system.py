@@ -1,9 +1,11 @@
 import math
+import time
 import numpy as np
 import scipy.signal as signal
-from . import mechatronics
 from .state_space import StateSpace
 from .lti_verilog import LtiVerilog
+from .lti_verilog_folded import LtiVerilogFolded
+from .lti_simulator import LtiSimulator
 from .lti_formats_coefficients import LtiFormatsCoefficients
 from .lti_formats_signals import LtiFormatsSignals
 
@@ -29,7 +31,15 @@ class LtiSystem(object):
         operator='delta',
         sig_scaling_method='hinf',
         cof_scaling_method='hinf',
-        verbose=True
+        verbose=True,
+        keep_verilog=True,
+        multiplier='dsp',
+        max_csd_digits=None,
+        n_dsp=None,
+        f_clk=None,
+        delay_model=None,
+        realization='balanced',
+        word_lengths='uniform'
     ):
         """
         Contructs the verilog code implementing an LTI system.
@@ -51,7 +61,8 @@ class LtiSystem(object):
         cof_frac_length : int
             The coefficient fractional length if using 'fixed' cof_scaling method.
         n_add : int
-            The number of additions that can be simulataneously performed in one cycle.
+            The number of additions that can be simulataneously performed in one cycle. Unused if `f_clk` is given,
+            the number of additions of each adder stage is then planned to meet `f_clk`.
         cof_threshold : float
             A metric to set the coefficient fixed point formats. The small this number the larger the word length.
         sig_threshold : float
@@ -64,6 +75,34 @@ class LtiSystem(object):
             The method to calculate the fixed point format of the coefficients.
         verbose : bool
             True to print a summary of the conversion process.
+        keep_verilog : bool
+            True to keep the rendered verilog in memory. Otherwise it is rendered straight to the file when printed.
+        multiplier : 'dsp' | 'csd'
+            'dsp' implements each product with a multiplier. 'csd' implements it with shifts and additions of the
+            canonical signed digits of the coefficient, sharing the common subexpressions of the products by the same
+            signal.
+        max_csd_digits : None | int
+            The largest number of nonzero canonical signed digits of each coefficient, None for no limit. The
+            coefficients are rounded to that many digits and the coefficient format is searched for accordingly.
+        n_dsp : None | int
+            None for the fully parallel datapath with one multiplier per nonzero product. Otherwise the products are
+            time multiplexed on at most `n_dsp` multipliers over several clock cycles per sample, see
+            controlinverilog.lti_verilog_folded.LtiVerilogFolded.
+        f_clk : None | float
+            The target clock frequency. If given, the adder stages of the parallel datapath are planned to meet it
+            under `delay_model`, and it is checked that the datapath supports the sampling frequency `fs`.
+        delay_model : None | controlinverilog.timing.AdderDelayModel
+            The delay model of the adders, None for the default model.
+        realization : 'balanced' | 'modal'
+            'balanced' implements a balanced realization with a dense state matrix. 'modal' implements a real block
+            diagonal realization, with a 1x1 block per real pole and a 2x2 block per complex pair each balanced on its
+            own, so the state matrix takes about 2n instead of n^2 products.
+        word_lengths : 'uniform' | 'nonuniform'
+            'uniform' gives all the coefficients one format and all the states another. 'nonuniform' gives each
+            coefficient a fractional length set by the sensitivity of the coefficient metric to it, and each state a
+            format set by its norm and by its noise gain to the outputs, so the multipliers are only as wide as the
+            coefficient and the state require. It requires the dsp multiplier, the fully parallel datapath and no
+            `max_csd_digits`.
         """
 
         if isinstance(sys, signal.StateSpace) is True:
@@ -74,17 +113,24 @@ class LtiSystem(object):
         if sysa.is_asymtotically_stable() is False:
             raise ValueError('The system must be asymtotically stable.')
 
+        if word_lengths == 'nonuniform' and (multiplier != 'dsp' or n_dsp is not None):
+            msg = 'The non-uniform word lengths only support the dsp multiplier and the fully parallel datapath.'
+            raise ValueError(msg)
+
         self._verbose = verbose
+        self.stage_times = {}
 
-        sysm, del_par = self.set_system(sysa, dt=1.0 / fs, operator=operator)
+        sysm, del_par = self.set_system(sysa, dt=1.0 / fs, operator=operator, realization=realization)
 
         cof_params = dict()
         cof_params['cof_scaling_method'] = cof_scaling_method
         cof_params['cof_word_length'] = cof_word_length
         cof_params['cof_frac_length'] = cof_frac_length
         cof_params['cof_threshold'] = cof_threshold
+        cof_params['max_csd_digits'] = max_csd_digits
+        cof_params['word_lengths'] = word_lengths
         cof_params['verbose'] = verbose
-        cof_formats = LtiFormatsCoefficients(sysm, cof_params)
+        cof_formats = self._timed('LtiFormatsCoefficients', LtiFormatsCoefficients, sysm, cof_params)
 
         sig_params = dict()
         sig_params['sig_threshold'] = sig_threshold
@@ -95,10 +141,14 @@ class LtiSystem(object):
         sig_params['state_frac_length'] = state_frac_length
         sig_params['output_word_length'] = output_word_length
         sig_params['output_frac_length'] = output_frac_length
+        sig_params['word_lengths'] = word_lengths
         sig_params['verbose'] = verbose
-        sig_formats = LtiFormatsSignals(sysm, sig_params, cof_formats)
+        sig_formats = self._timed('LtiFormatsSignals', LtiFormatsSignals, sysm, sig_params, cof_formats)
 
-        assert sig_formats.state_frac_length - input_frac_length >= 0
+        if sig_formats.state_frac_length < input_frac_length:
+            msg = 'The state fractional length %d is below the input fractional length %d, increase sig_threshold.' % (
+                sig_formats.state_frac_length, input_frac_length)
+            raise ValueError(msg)
         assert (sig_formats.state_word_length - input_word_length
                 - sig_formats.state_word_length + input_word_length >= 0)
 
@@ -112,30 +162,59 @@ class LtiSystem(object):
         verilog_params['cf'] = cof_formats.cof_frac_length
         verilog_params['if'] = input_frac_length
         verilog_params['sf'] = sig_formats.state_frac_length
+        verilog_params['state_word_lengths'] = sig_formats.state_word_lengths
+        verilog_params['state_frac_lengths'] = sig_formats.state_frac_lengths
         verilog_params['del_par'] = del_par
+        verilog_params['keep_verilog'] = keep_verilog
+        verilog_params['multiplier'] = multiplier
+        verilog_params['f_clk'] = f_clk
+        verilog_params['delay_model'] = delay_model
 
-        sysf = sysm.fixed_point_system(cof_formats.cof_frac_length)
-        self.lti_verilog = LtiVerilog(sysf, verilog_params)
+        sysf = sysm.fixed_point_system(cof_formats.cof_frac_length, max_csd_digits, cof_formats.cof_frac_lengths)
+        if n_dsp is None:
+            self.lti_verilog = self._timed('LtiVerilog', LtiVerilog, sysf, verilog_params)
+        else:
+            if multiplier != 'dsp':
+                msg = 'The folded datapath only supports the dsp multiplier.'
+                raise ValueError(msg)
+            verilog_params['n_dsp'] = n_dsp
+            self.lti_verilog = self._timed('LtiVerilog', LtiVerilogFolded, sysf, verilog_params)
+        if f_clk is not None and fs > self.lti_verilog.max_sample_rate(f_clk):
+            msg = 'The datapath supports sampling frequencies up to %g Hz with %d multipliers.' % (
+                self.lti_verilog.max_sample_rate(f_clk), self.lti_verilog.n_multipliers)
+            raise ValueError(msg)
+        self.lti_simulator = LtiSimulator(sysf, verilog_params)
 
         if verbose is True:
             cof_formats.print_summary()
             sig_formats.print_summary()
+            if n_dsp is None:
+                self.lti_verilog.print_summary()
+            else:
+                self.lti_verilog.print_summary(f_clk)
+            if f_clk is not None:
+                self.lti_verilog.print_timing_report()
 
-    def set_system(self, sysa, dt, operator):
+    def set_system(self, sysa, dt, operator, realization='balanced'):
         """
         Computes parameters for verilog code generation.
         """
 
+        realizations = {'balanced': StateSpace.balanced_realization,
+                        'modal': StateSpace.modal_realization}
+        if realization not in realizations:
+            msg = 'Valid realization values: %s.' % ' | '.join(realizations.keys())
+            raise ValueError(msg)
+
         # step 1 - discretization using the bilinear transform
-        sysd = sysa.cont2shift(dt)
+        sysd = self._timed('cont2shift', sysa.cont2shift, dt)
 
-        # step 2 - convert to balanced realization
-        ab, bb, cb, db = mechatronics.balanced_realization_discrete(*sysd.cofs)
-        sysb = StateSpace((ab, bb, cb, db), dt=sysd.dt)
+        # step 2 - convert to a balanced or modal realization
+        sysb = self._timed('realization', realizations[realization], sysd)
 
         # step 3 - convert to delta operator
         if operator == 'delta':
-            sysm = self.sys_to_delta(sysb)
+            sysm = self._timed('sys_to_delta', self.sys_to_delta, sysb)
         elif operator == 'shift':
             sysm = sysb
         else:
@@ -151,6 +230,15 @@ class LtiSystem(object):
         # step 5 - convert to fixed point (done in the constructor).
         return sysm, del_par
 
+    def _timed(self, stage, func, *args):
+        """
+        Calls `func` and records its wall time in `stage_times` under the name `stage`.
+        """
+        start = time.perf_counter()
+        result = func(*args)
+        self.stage_times[stage] = time.perf_counter() - start
+        return result
+
     @staticmethod
     def sys_to_delta(sys):
         """
@@ -190,10 +278,28 @@ class LtiSystem(object):
         sysdelta = StateSpace((am, bm, cm, dz), dt=sys.dt, delta=delta)
         return sysdelta
 
+    def simulate(self, sig_in):
+        """
+        Simulates the generated verilog module bit accurately. See controlinverilog.lti_simulator.LtiSimulator.
+
+        Parameters
+        ----------
+        sig_in : ndarray
+            The integer input words with shape (n_samples, n_inputs).
+
+        Returns
+        -------
+        sig_out : ndarray
+            The integer output words with shape (n_samples, n_outputs).
+        """
+        return self.lti_simulator.simulate(sig_in)
+
+    def estimate(self):
+        """
+        Estimates the resources of the generated module. See controlinverilog.estimate.ResourceEstimate.
+        """
+        return self.lti_verilog.estimate()
+
     def print_verilog(self, filename=None):
 
-        if filename is None:
-            print(self.lti_verilog.verilog)
-        else:
-            with open(filename, 'w') as text_file:
-                text_file.write(self.lti_verilog.verilog)
+        self.lti_verilog.print_verilog(filename)
@@ -1,6 +1,16 @@
-import math
 import numpy as np
-import jinja2
+from . import csd
+from . import templating
+from . import timing
+from .estimate import ResourceEstimate
+
+
+def is_shift(value):
+    """
+    Returns True if the product by the integer coefficient `value`, plus or minus a power of two, is implemented as a
+    shift rather than a multiplication.
+    """
+    return value != 0 and abs(value) & (abs(value) - 1) == 0
 
 
 class LtiVerilog(object):
@@ -12,6 +22,18 @@ class LtiVerilog(object):
         self.n_inputs = sys.n_input
         self.n_outputs = sys.n_output
         self.n_add = params['n_add']
+        self.f_clk = params.get('f_clk')
+        self.delay_model = params.get('delay_model') or timing.AdderDelayModel()
+        self.multiplier = params.get('multiplier', 'dsp')
+        if self.multiplier not in ('dsp', 'csd'):
+            msg = 'Valid multiplier values: dsp | csd.'
+            raise ValueError(msg)
+        state_formats = None
+        if params.get('state_word_lengths') is not None:
+            if self.multiplier != 'dsp':
+                msg = 'The non-uniform word lengths only support the dsp multiplier.'
+                raise ValueError(msg)
+            state_formats = list(zip(params['state_word_lengths'], params['state_frac_lengths']))
         self.context = {'name': params['name'],
                         'iw': params['iw'],
                         'ow': params['ow'],
@@ -23,24 +45,61 @@ class LtiVerilog(object):
                         'del': params['del_par']}
 
         mat_a, mat_b, mat_c, mat_d = sys.cofs
-        self.gen_header()
+        self.n_multipliers = 0
+        self.n_shifts = 0
+        self.csd_report = []
+        self.n_shared_adders = 0
+        self.product_fan_in = 1
+        self.multiplier_widths = []
+        self.gen_header(state_formats)
         self.gen_matrix(mat_a, 'A', 'ax', 'x')
         self.gen_matrix(mat_b, 'B', 'bu', 'u')
         self.gen_matrix(mat_c, 'C', 'cx', 'x')
         self.gen_matrix(mat_d, 'D', 'du', 'u')
+        self.gen_shift_add()
+        self.plan_adder_tree()
         self.gen_adder_ce()
         self.gen_adder('state')
         self.gen_adder('output')
 
-        loader = jinja2.PackageLoader('controlinverilog', 'templates')
-        env = jinja2.Environment(loader=loader,
-                                 trim_blocks=True,
-                                 lstrip_blocks=True)
-        template = env.get_template('lti_system.v')
-        self.verilog = template.render(self.context)
+        self._template = templating.get_template('lti_system.v', trim_blocks=True)
+        self.verilog = self._template.render(self.context) if params.get('keep_verilog', True) is True else None
+
+    def print_summary(self):
+
+        n_products = (self.order + self.n_outputs) * (self.order + self.n_inputs)
+        print('--- Datapath Information ---')
+        print('Multipliers: %d' % self.n_multipliers)
+        print('Shifts: %d' % self.n_shifts)
+        if self.multiplier == 'csd':
+            n_adders = sum(r['n_adders'] for r in self.csd_report)
+            print('Shift-add adders: %d, of which %d are shared' % (n_adders + self.n_shared_adders,
+                                                                   self.n_shared_adders))
+        n_nonzero = self.n_multipliers + self.n_shifts + len(self.csd_report)
+        print('Zero products removed: %d' % (n_products - n_nonzero))
+        print('Adder stages: %d' % self._n_adder_stages())
+        print()
 
-    def gen_header(self):
+    def print_csd_report(self):
+        """
+        Prints the number of nonzero canonical signed digits of each coefficient implemented with shifts and
+        additions, and the number of adders left after sharing the common subexpressions.
+        """
+        print('%-12s %12s %8s %8s' % ('coefficient', 'value', 'digits', 'adders'))
+        for r in self.csd_report:
+            print('%-12s %12d %8d %8d' % (r['name'], r['value'], r['n_digits'], r['n_adders']))
+        print('Shared subexpression adders: %d' % self.n_shared_adders)
 
+    def print_verilog(self, filename=None):
+
+        templating.write_verilog(filename, self.verilog, self._template, self.context)
+
+    def gen_header(self, state_formats=None):
+        """
+        Names the signals. `state_formats` are the word and fractional lengths of each state, None for the uniform
+        format SW and SF. A state of fractional length sf is then selected from the bits of its register below the
+        binary point at CF + SF - sf.
+        """
         ind_in = np.arange(self.n_inputs)
         ind_out = np.arange(self.n_outputs)
         ind_order = np.arange(self.order)
@@ -65,10 +124,24 @@ class LtiVerilog(object):
         self.context['sig_dx'] = sig_dx
         self.context['sig_y_long'] = sig_y_long
 
-        input_buffers = zip(sig_u, sig_in)
-        state_buffers = zip(sig_x, sig_x_long)
-        outputs = zip(sig_out, sig_y_long)
-        deltas = zip(sig_x_long, sig_dx)
+        if state_formats is None:
+            self.state_word_lengths = [self.context['sw']] * self.order
+            self.state_offsets = [0] * self.order
+            x_widths = ['SW'] * self.order
+            x_slices = ['SW+CF-1:CF'] * self.order
+        else:
+            self.state_word_lengths = [int(sw) for sw, _ in state_formats]
+            self.state_offsets = [self.context['sf'] - int(sf) for _, sf in state_formats]
+            x_widths = [str(sw) for sw in self.state_word_lengths]
+            lsbs = [self.context['cf'] + offset for offset in self.state_offsets]
+            x_slices = ['%d:%d' % (lsb + sw - 1, lsb) for lsb, sw in zip(lsbs, self.state_word_lengths)]
+        self.nonuniform = state_formats is not None
+        self.context['x_widths'] = x_widths
+
+        input_buffers = list(zip(sig_u, sig_in))
+        state_buffers = list(zip(sig_x, sig_x_long, x_slices))
+        outputs = list(zip(sig_out, sig_y_long))
+        deltas = list(zip(sig_x_long, sig_dx))
 
         self.context['input_buffers'] = input_buffers
         self.context['state_buffers'] = state_buffers
@@ -76,19 +149,53 @@ class LtiVerilog(object):
         self.context['deltas'] = deltas
 
     def gen_matrix(self, mat, par_name, reg_name, inp_name):
+        """
+        Generates the products of a matrix. Products with a zero coefficient are dropped, their register is None in
+        the cache and they are left out of the adder tree. Products with a coefficient of plus or minus a power of two
+        are implemented as a shift. The other products are multiplications, or shift-add networks generated by
+        `gen_shift_add` if the multiplier is 'csd'.
 
+        With non-uniform word lengths the trailing zeros of each coefficient are dropped from its parameter, which
+        then has its own width, and shifted back into the product together with the offset of the state's binary
+        point, so the multipliers are only as wide as the coefficient and the state require.
+        """
         params = np.empty(mat.shape, dtype=object)
         registers = np.empty(mat.shape, dtype=object)
-        products = np.empty(mat.shape, dtype=object)
+        products = []
 
         for r, c in np.ndindex(mat.shape):
             pname = '_'.join((par_name, str(r + 1), str(c + 1)))
             iname = '_'.join((inp_name, str(c + 1)))
             rname = '_'.join((reg_name, str(r + 1), str(c + 1)))
+            value = int(mat[r, c])
+
+            params[r, c] = {'name': pname, 'value': value, 'width': 'CW'}
+            if value == 0:
+                continue
 
-            params[r, c] = {'name': pname, 'value': int(mat[r, c])}
+            offset, width = 0, self.context['sw']
+            if inp_name == 'x':
+                offset, width = self.state_offsets[c], self.state_word_lengths[c]
             registers[r, c] = rname
-            products[r, c] = {'o': rname, 'a': pname, 'b': iname}
+            product = {'o': rname, 'a': pname, 'b': iname, 'value': value, 'expr': None}
+            if is_shift(value):
+                shift = abs(value).bit_length() - 1 + offset
+                product['expr'] = ('-' if value < 0 else '') + iname + (' <<< %d' % shift if shift else '')
+                self.n_shifts += 1
+            elif self.multiplier == 'dsp' and self.nonuniform:
+                shift = (abs(value) & -abs(value)).bit_length() - 1
+                params[r, c]['value'] = value >> shift
+                params[r, c]['width'] = abs(value >> shift).bit_length() + 1
+                shift += offset
+                expr = '%s * %s' % (pname, iname)
+                product['expr'] = '(%s) <<< %d' % (expr, shift) if shift else expr
+                self.multiplier_widths.append((params[r, c]['width'], width))
+                self.n_multipliers += 1
+            elif self.multiplier == 'dsp':
+                product['expr'] = '%s * %s' % (pname, iname)
+                self.multiplier_widths.append((self.context['cw'], width))
+                self.n_multipliers += 1
+            products.append(product)
 
         params_key = '_'.join((par_name, 'params'))
         registers_key = '_'.join((par_name, 'sig_prod'))
@@ -96,13 +203,169 @@ class LtiVerilog(object):
 
         self.cache[registers_key] = registers
         self.context[params_key] = params.ravel()
-        self.context[registers_key] = registers.ravel()
-        self.context[products_key] = products.ravel()
+        self.context[registers_key] = [reg for reg in registers.ravel() if reg is not None]
+        self.context[products_key] = products
+
+    def gen_shift_add(self):
+        """
+        Implements the remaining products with shifts and additions. The products by each state and input share one
+        network, so the digit patterns common to a column of [A; C] or [B; D] are only added once.
+        """
+        columns = {}
+        for key in ('A_prods', 'B_prods', 'C_prods', 'D_prods'):
+            for product in self.context[key]:
+                if product['expr'] is None:
+                    columns.setdefault(product['b'], []).append(product)
+
+        wires = []
+        for signal, products in columns.items():
+            network = csd.ShiftAddNetwork(signal, [p['value'] for p in products])
+            wires.extend(network.subexpressions)
+            self.n_shared_adders += len(network.subexpressions)
+            for ii, product in enumerate(products):
+                product['expr'] = network.expression(ii)
+                # A shared subexpression adds one more adder in series with the product's own.
+                shared = any(t[0] != signal for t in network.terms[ii])
+                self.product_fan_in = max(self.product_fan_in, network.n_adders(ii) + 1 + int(shared))
+                self.csd_report.append({'name': product['a'],
+                                        'value': product['value'],
+                                        'n_digits': network.n_digits[ii],
+                                        'n_adders': network.n_adders(ii)})
+
+        self.context['shift_add_wires'] = wires
+
+    def _n_terms(self):
+        """
+        Returns the largest number of nonzero products summed by one equation.
+        """
+        n_terms = 1
+        for state_key, input_key in (('A_sig_prod', 'B_sig_prod'), ('C_sig_prod', 'D_sig_prod')):
+            terms = np.concatenate((self.cache[state_key], self.cache[input_key]), axis=1)
+            n_terms = max(n_terms, int(np.amax(np.sum(terms != None, axis=1))))
+        return n_terms
+
+    def _n_adder_stages(self):
+        """
+        Returns the number of adder stages, set by the equation with the most nonzero products.
+        """
+        return len(self.fan_ins)
+
+    def plan_adder_tree(self):
+        """
+        Selects the fan-in of each adder stage. Without a target clock frequency every stage adds up to `n_add`
+        terms. Otherwise the largest fan-in meeting `f_clk` under the delay model sets the number of stages, i.e. the
+        pipeline registers, and the terms are spread evenly over the stages.
+        """
+        n_terms = self._n_terms()
+        if self.f_clk is None:
+            self.fan_ins = timing.uniform_fan_ins(n_terms, self.n_add)
+            return
+
+        width = self.context['sw'] + self.context['cw'] - 1
+        max_fan_in = self.delay_model.max_fan_in(width, self.f_clk)
+        if max_fan_in < 2 and n_terms > 1:
+            msg = 'The %d bit adders cannot meet a clock frequency of %g Hz.' % (width, self.f_clk)
+            raise ValueError(msg)
+        self.fan_ins = timing.balanced_fan_ins(n_terms, max_fan_in)
+
+    @property
+    def latency(self):
+        """
+        The number of clock cycles from `ce_in` to `ce_out`: one to buffer the inputs, one to multiply and one per
+        adder stage.
+        """
+        return self._n_adder_stages() + 2
+
+    @property
+    def cycles_per_sample(self):
+        """
+        The smallest number of clock cycles between two `ce_in` pulses, the latency and one to update the states.
+        """
+        return self.latency + 1
+
+    def max_sample_rate(self, f_clk):
+        """
+        Returns
+        -------
+        fs : float
+            The highest sampling frequency the module supports with the clock frequency `f_clk`.
+        """
+        return f_clk / self.cycles_per_sample
+
+    def timing_report(self):
+        """
+        Returns
+        -------
+        report : list of dict
+            The name, fan-in and delay of each modelled register to register stage. The multipliers are assumed to
+            be pipelined DSP blocks and aren't modelled.
+        """
+        width = self.context['sw'] + self.context['cw'] - 1
+        stages = []
+        if self.multiplier == 'csd':
+            stages.append(('shift-add', self.product_fan_in))
+        stages.extend(('adder %d' % (ii + 1), k) for ii, k in enumerate(self.fan_ins))
+        return [{'name': name, 'fan_in': k, 'delay': self.delay_model.delay(width, k)} for name, k in stages]
+
+    def _n_signal_bits(self):
+        """
+        Returns the number of bits of the input and state buffers and of the state and output registers.
+        """
+        sw, rw = self.context['sw'], self.context['sw'] + self.context['cw'] - 1
+        return self.n_inputs * sw + sum(self.state_word_lengths) + (2 * self.order + self.n_outputs) * rw
+
+    def _n_delta_adders(self):
+        """
+        Returns the number of adders of the delta operator, which accumulates the state increments.
+        """
+        return self.order if self.context['del'] is not None else 0
+
+    def estimate(self):
+        """
+        Returns
+        -------
+        estimate : controlinverilog.estimate.ResourceEstimate
+            The multipliers or shift-add networks, the product and adder tree registers and the adder tree.
+        """
+        rw = self.context['sw'] + self.context['cw'] - 1
+        adders = self.context['state_adders'] + self.context['output_adders']
+        n_adders = sum(len(expr.split(' + ')) - 1 for _, expr in adders) + self._n_delta_adders()
+        n_adders += sum(r['n_adders'] for r in self.csd_report) + self.n_shared_adders
+
+        n_products = sum(len(self.context[key]) for key in ('A_sig_prod', 'B_sig_prod', 'C_sig_prod', 'D_sig_prod'))
+        n_sums = len(self.context['state_sig_add']) + len(self.context['output_sig_add'])
+        register_bits = self._n_signal_bits() + (n_products + n_sums) * rw + self._n_adder_stages() + 2
+
+        return ResourceEstimate(self.context['name'],
+                                multipliers=self.multiplier_widths,
+                                register_bits=register_bits,
+                                n_adders=n_adders,
+                                latency=self.latency,
+                                cycles_per_sample=self.cycles_per_sample)
+
+    def print_timing_report(self, f_clk=None):
+        """
+        Prints the delay of each stage, the latency and the throughput at the clock frequency `f_clk`, which defaults
+        to the target clock frequency.
+        """
+        f_clk = self.f_clk if f_clk is None else f_clk
+        report = self.timing_report()
+        t_max = max(r['delay'] for r in report)
+
+        print('--- Timing Information ---')
+        print('%-12s %8s %12s' % ('stage', 'fan-in', 'delay (ns)'))
+        for r in report:
+            print('%-12s %8d %12.2f' % (r['name'], r['fan_in'], r['delay'] * 1e9))
+        print('Estimated maximum clock frequency (MHz): %.1f' % (1e-6 / t_max))
+        print('Latency (cycles): %d' % self.latency)
+        print('Clock cycles per sample: %d' % self.cycles_per_sample)
+        if f_clk is not None:
+            print('Maximum sampling frequency (Hz): %g' % self.max_sample_rate(f_clk))
+        print()
 
     def gen_adder_ce(self):
 
-        n_inp = self.order + self.n_inputs
-        n_stages = int(math.ceil(math.log(n_inp, self.n_add)))
+        n_stages = self._n_adder_stages()
 
         ce = ['_'.join(('ce_add', str(ii))) for ii in range(1, n_stages)]
         ce.insert(0, 'ce_mul')
@@ -128,9 +391,7 @@ class LtiVerilog(object):
             adder_key = 'output_adders'
             reg_key = 'output_sig_add'
 
-        n_add = self.n_add
-        n_inp = self.order + self.n_inputs
-        n_stages = int(math.ceil(math.log(n_inp, n_add)))
+        n_stages = self._n_adder_stages()
         n_eqn = len(output_terms)
 
         def name_reg(x, y, z):
@@ -139,8 +400,11 @@ class LtiVerilog(object):
         adders, sig_add = [], []
         for ii in range(n_eqn):
             terms = np.concatenate((state_terms[ii, :], input_terms[ii, :]))
+            terms = [term for term in terms if term is not None]
+            if not terms:
+                terms = ['0']
             for jj in range(n_stages):
-                size = min(n_add, len(terms))
+                size = min(self.fan_ins[jj], len(terms))
                 n_terms = (len(terms) - 1) // size + 1
                 terms = np.array_split(terms, n_terms)
                 terms = [' + '.join(n) for n in terms]
@@ -0,0 +1,159 @@
+import math
+from . import templating
+from . import timing
+from .estimate import ResourceEstimate
+from .lti_verilog import LtiVerilog
+
+
+class LtiVerilogFolded(LtiVerilog):
+
+    def __init__(self, sys, params):
+        """
+        Generates a time multiplexed implementation of the LTI system. The nonzero products of the state and output
+        equations are scheduled on `n_dsp` multipliers over several clock cycles per sample. The products are sorted
+        by equation and dealt out in contiguous blocks, so each multiplier accumulates into few equations. The
+        arithmetic is the same as the fully parallel module's modulo 2^RW, so LtiSimulator models it bit accurately.
+
+        Parameters
+        ----------
+        sys : controlinverilog.state_space.StateSpace
+            The fixed point system, the coefficients are integers with the fractional length `params['cf']`.
+        params : dictionary
+            The parameters of LtiVerilog and 'n_dsp', the number of multipliers.
+        """
+        self.cache = {}
+        self.order = sys.n_order
+        self.n_inputs = sys.n_input
+        self.n_outputs = sys.n_output
+        self.n_dsp = params['n_dsp']
+        self.multiplier = 'dsp'
+        self.f_clk = params.get('f_clk')
+        self.delay_model = params.get('delay_model') or timing.AdderDelayModel()
+        self.context = {'name': params['name'],
+                        'iw': params['iw'],
+                        'ow': params['ow'],
+                        'sw': params['sw'],
+                        'cw': params['cw'],
+                        'cf': params['cf'],
+                        'if_': params['if'],
+                        'sf': params['sf'],
+                        'del': params['del_par']}
+
+        if self.n_dsp < 1:
+            msg = 'The number of multipliers must be at least 1.'
+            raise ValueError(msg)
+
+        self.gen_header()
+        self.gen_schedule(sys.cofs)
+
+        self._template = templating.get_template('lti_system_folded.v', trim_blocks=True)
+        self.verilog = self._template.render(self.context) if params.get('keep_verilog', True) is True else None
+
+    @property
+    def n_multipliers(self):
+        return len(self.context['mults'])
+
+    @property
+    def latency(self):
+        """
+        The number of clock cycles from `ce_in` to `ce_out`: one to buffer the inputs, `n_cycle` to select the
+        operands, two to multiply and accumulate the last product and one to sum the accumulators.
+        """
+        return self.n_cycle + 4
+
+    def estimate(self):
+        """
+        Returns
+        -------
+        estimate : controlinverilog.estimate.ResourceEstimate
+            The multipliers with their coefficient and select memories, operand and product registers and
+            accumulators, and the sums of the accumulators.
+        """
+        sw, cw = self.context['sw'], self.context['cw']
+        rw = sw + cw - 1
+        mults = self.context['mults']
+        n_accs = sum(len(m['accs']) for m in mults)
+        n_adders = n_accs + sum(len(expr.split(' + ')) - 1 for _, expr in self.context['sums'])
+        n_adders += self._n_delta_adders() + 1
+
+        # The cycle counter and the control pipeline, and per multiplier its operands, selects and product.
+        register_bits = self._n_signal_bits() + self.context['nw'] + 7 + n_accs * rw
+        register_bits += sum(cw + sw + 2 * m['sel_w'] + rw for m in mults)
+
+        return ResourceEstimate(self.context['name'],
+                                multipliers=[(cw, sw)] * self.n_multipliers,
+                                register_bits=register_bits,
+                                n_adders=n_adders,
+                                rom_bits=sum(self.n_cycle * (cw + m['sel_w']) for m in mults),
+                                latency=self.latency,
+                                cycles_per_sample=self.cycles_per_sample)
+
+    def timing_report(self):
+        """
+        Returns
+        -------
+        report : list of dict
+            The name, fan-in and delay of the accumulators and of the sum of the accumulators of each equation.
+        """
+        width = self.context['sw'] + self.context['cw'] - 1
+        fan_in = max(len(expr.split(' + ')) for _, expr in self.context['sums'])
+        stages = [('accumulate', 2), ('sum', fan_in)]
+        return [{'name': name, 'fan_in': k, 'delay': self.delay_model.delay(width, k)} for name, k in stages]
+
+    def gen_schedule(self, cofs):
+
+        mat_a, mat_b, mat_c, mat_d = cofs
+        equations = [(self.context['sig_dx'], mat_a, mat_b), (self.context['sig_y_long'], mat_c, mat_d)]
+
+        # The nonzero products of every equation as (equation, coefficient, operand).
+        products = []
+        for names, mat_x, mat_u in equations:
+            for r, name in enumerate(names):
+                products.extend((name, int(mat_x[r, c]), x) for c, x in enumerate(self.context['sig_x'])
+                                if int(mat_x[r, c]) != 0)
+                products.extend((name, int(mat_u[r, c]), u) for c, u in enumerate(self.context['sig_u'])
+                                if int(mat_u[r, c]) != 0)
+
+        n_cycle = max(1, int(math.ceil(len(products) / self.n_dsp)))
+        mults, accs = [], {}
+        for d in range(int(math.ceil(len(products) / n_cycle))):
+            block = products[d * n_cycle:(d + 1) * n_cycle]
+            names = list(dict.fromkeys(p[0] for p in block))
+            acc_names = ['acc_%d_%d' % (d + 1, k + 1) for k in range(len(names))]
+            for name, acc in zip(names, acc_names):
+                accs.setdefault(name, []).append(acc)
+
+            # Unused cycles multiply by zero and select no accumulator.
+            rom_values = [(p[1], names.index(p[0])) for p in block]
+            rom_values += [(0, len(names))] * (n_cycle - len(block))
+            mults.append({'rom': 'cof_rom_%d' % (d + 1),
+                          'sel_rom': 'sel_rom_%d' % (d + 1),
+                          'cof': 'cof_%d' % (d + 1),
+                          'opd': 'opd_%d' % (d + 1),
+                          'sel': 'sel_%d' % (d + 1),
+                          'prod': 'prod_%d' % (d + 1),
+                          'sel_w': max(1, len(names).bit_length()),
+                          'accs': acc_names,
+                          'entries': [(t, p[2]) for t, p in enumerate(block)],
+                          'rom_values': rom_values})
+
+        sums = []
+        for names, _, _ in equations:
+            sums.extend((name, ' + '.join(accs[name]) if name in accs else '0') for name in names)
+
+        self.n_cycle = n_cycle
+        self.n_products = len(products)
+        self.context['n_cycle'] = n_cycle
+        self.context['nw'] = max(1, (n_cycle - 1).bit_length())
+        self.context['mults'] = mults
+        self.context['sums'] = sums
+
+    def print_summary(self, f_clk=None):
+
+        print('--- Folded Datapath Information ---')
+        print('Multipliers: %d' % self.n_multipliers)
+        print('Products: %d' % self.n_products)
+        print('Clock cycles per sample: %d' % self.cycles_per_sample)
+        if f_clk is not None:
+            print('Maximum sampling frequency (Hz): %g' % self.max_sample_rate(f_clk))
+        print()
@@ -1,11 +1,16 @@
-import jinja2
+import os
 from math import ceil, log
 import numpy as np
+from . import interpolation
+from . import memory_file
+from . import templating
+from .estimate import ResourceEstimate
 
 
 class LookUpTable:
 
-    def __init__(self, name, values, values_frac_length):
+    def __init__(self, name, values, values_frac_length, keep_verilog=True,
+                 rom_format='inline', rom_file=None, interpolate=False, max_error=None):
         """
         Parameters
         ----------
@@ -19,23 +24,62 @@ class LookUpTable:
             the function.
         input_frac_length : int
             The input fractional length.
+        keep_verilog : bool
+            True to keep the rendered verilog in memory. Otherwise it is rendered straight to the file when printed.
+        rom_format : 'inline' | 'hex' | 'bin'
+            'inline' initializes the table with one statement per entry. 'hex' and 'bin' write the table to a memory
+            file read with $readmemh or $readmemb, which is much faster to elaborate for large tables.
+        rom_file : None | string
+            The name of the memory file, '<name>.mem' by default. The file is written next to the verilog file.
+        interpolate : bool
+            True to interpolate linearly between the segments of a coarse table instead of storing every value. The
+            smallest table that meets `max_error` is searched for, and the tables are written to '<name>_base.mem' and
+            '<name>_delta.mem' when `rom_format` isn't 'inline'. The interpolated module has two more clock cycles of
+            latency.
+        max_error : None | float
+            The largest absolute output error of the interpolation against `values`, one output LSB by default.
         """
         self.values = values
         self.of = values_frac_length
         self.name = name
         self._set_parameters()
 
+        self.interpolator = None
+        if interpolate:
+            # The codes past the end of the table aren't used, they repeat the last value.
+            y = np.full(2 ** self.iw, self.values[-1], dtype=float)
+            y[:self.n_ram] = self.values
+            valid = np.arange(2 ** self.iw) < self.n_ram
+            max_error = 2.0 ** -self.of if max_error is None else max_error
+            self.interpolator = interpolation.PiecewiseLinear(y, self.iw, self.ow, self.of, max_error, valid)
+
+        readmem = memory_file.readmem_task(rom_format)
+        if readmem is None:
+            self.roms = []
+        elif self.interpolator is not None:
+            self.roms = self.interpolator.roms(name, rom_format)
+        else:
+            rom_file = '%s.mem' % name if rom_file is None else rom_file
+            self.roms = [(rom_file, self.ram, self.ow, rom_format)]
+
         context = {
             'NAME': self.name,
             'IW': self.iw,
             'OW': self.ow,
             'N_RAM': self.n_ram,
-            'RAM': self.ram
+            'RAM': self.ram,
+            'ROM_FILE': self.roms[0][0] if self.roms else None,
+            'READMEM': readmem
         }
-        loader = jinja2.PackageLoader('controlinverilog', 'templates')
-        env = jinja2.Environment(loader=loader)
-        template = env.get_template('lut.sv')
-        self.verilog = template.render(context)
+        if self.interpolator is not None:
+            context.update(self.interpolator.context())
+            context['BASE_FILE'] = self.roms[0][0] if self.roms else None
+            context['DELTA_FILE'] = self.roms[1][0] if self.roms else None
+            self._template = templating.get_template('interpolated_function.v', trim_blocks=True)
+        else:
+            self._template = templating.get_template('lut.sv')
+        self._context = context
+        self.verilog = self._template.render(context) if keep_verilog is True else None
 
     def _set_parameters(self):
         #xfix = np.arange(2 ** self.iw)
@@ -57,10 +101,28 @@ class LookUpTable:
         print('Output format is s(%d,%d)' % (self.ow, self.of))
         print('The input range is: %g to %g' % (0, self.n_ram - 1))
         print('The output range is: %g to %g' % (self.ymin, self.ymax))
+        if self.interpolator is not None:
+            self.interpolator.print_summary()
+
+    def estimate(self):
+        """
+        Returns
+        -------
+        estimate : controlinverilog.estimate.ResourceEstimate
+            The table and its input and output registers, or the interpolator's estimate.
+        """
+        if self.interpolator is not None:
+            return self.interpolator.estimate(self.name)
+        return ResourceEstimate(self.name, register_bits=2 + self.iw + self.ow, rom_bits=self.n_ram * self.ow,
+                                latency=2)
 
     def print_verilog(self, filename=None):
-        if filename is None:
-            print(self.verilog)
-        else:
-            with open(filename, 'w') as text_file:
-                text_file.write(self.verilog)
\ No newline at end of file
+        templating.write_verilog(filename, self.verilog, self._template, self._context)
+        if isinstance(filename, str):
+            memory_file.write_memories(self.roms, os.path.dirname(filename))
+
+    def print_memory(self, directory='.'):
+        """
+        Writes the memory file of the table when it isn't initialized inline.
+        """
+        memory_file.write_memories(self.roms, directory)
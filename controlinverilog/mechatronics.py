@@ -9,6 +9,108 @@ def _eval_tf(a, b, c, d, p):
     return c @ linalg.inv(p * np.identity(a.shape[0]) - a) @ b + d
 
 
+def _schur_realization(a, b, c, schur=None):
+    """
+    Transforms the system to the complex Schur form of A. The transformation is unitary so the transfer function is
+    unchanged, but (pI - T) is upper triangular and can be solved by back substitution for any p. `schur` is the
+    Schur form (T, Z) of A if already computed, e.g. by controlinverilog.StateSpace.schur.
+
+    Returns
+    -------
+    t : ndarray
+        The upper triangular Schur form of A. Its diagonal holds the eigenvalues of A.
+    bt : ndarray
+        The input matrix in the Schur coordinates.
+    ct : ndarray
+        The output matrix in the Schur coordinates.
+    """
+    t, z = linalg.schur(a, output='complex') if schur is None else schur
+    bt = z.conj().T @ b
+    ct = c @ z
+    return t, bt, ct
+
+
+def _solve_schur(t, bt, ps):
+    """
+    Solves (pI - T) X = B for each complex number in `ps`. The back substitution iterates over the states and is
+    vectorized over the evaluation points.
+
+    Returns
+    -------
+    x : ndarray
+        The solutions with shape (len(ps), n_order, n_input).
+    """
+    n_order, n_input = bt.shape
+    ps = np.asarray(ps, dtype=complex).reshape(-1)
+    x = np.zeros((ps.shape[0], n_order, n_input), dtype=complex)
+    for i in range(n_order - 1, -1, -1):
+        rhs = bt[i, :] + t[i, i + 1:] @ x[:, i + 1:, :]
+        x[:, i, :] = rhs / (ps - t[i, i])[:, np.newaxis]
+    return x
+
+
+def _freqresp_schur(t, bt, ct, d, ps):
+    """
+    Evaluates the transfer function at each complex number in `ps` for a system in Schur coordinates.
+
+    Returns
+    -------
+    resp : ndarray
+        The transfer function matrices with shape (len(ps), n_output, n_input).
+    """
+    resp = ct @ _solve_schur(t, bt, ps) + d
+    return resp
+
+
+def _max_sv(resp):
+    """
+    Returns the maximum singular value of each matrix in a stack of transfer function matrices.
+    """
+    return np.linalg.svd(resp, compute_uv=False)[:, 0]
+
+
+def freqresp_continuous(ac, bc, cc, dc, ws):
+    """
+    Evaluates the frequency response of a continuous time LTI system at a set of frequencies. A is reduced to Schur
+    form once and all frequencies are solved in one vectorized pass.
+
+    Parameters
+    ----------
+    ac, bc, cc, dc : ndarray
+        The state space matrices.
+    ws : ndarray
+        The angular frequencies (rad/s) to evaluate the response at.
+
+    Returns
+    -------
+    resp : ndarray
+        The frequency response with shape (len(ws), n_output, n_input).
+    """
+    t, bt, ct = _schur_realization(ac, bc, cc)
+    return _freqresp_schur(t, bt, ct, dc, 1j * np.asarray(ws))
+
+
+def freqresp_discrete(az, bz, cz, dz, phis):
+    """
+    Evaluates the frequency response of a discrete time LTI system at a set of normalized frequencies. A is reduced to
+    Schur form once and all frequencies are solved in one vectorized pass.
+
+    Parameters
+    ----------
+    az, bz, cz, dz : ndarray
+        The state space matrices.
+    phis : ndarray
+        The normalized angular frequencies (rad/sample) to evaluate the response at.
+
+    Returns
+    -------
+    resp : ndarray
+        The frequency response with shape (len(phis), n_output, n_input).
+    """
+    t, bt, ct = _schur_realization(az, bz, cz)
+    return _freqresp_schur(t, bt, ct, dz, np.exp(1j * np.asarray(phis)))
+
+
 def _hamiltonian_matrix_continuous(g, mat_a, mat_b, mat_c, mat_d):
     # A, B, C, D = sys.params
     r, c = mat_d.shape
@@ -25,60 +127,73 @@ def _hamiltonian_matrix_continuous(g, mat_a, mat_b, mat_c, mat_d):
 
 
 def _matrices_discrete(g, mat_a, mat_b, mat_c, mat_d):
-    # A, B, C, D = sys.params
+    """
+    Returns the symplectic pencil (M, L) whose generalized eigenvalues on the unit circle are the frequencies where a
+    singular value of the transfer function equals `g`.
+    """
     n_order, n_input = mat_b.shape
     n_output, _ = mat_c.shape
-    mat_r = mat_d.T @ mat_d - g * g * np.identity(n_input)
+    mat_r = g * g * np.identity(n_input) - mat_d.T @ mat_d
     mat_r_inv = linalg.inv(mat_r)
-    m11 = np.identity(n_order)
+    mat_ar = mat_a + mat_b @ mat_r_inv @ mat_d.T @ mat_c
+    m11 = mat_ar
     m12 = np.zeros((n_order, n_order))
-    m21 = mat_c.T @ (np.identity(n_output) - mat_d @ mat_r_inv @ mat_d.T) @ mat_c
-    m22 = -(mat_a + mat_b @ mat_r_inv @ mat_d.T @ mat_c).T
+    m21 = mat_c.T @ (np.identity(n_output) + mat_d @ mat_r_inv @ mat_d.T) @ mat_c
+    m22 = np.identity(n_order)
     m_mat = np.vstack((np.hstack((m11, m12)), np.hstack((m21, m22))))
-    l11 = mat_a + mat_b @ mat_r_inv @ mat_d.T @ mat_c
+    l11 = np.identity(n_order)
     l12 = mat_b @ mat_r_inv @ mat_b.T
     l21 = np.zeros((n_order, n_order))
-    l22 = np.identity(n_order)
+    l22 = mat_ar.T
     l_mat = np.vstack((np.hstack((l11, l12)), np.hstack((l21, l22))))
     return m_mat, l_mat
 
 
-def _initial_glb(mat_a, mat_b, mat_c, mat_d):
-    # A, B, C, D = sys.params
-    poles, _ = linalg.eig(mat_a)
+def _initial_glb(schur, mat_d):
+    t, bt, ct = schur
+    poles = np.diag(t)
     pabs = np.abs(poles)
 
-    if all(np.isreal(poles)):
+    if np.allclose(np.imag(poles), 0):
         wp = min(pabs)
     else:
         weight = np.abs(np.imag(poles) / (np.real(poles) * poles))
-        wp, _ = max(zip(pabs, weight), key=lambda x: x[1])
+        wp = pabs[np.argmax(weight)]
 
-    g0 = _eval_tf(mat_a, mat_b, mat_c, mat_d, 0)
-    gwp = _eval_tf(mat_a, mat_b, mat_c, mat_d, 1j * wp)
+    resp = _freqresp_schur(t, bt, ct, mat_d, np.array([0, 1j * wp]))
+    glb = max(np.amax(_max_sv(resp)), np.amax(linalg.svdvals(mat_d)))
+    return glb
 
-    sig = []
-    for tf in (g0, gwp, mat_d):
-        _, s, _ = linalg.svd(tf)
-        sig.append(max(s))
 
-    glb = max(sig)
-    return glb
+def _initial_phis_discrete(t, seeds=()):
+    """
+    Returns the frequencies at which the initial lower bound is evaluated: DC, Nyquist, the angles of the poles, and
+    any seed frequencies supplied by the caller.
+    """
+    poles = np.diag(t)
+    phips = np.unique(np.abs(np.angle(poles)))
+    return np.concatenate(([0.0, np.pi], phips, seeds))
 
 
-def _initial_glb_discrete(az, bz, cz, dz):
-    poles, _ = linalg.eig(az)
-    phip = np.angle(poles[np.argmax(np.abs(poles))])
-    phis = np.array([0.0, phip, np.pi])
+def _initial_glb_discrete(schur, dz, seeds=()):
+    """
+    The initial lower bound is the largest gain at DC, Nyquist, the angles of the poles, and any seed frequencies
+    supplied by the caller. Peaks usually lie near lightly damped poles, so starting from every pole angle rather than
+    only the dominant one keeps the bisection away from poorly conditioned crossings.
 
-    def max_sv(phi):
-        tf = _eval_tf(az, bz, cz, dz, np.exp(1j * phi))
-        _, sv, _ = linalg.svd(tf)
-        return max(sv)
+    Returns
+    -------
+    glb : float
+        The lower bound on the H∞ norm.
+    phi : float
+        The frequency at which the lower bound is achieved.
+    """
+    t, bt, ct = schur
+    phis = _initial_phis_discrete(t, seeds)
 
-    vfunc = np.vectorize(max_sv)
-    glb = max(vfunc(phis))
-    return glb
+    svs = _max_sv(_freqresp_schur(t, bt, ct, dz, np.exp(1j * phis)))
+    idx = np.argmax(svs)
+    return svs[idx], phis[idx]
 
 
 def _robust_no_imaginary(x_vals):
@@ -100,44 +215,49 @@ def _robust_no_imaginary(x_vals):
     return no_imaginary, sorted(only_imag)
 
 
-def _robust_no_unit(x_vals):
+def _robust_no_unit(x_vals, tol=1e-2):
     """
+    The pencil of an error system with nearly cancelling modes is poorly conditioned and its unit circle eigenvalues
+    can be perturbed well away from the circle. The tolerance is therefore loose; candidates that are not genuine
+    crossings are rejected by the caller because they do not raise the lower bound.
+
     Parameters
     ----------
     x_vals : ndarray
         The array of values to test if they are on the unit circle.
+    tol : float
+        The distance from the unit circle at which values are considered on it.
     """
     x_phis = np.angle(x_vals)
-    is_unit = np.isclose(np.exp(1j * x_phis), x_vals, rtol=1e-12, atol=1e-8)
+    is_unit = np.abs(np.abs(x_vals) - 1) < tol
     only_unit = x_phis[is_unit]
     no_unit = only_unit.shape[0] == 0
     return no_unit, np.sort(only_unit)
 
 
-def _find_new_lower_bound(wi, mat_a, mat_b, mat_c, mat_d):
-    si = []
-    for i in range(len(wi) - 1):
-        mi = 0.5 * (wi[i] + wi[i + 1])
-        gw = _eval_tf(mat_a, mat_b, mat_c, mat_d, 1j * mi)
-        _, s, _ = linalg.svd(gw)
-        si.append(max(s))
-    glb = max(si)
-    return glb
+def _midpoints(xs):
+    xs = np.asarray(xs)
+    if xs.shape[0] < 2:
+        return xs
+    return 0.5 * (xs[:-1] + xs[1:])
 
 
-def _find_new_lower_bound_discrete(phis, az, bz, cz, dz):
-    def max_sv(mi):
-        gw = _eval_tf(az, bz, cz, dz, np.exp(1j * mi))
-        _, sv, _ = linalg.svd(gw)
-        return max(sv)
-
-    mis = np.diff(phis)
-    vfunc = np.vectorize(max_sv)
-    svs = vfunc(mis)
-    glb = max(svs)
+def _find_new_lower_bound(wi, schur, mat_d):
+    t, bt, ct = schur
+    mis = _midpoints(wi)
+    resp = _freqresp_schur(t, bt, ct, mat_d, 1j * mis)
+    glb = np.amax(_max_sv(resp))
     return glb
 
 
+def _find_new_lower_bound_discrete(phis, schur, dz):
+    t, bt, ct = schur
+    mis = _midpoints(phis)
+    svs = _max_sv(_freqresp_schur(t, bt, ct, dz, np.exp(1j * mis)))
+    idx = np.argmax(svs)
+    return svs[idx], mis[idx]
+
+
 def norm_hinf_continuous(ac, bc, cc, dc):
     """
     Reference
@@ -145,7 +265,8 @@ def norm_hinf_continuous(ac, bc, cc, dc):
     A fast algorithm to compute the H∞-norm of a transfer function matrix; N.A. Bruinsma and M. Steinbuch;
     Systems & Control Letters, 1990, 14(4) pp. 287 - 293, 10.1016/0167-6911(90)90049-Z
     """
-    glb, gub = _initial_glb(ac, bc, cc, dc), 0
+    schur = _schur_realization(ac, bc, cc)
+    glb, gub = _initial_glb(schur, dc), 0
     no_imaginary = False
     eps = 1e-8
 
@@ -154,43 +275,194 @@ def norm_hinf_continuous(ac, bc, cc, dc):
         hg = _hamiltonian_matrix_continuous(g, ac, bc, cc, dc)
         e, _ = linalg.eig(hg)
         no_imaginary, wi = _robust_no_imaginary(e)
+        if no_imaginary is False:
+            # Spurious imaginary eigenvalues do not raise the lower bound.
+            glb_new = _find_new_lower_bound(wi, schur, dc)
+            no_imaginary = bool(glb_new <= g)
+            glb = max(glb, glb_new)
         if no_imaginary is True:
             gub = g
-        else:
-            glb = _find_new_lower_bound(wi, ac, bc, cc, dc)
 
     norm = 0.5 * (glb + gub)
     return norm
 
 
-def norm_hinf_discrete(az, bz, cz, dz):
+def _norm_hinf_discrete(az, bz, cz, dz, seeds=(), schur=None):
     """
-    Reference
-    ---------
-    L∞-norm calculation for generalized state space systems in continuous and discrete time; P. M. M. Bongers and
-    O. H. Bosgra and M. Steinbuch; 1991 American Control Conference, 10.23919/ACC.1991.4791655
+    Computes the H∞ norm and the frequency of the peak gain. Frequencies in `seeds` are added to the evaluation points
+    of the initial lower bound. When a seed is close to the peak, the bisection terminates in one or two iterations.
+
+    Returns
+    -------
+    norm : float
+        H∞ norm of the system.
+    phi : float
+        The frequency at which the peak gain occurs.
+    n_iter : int
+        The number of pencil eigenvalue problems solved.
+    """
+    schur = _schur_realization(az, bz, cz, schur)
+    glb, phi = _initial_glb_discrete(schur, dz, seeds)
+    return _bisect_hinf_discrete(az, bz, cz, dz, schur, glb, phi)
+
+
+def _bisect_hinf_discrete(az, bz, cz, dz, schur, glb, phi):
+    """
+    The Bruinsma-Steinbuch iteration starting from the lower bound `glb` achieved at the frequency `phi`.
 
     Returns
     -------
     norm : float
         H∞ norm of the system.
+    phi : float
+        The frequency at which the peak gain occurs.
+    n_iter : int
+        The number of pencil eigenvalue problems solved.
     """
-    glb, gub, no_unit, eps = _initial_glb_discrete(az, bz, cz, dz), 0, False, 1e-8
+    gub, no_unit, eps, n_iter = 0, False, 1e-8, 0
 
     while no_unit is False:
         g = (1 + 2 * eps) * glb
         m_mat, l_mat = _matrices_discrete(g, az, bz, cz, dz)
-        e, _ = linalg.eig(m_mat, l_mat)
+        e = linalg.eigvals(m_mat, l_mat)
+        n_iter += 1
         no_unit, phis = _robust_no_unit(e)
+        if no_unit is False:
+            # Spurious unit circle eigenvalues do not raise the lower bound.
+            glb_new, phi_new = _find_new_lower_bound_discrete(phis, schur, dz)
+            no_unit = bool(glb_new <= g)
+            if glb_new > glb:
+                glb, phi = glb_new, phi_new
         if no_unit is True:
             gub = g
-        else:
-            glb = _find_new_lower_bound_discrete(phis, az, bz, cz, dz)
 
     norm = 0.5 * (glb + gub)
+    return norm, abs(phi), n_iter
+
+
+def norm_hinf_discrete(az, bz, cz, dz, schur=None):
+    """
+    `schur` is the Schur form (T, Z) of A if already computed.
+
+    Reference
+    ---------
+    L∞-norm calculation for generalized state space systems in continuous and discrete time; P. M. M. Bongers and
+    O. H. Bosgra and M. Steinbuch; 1991 American Control Conference, 10.23919/ACC.1991.4791655
+
+    Returns
+    -------
+    norm : float
+        H∞ norm of the system.
+    """
+    norm, _, _ = _norm_hinf_discrete(az, bz, cz, dz, schur=schur)
     return norm
 
 
+def _row_gains_schur(t, bt, ct, dz, phis):
+    """
+    Evaluates the gain of each output at its own set of frequencies. The solutions of (pI - T) X = B don't depend on
+    the output, so they are computed for all frequencies of all outputs in one pass.
+
+    Parameters
+    ----------
+    phis : ndarray
+        The frequencies with shape (n_output, n_phi). Row i holds the frequencies of output i.
+
+    Returns
+    -------
+    gains : ndarray
+        The gains with shape (n_output, n_phi).
+    """
+    n_output, n_phi = phis.shape
+    ps = np.exp(1j * phis.ravel())
+    x = _solve_schur(t, bt, ps)
+    x = x.reshape(n_output, n_phi, t.shape[0], bt.shape[1])
+    resp = np.einsum('in,iknm->ikm', ct, x) + dz[:, np.newaxis, :]
+    return np.linalg.norm(resp, axis=2)
+
+
+def norms_hinf_discrete(az, bz, cz, dz, n_grid=64, n_refine=20, schur=None):
+    """
+    Computes the H∞ norm from the inputs to each output of a discrete time system. The Schur form of A is shared by
+    all outputs. The gains of every output are evaluated on a common frequency grid and the peak of each is refined
+    locally, solving (pI - T) X = B once for all outputs at each step. Each output then starts the bisection close to
+    its norm and usually terminates after a single eigenvalue problem.
+
+    Parameters
+    ----------
+    az, bz, cz, dz : ndarray
+        The state space matrices. Each row of `cz` and `dz` defines one output.
+    n_grid : int
+        The number of logarithmically spaced frequencies in the common grid.
+    n_refine : int
+        The number of local refinement steps. Each step shrinks the interval around the peak by a factor of four.
+    schur : None | tuple of ndarray
+        The Schur form (T, Z) of A if already computed.
+
+    Returns
+    -------
+    norms : ndarray
+        The H∞ norm of each output.
+    """
+    t, bt, ct = _schur_realization(az, bz, cz, schur)
+    n_output = cz.shape[0]
+    phips = _initial_phis_discrete(t)
+    phi_min = max(np.amin(phips[phips > 0], initial=np.pi), 1e-12)
+    grid = np.logspace(np.log10(phi_min) - 1, np.log10(np.pi), n_grid)
+    phis = np.unique(np.concatenate((phips, grid)))
+
+    gains = _row_gains_schur(t, bt, ct, dz, np.tile(phis, (n_output, 1)))
+    idx = np.argmax(gains, axis=1)
+    glbs = gains[np.arange(n_output), idx]
+    phi_pks = phis[idx]
+    lo = phis[np.maximum(idx - 1, 0)]
+    hi = phis[np.minimum(idx + 1, phis.shape[0] - 1)]
+
+    for _ in range(n_refine):
+        pts = lo[:, np.newaxis] + (hi - lo)[:, np.newaxis] * np.linspace(0, 1, 9)
+        gains = _row_gains_schur(t, bt, ct, dz, pts)
+        idx = np.argmax(gains, axis=1)
+        rows = np.arange(n_output)
+        better = gains[rows, idx] > glbs
+        glbs = np.where(better, gains[rows, idx], glbs)
+        phi_pks = np.where(better, pts[rows, idx], phi_pks)
+        lo = pts[rows, np.maximum(idx - 1, 0)]
+        hi = pts[rows, np.minimum(idx + 1, 8)]
+
+    norms = np.empty(n_output)
+    for i in range(n_output):
+        schur = (t, bt, ct[[i], :])
+        norms[i], _, _ = _bisect_hinf_discrete(az, bz, cz[[i], :], dz[[i], :], schur, glbs[i], phi_pks[i])
+    return norms
+
+
+class HinfNormContext(object):
+
+    def __init__(self):
+        """
+        Evaluates the H∞ norm of a sequence of related discrete time systems, such as the error systems of successive
+        coefficient quantizations. The peak frequencies of previous evaluations seed the lower bound of the next, so
+        the Bruinsma-Steinbuch iteration starts close to the answer.
+
+        The previous norms themselves are not reused as bounds since they are neither upper nor lower bounds of the
+        next system's norm; only the gains at the previous peak frequencies are.
+        """
+        self.peak_frequencies = []
+        self.n_iter = 0
+
+    def norm(self, az, bz, cz, dz):
+        """
+        Returns
+        -------
+        norm : float
+            H∞ norm of the system.
+        """
+        norm, phi, self.n_iter = _norm_hinf_discrete(az, bz, cz, dz, self.peak_frequencies)
+        if phi not in self.peak_frequencies:
+            self.peak_frequencies.append(phi)
+        return norm
+
+
 def norm_h2_continuous(ac, bc, cc):
     """
     Numerically computes the H2 norm of a LTI continuous time system.
@@ -211,11 +483,11 @@ def norm_h2_continuous(ac, bc, cc):
     """
     # A, B, C, D = sys.params
     wo = observability_gramian_continuous(ac, cc)
-    norm = np.sqrt(np.trace(bc.T @ wo @ bc))
+    norm = np.sqrt(max(np.trace(bc.T @ wo @ bc), 0.0))
     return norm
 
 
-def norm_h2_discrete(az, bz, cz):
+def norm_h2_discrete(az, bz, cz, wo=None):
     """
     Numerically computes the H2 norm of a LTI discrete time system.
     
@@ -227,6 +499,8 @@ def norm_h2_discrete(az, bz, cz):
         The input matrix.
     cz : ndarray
         The output matrix.
+    wo : None | ndarray
+        The observability gramian if already computed.
         
     Returns
     -------
@@ -236,11 +510,38 @@ def norm_h2_discrete(az, bz, cz):
     # if sys.is_delta():
     #     sys = sys.delta2shift()
     # A, B, C, D = sys.params
-    wo = observability_gramian_discrete(az, cz)
-    norm = np.sqrt(np.trace(bz.T @ wo @ bz))
+    if wo is None:
+        wo = observability_gramian_discrete(az, cz)
+    # The trace is slightly negative when the norm is lost to roundoff.
+    norm = np.sqrt(max(np.trace(bz.T @ wo @ bz), 0.0))
     return norm
 
 
+def norms_h2_discrete(az, bz, cz):
+    """
+    Computes the H2 norm from the inputs to each output of a discrete time system. The norms are read off the
+    diagonal of C P C', where P is the controllability Gramian, so a single Lyapunov equation is solved for all
+    outputs.
+
+    Parameters
+    ----------
+    az : ndarray
+        The state update matrix.
+    bz : ndarray
+        The input matrix.
+    cz : ndarray
+        The output matrix. Each row defines one output.
+
+    Returns
+    -------
+    norms : ndarray
+        The H2 norm of each output.
+    """
+    wc = controllability_gramian_discrete(az, bz)
+    norms = np.sqrt(np.maximum(np.einsum('ij,ij->i', cz @ wc, cz), 0.0))
+    return norms
+
+
 def lqr_continuous(mat_a, mat_b, mat_q, mat_r):
     """
     Solve the continuous time lqr controller.
@@ -360,14 +661,20 @@ def observability_gramian_discrete(mat_a, mat_c):
     return mat_wo
 
 
-def balanced_realization_discrete(az, bz, cz, dz):
+def balanced_realization_discrete(az, bz, cz, dz, mat_p=None, mat_q=None):
+    """
+    Calculates the balanced realization of a discrete time LTI system from its controllability gramian `mat_p` and
+    observability gramian `mat_q`, which are computed unless given.
+    """
     # if not sys.is_shift():
     #     msg = 'Balanced realization for shift operator only.'
     #     raise ValueError(msg)
 
     # A, B, C, D = sys.params
-    mat_p = controllability_gramian_discrete(az, bz)
-    mat_q = observability_gramian_discrete(az, cz)
+    if mat_p is None:
+        mat_p = controllability_gramian_discrete(az, bz)
+    if mat_q is None:
+        mat_q = observability_gramian_discrete(az, cz)
     mat_r = linalg.cholesky(mat_p, lower=True)
     rtran_qr = mat_r.T @ mat_q @ mat_r
     mat_u, s, _ = linalg.svd(rtran_qr)
@@ -383,3 +690,81 @@ def balanced_realization_discrete(az, bz, cz, dz):
     db = dz
     # return StateSpace(ab, bb, cb, db, dt=sys.dt)
     return ab, bb, cb, db
+
+
+def _invariant_subspace(az, poles, tol):
+    """
+    Returns an orthonormal basis of the invariant subspace of `az` belonging to `poles`, which contains both poles of
+    every complex pair, from an ordered real Schur decomposition.
+    """
+    def select(re, im):
+        return bool(np.any(np.abs(poles - complex(re, im)) <= tol * np.maximum(1, np.abs(poles))))
+
+    _, mat_z, sdim = linalg.schur(az, output='real', sort=select)
+    return mat_z[:, :sdim]
+
+
+def modal_realization_discrete(az, bz, cz, dz, max_condition=10.0, tol=1e-6):
+    """
+    Calculates a real block diagonal (modal) realization of a discrete time LTI system. Each real pole has a 1x1
+    block and each complex pair a 2x2 block, so the state matrix has about 2n nonzero entries. Decoupling poles that
+    lie close together takes a badly conditioned transformation, whose modes nearly cancel and need long words, so
+    the closest groups of poles are merged into one block until the condition number of the transformation is at most
+    `max_condition`, in the manner of Bavely and Stewart. Each block is then balanced on its own using the gramians of
+    its subsystem, which leaves the blocks' structure intact, and the blocks are ordered by decreasing Hankel singular
+    value.
+
+    Parameters
+    ----------
+    az, bz, cz, dz : ndarray
+        The state space matrices.
+    max_condition : float
+        The largest condition number of the block diagonalizing transformation.
+    tol : float
+        The relative distance under which two poles are taken as repeated.
+
+    Returns
+    -------
+    am, bm, cm, dm : ndarray
+        The state space matrices of the modal realization.
+    """
+    # Group the repeated poles and the conjugate of each complex pole.
+    groups = []
+    for pole in linalg.eigvals(az):
+        if pole.imag < 0:
+            continue
+        for group in groups:
+            if np.any(np.abs(np.array(group) - pole) <= tol * max(1, abs(pole))):
+                group.append(pole)
+                break
+        else:
+            groups.append([pole])
+    groups = [np.array(g + [np.conj(p) for p in g if p.imag > 0]) for g in groups]
+    bases = [_invariant_subspace(az, g, tol) for g in groups]
+
+    while len(bases) > 1 and np.linalg.cond(np.hstack(bases)) > max_condition:
+        # Merge the two groups with the closest invariant subspaces.
+        pairs = [(i, j) for i in range(len(bases)) for j in range(i + 1, len(bases))]
+        i, j = max(pairs, key=lambda p: np.linalg.norm(bases[p[0]].T @ bases[p[1]], 2))
+        groups[i] = np.concatenate((groups[i], groups[j]))
+        bases[i] = _invariant_subspace(az, groups[i], tol)
+        del groups[j], bases[j]
+
+    mat_t = np.hstack(bases)
+    mat_t_inv = linalg.inv(mat_t)
+    am, bm, cm = mat_t_inv @ az @ mat_t, mat_t_inv @ bz, cz @ mat_t
+
+    modes, start = [], 0
+    for basis in bases:
+        block = slice(start, start + basis.shape[1])
+        start = block.stop
+        ab, bb, cb, _ = balanced_realization_discrete(am[block, block], bm[block, :], cm[:, block], dz)
+        hsv = np.sqrt(controllability_gramian_discrete(ab, bb)[0, 0] * observability_gramian_discrete(ab, cb)[0, 0])
+        modes.append((hsv, ab, bb, cb))
+    modes.sort(key=lambda m: -m[0])
+
+    # The entries off the blocks are rounding errors, they are left exactly zero.
+    am = linalg.block_diag(*[m[1] for m in modes])
+    bm = np.vstack([m[2] for m in modes])
+    cm = np.hstack([m[3] for m in modes])
+    return am, bm, cm, dz
@@ -0,0 +1,82 @@
+import os
+import numpy as np
+
+
+_RADIX_BITS = {'hex': 4, 'bin': 1}
+_DIGITS = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+
+def readmem_task(rom_format):
+    """
+    Returns the name of the verilog system task that reads a memory file of the format `rom_format`, or None if the
+    table is written inline.
+    """
+    tasks = {'inline': None, 'hex': 'readmemh', 'bin': 'readmemb'}
+    if rom_format not in tasks:
+        vals = ' | '.join(tasks.keys())
+        msg = 'Valid rom_format values: %s.' % vals
+        raise ValueError(msg)
+    return tasks[rom_format]
+
+
+def format_memory(values, word_length, radix='hex'):
+    """
+    Formats a table as the contents of a memory file for $readmemh or $readmemb, one word per line. Negative values are
+    written in two's complement. The digits of every word are extracted with array operations, so large tables are
+    formatted without a python loop.
+
+    Parameters
+    ----------
+    values : ndarray
+        The integer values of the table.
+    word_length : int
+        The word length of the memory, at most 64 bits.
+    radix : 'hex' | 'bin'
+        The radix of the memory file.
+
+    Returns
+    -------
+    text : string
+        The contents of the memory file.
+    """
+    if radix not in _RADIX_BITS:
+        msg = 'Valid radix values: hex | bin.'
+        raise ValueError(msg)
+    if not 0 < word_length <= 64:
+        msg = 'The word length must be between 1 and 64 bits.'
+        raise ValueError(msg)
+
+    bits = _RADIX_BITS[radix]
+    n_digits = -(-word_length // bits)
+    mask = np.uint64(2 ** word_length - 1)
+    words = np.asarray(values).astype(np.int64).reshape(-1).view(np.uint64) & mask
+
+    shifts = (bits * np.arange(n_digits - 1, -1, -1)).astype(np.uint64)
+    digits = (words[:, np.newaxis] >> shifts) & np.uint64(2 ** bits - 1)
+    chars = np.empty((words.shape[0], n_digits + 1), dtype=np.uint8)
+    chars[:, :n_digits] = _DIGITS[digits.astype(np.intp)]
+    chars[:, n_digits] = ord('\n')
+    return chars.tobytes().decode('ascii')
+
+
+def write_memory(filename, values, word_length, radix='hex'):
+    """
+    Writes a table to a memory file for $readmemh or $readmemb. See `format_memory`.
+    """
+    with open(filename, 'w') as text_file:
+        text_file.write(format_memory(values, word_length, radix))
+
+
+def write_memories(roms, directory='.'):
+    """
+    Writes the memory files of a generator.
+
+    Parameters
+    ----------
+    roms : list of tuple
+        The (file name, values, word length, radix) of each memory.
+    directory : string
+        The directory the files are written to.
+    """
+    for filename, values, word_length, radix in roms:
+        write_memory(os.path.join(directory, filename), values, word_length, radix)
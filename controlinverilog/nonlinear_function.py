@@ -1,11 +1,25 @@
-import jinja2
+import os
 from math import ceil, log
 import numpy as np
+from . import interpolation
+from . import memory_file
+from . import templating
+from .estimate import ResourceEstimate
+
+
+# The sign of the function when the input is mirrored about zero and about a quarter of the input range, for each
+# symmetry in the order 'auto' tries them.
+_SYMMETRIES = {'sine': (-1, 1),
+               'cosine': (1, -1),
+               'odd': (-1, None),
+               'even': (1, None)}
 
 
 class NonlinearFunction(object):
 
-    def __init__(self, name, func, input_word_length, input_frac_length, output_frac_length):
+    def __init__(self, name, func, input_word_length, input_frac_length, output_frac_length, keep_verilog=True,
+                 rom_format='inline', rom_file=None, symmetry=None,
+                 interpolate=False, max_error=None):
         """
         Parameters
         ----------
@@ -19,6 +33,26 @@ class NonlinearFunction(object):
             the function.
         input_frac_length : int
             The input fractional length.
+        keep_verilog : bool
+            True to keep the rendered verilog in memory. Otherwise it is rendered straight to the file when printed.
+        rom_format : 'inline' | 'hex' | 'bin'
+            'inline' initializes the table with one statement per entry. 'hex' and 'bin' write the table to a memory
+            file read with $readmemh or $readmemb, which is much faster to elaborate for large tables.
+        rom_file : None | string
+            The name of the memory file, '<name>.mem' by default. The file is written next to the verilog file.
+        symmetry : None | 'auto' | 'even' | 'odd' | 'sine' | 'cosine'
+            None tabulates every input code. 'even' and 'odd' store the function for the non negative inputs only and
+            'sine' and 'cosine' store a quarter of the input range, folding the other inputs onto the table the way a
+            DDS does. 'sine' is odd and mirrored about a quarter of the range, 'cosine' is even and negated about it.
+            'auto' picks the smallest table the quantized function allows. The folded module has one more clock
+            cycle of latency.
+        interpolate : bool
+            True to interpolate linearly between the segments of a coarse table instead of tabulating every input
+            code. The smallest table that meets `max_error` is searched for, and the tables are written to
+            '<name>_base.mem' and '<name>_delta.mem' when `rom_format` isn't 'inline'. The interpolated module has
+            two more clock cycles of latency and can't be combined with `symmetry`.
+        max_error : None | float
+            The largest absolute output error of the interpolation against `func`, one output LSB by default.
         """
         self.func = func
         self.iw = input_word_length
@@ -26,18 +60,54 @@ class NonlinearFunction(object):
         self.of = output_frac_length
         self.name = name
         self._set_parameters()
+        self._set_symmetry(symmetry)
+
+        self.interpolator = None
+        if interpolate:
+            if self.symmetry is not None:
+                msg = 'The symmetry and interpolate options can not be combined.'
+                raise ValueError(msg)
+            max_error = 2.0 ** -self.of if max_error is None else max_error
+            self.interpolator = interpolation.PiecewiseLinear(self._y, self.iw, self.ow, self.of, max_error)
+
+        readmem = memory_file.readmem_task(rom_format)
+        if readmem is None:
+            self.roms = []
+        elif self.interpolator is not None:
+            self.roms = self.interpolator.roms(name, rom_format)
+        else:
+            rom_file = '%s.mem' % name if rom_file is None else rom_file
+            self.roms = [(rom_file, self.ram, self.ow, rom_format)]
 
         context = {
             'NAME': self.name,
             'IW': self.iw,
             'OW': self.ow,
             'N_RAM': self.n_ram,
-            'RAM': self.ram
+            'RAM': self.ram,
+            'ROM_FILE': self.roms[0][0] if self.roms else None,
+            'READMEM': readmem
         }
-        loader = jinja2.PackageLoader('controlinverilog', 'templates')
-        env = jinja2.Environment(loader=loader)
-        template = env.get_template('nonlinear_function.v')
-        self.verilog = template.render(context)
+        if self.interpolator is not None:
+            context.update(self.interpolator.context())
+            context['BASE_FILE'] = self.roms[0][0] if self.roms else None
+            context['DELTA_FILE'] = self.roms[1][0] if self.roms else None
+            self._template = templating.get_template('interpolated_function.v', trim_blocks=True)
+        elif self.symmetry is None:
+            self._template = templating.get_template('nonlinear_function.v')
+        else:
+            zero_sign, quarter_sign = _SYMMETRIES[self.symmetry]
+            context.update({
+                'SYMMETRY': self.symmetry,
+                'AW': self.aw,
+                'QUARTER': quarter_sign is not None,
+                'ZERO_ODD': zero_sign < 0,
+                'QUARTER_ODD': quarter_sign is not None and quarter_sign < 0,
+                'SPECIALS': self.specials
+            })
+            self._template = templating.get_template('nonlinear_function_folded.v', trim_blocks=True)
+        self._context = context
+        self.verilog = self._template.render(context) if keep_verilog is True else None
 
     def _set_parameters(self):
         xfix = np.arange(2 ** self.iw)
@@ -50,18 +120,113 @@ class NonlinearFunction(object):
         self.ymin = np.amin(y)
         ynorm = max((abs(self.ymax), abs(self.ymin)))
         self.ow = ceil(log(ynorm, 2)) + self.of + 1
-        self.ram = np.around(2 ** self.of * y).astype(int)
+        self._y = y
+        self.table = np.around(2 ** self.of * y).astype(int)
+        self.ram = self.table
         self.n_ram = len(self.ram)
 
+    def _fold(self, symmetry):
+        """
+        Folds every input code onto the table of a symmetry the way the verilog does.
+
+        Returns
+        -------
+        addr : ndarray
+            The table address of each input code.
+        flip : ndarray
+            True where the table value is negated.
+        specials : ndarray
+            The input codes that don't fold onto the table.
+        """
+        zero_sign, quarter_sign = _SYMMETRIES[symmetry]
+        half = 2 ** (self.iw - 1)
+        xfix = np.arange(2 ** self.iw)
+        xtwo = np.where(xfix >= half, xfix - 2 ** self.iw, xfix)
+        mag = np.abs(xtwo)
+        flip = (xtwo < 0) & (zero_sign < 0)
+        specials = [-half]
+        if quarter_sign is None:
+            addr = mag % half
+        else:
+            quarter = half // 2
+            mirror = (mag // quarter) % 2 == 1
+            low = mag % quarter
+            addr = np.where(mirror, -low % quarter, low)
+            flip = flip ^ (mirror & (quarter_sign < 0))
+            specials += [-quarter, quarter]
+        return addr, flip, np.array(specials) % 2 ** self.iw
+
+    def _set_symmetry(self, symmetry):
+
+        if symmetry is not None and symmetry != 'auto' and symmetry not in _SYMMETRIES:
+            vals = ' | '.join(['None', 'auto'] + list(_SYMMETRIES.keys()))
+            msg = 'Valid symmetry values: %s.' % vals
+            raise ValueError(msg)
+
+        candidates = list(_SYMMETRIES.keys()) if symmetry == 'auto' else [symmetry]
+        self.symmetry = None
+        self.specials = []
+        for candidate in candidates:
+            if candidate is None:
+                break
+            # The quarter wave symmetries need at least a two entry table.
+            min_iw = 3 if _SYMMETRIES[candidate][1] is not None else 2
+            if self.iw < min_iw:
+                continue
+            addr, flip, specials = self._fold(candidate)
+            n_rom = 2 ** (self.iw - min_iw + 1)
+            rom = self.table[:n_rom]
+            folded = np.where(flip, -rom[addr], rom[addr])
+            folded[specials] = self.table[specials]
+            if np.array_equal(folded, self.table):
+                self.symmetry = candidate
+                self.ram = rom
+                self.n_ram = n_rom
+                self.aw = self.iw - min_iw + 1
+                self.specials = [(int(code), int(self.table[code])) for code in specials]
+                break
+
+        if symmetry is not None and symmetry != 'auto' and self.symmetry is None:
+            msg = 'The quantized function does not have %s symmetry.' % symmetry
+            raise ValueError(msg)
+
     def print_summary(self):
         print('Input format is s(%d,%d)' % (self.iw, self.if_))
         print('Output format is s(%d,%d)' % (self.ow, self.of))
         print('The input range is: %g to %g' % (self.xmin, self.xmax))
         print('The output range is: %g to %g' % (self.ymin, self.ymax))
+        if self.symmetry is not None:
+            print('The ROM has %d of %d entries with %s symmetry' % (self.n_ram, len(self.table), self.symmetry))
+        if self.interpolator is not None:
+            self.interpolator.print_summary()
+
+    def estimate(self):
+        """
+        Returns
+        -------
+        estimate : controlinverilog.estimate.ResourceEstimate
+            The table and its input and output registers. The folded table adds the input and output negations and
+            the decoding of the special codes, the interpolated table is estimated by the interpolator.
+        """
+        if self.interpolator is not None:
+            return self.interpolator.estimate(self.name)
+        if self.symmetry is None:
+            return ResourceEstimate(self.name, register_bits=2 + self.iw + self.ow, rom_bits=self.n_ram * self.ow,
+                                    latency=2)
+        n_negations = 3 if _SYMMETRIES[self.symmetry][1] is not None else 2
+        return ResourceEstimate(self.name,
+                                register_bits=5 + self.iw + 3 * self.ow,
+                                n_adders=n_negations,
+                                rom_bits=self.n_ram * self.ow,
+                                latency=3)
 
     def print_verilog(self, filename=None):
-        if filename is None:
-            print(self.verilog)
-        else:
-            with open(filename, 'w') as text_file:
-                text_file.write(self.verilog)
+        templating.write_verilog(filename, self.verilog, self._template, self._context)
+        if isinstance(filename, str):
+            memory_file.write_memories(self.roms, os.path.dirname(filename))
+
+    def print_memory(self, directory='.'):
+        """
+        Writes the memory file of the table when it isn't initialized inline.
+        """
+        memory_file.write_memories(self.roms, directory)
@@ -1,4 +1,5 @@
-import jinja2
+from . import templating
+from .estimate import ResourceEstimate
 
 
 class Saturation(object):
@@ -7,7 +8,8 @@ class Saturation(object):
                  name,
                  input_word_length=22,
                  input_frac_length=10,
-                 output_word_length=16):
+                 output_word_length=16,
+                 keep_verilog=True):
 
         context = {'name': name,
                    'iw': input_word_length,
@@ -19,10 +21,9 @@ class Saturation(object):
                       'out_hi': 2 ** (output_word_length - input_frac_length - 1) - 2 ** (-input_frac_length),
                       'name': name}
 
-        loader = jinja2.PackageLoader('controlinverilog', 'templates')
-        env = jinja2.Environment(loader=loader)
-        template = env.get_template('saturation.v')
-        self.verilog = template.render(context)
+        self._template = templating.get_template('saturation.v')
+        self._context = context
+        self.verilog = self._template.render(context) if keep_verilog is True else None
 
     def print_summary(self):
 
@@ -30,10 +31,15 @@ class Saturation(object):
         print('Input Range: [%f, %f]' % (self.cache['in_lo'], self.cache['in_hi']))
         print('Output Range: [%f, %f]' % (self.cache['out_lo'], self.cache['out_hi']))
 
+    def estimate(self):
+        """
+        Returns
+        -------
+        estimate : controlinverilog.estimate.ResourceEstimate
+            The module is combinational, the overflow is detected from the sign and upper bits of the input.
+        """
+        return ResourceEstimate(self.cache['name'], latency=0)
+
     def print_verilog(self, filename=None):
 
-        if filename is None:
-            print(self.verilog)
-        else:
-            with open(filename, 'w') as text_file:
-                text_file.write(self.verilog)
+        templating.write_verilog(filename, self.verilog, self._template, self._context)
@@ -0,0 +1,365 @@
+import math
+import numpy as np
+import scipy.linalg as linalg
+import scipy.signal as signal
+from . import mechatronics
+from . import templating
+from .estimate import ResourceEstimate
+from .lti_formats_coefficients import LtiFormatsCoefficients
+from .lti_formats_signals import LtiFormatsSignals
+from .lti_simulator import LtiSimulator
+from .lti_system import LtiSystem
+from .lti_verilog import LtiVerilog
+from .state_space import StateSpace
+
+
+def zeros_poles_gain(sys):
+    """
+    Returns the zeros, poles and gain of a SISO system. The zeros are the finite generalized eigenvalues of the system
+    pencil and the gain is the first nonzero Markov parameter, which avoids forming the polynomials of the transfer
+    function.
+
+    Parameters
+    ----------
+    sys : controlinverilog.state_space.StateSpace
+        A SISO continuous or shift operator system.
+
+    Returns
+    -------
+    zeros, poles : ndarray
+        The zeros and poles of the transfer function.
+    gain : float
+        The gain of the transfer function.
+    """
+    mat_a, mat_b, mat_c, mat_d = sys.cofs
+    n = sys.n_order
+    pencil_a = np.block([[mat_a, mat_b], [mat_c, mat_d]])
+    pencil_b = linalg.block_diag(np.identity(n), np.zeros((1, 1)))
+    alpha, beta = linalg.eigvals(pencil_a, pencil_b, homogeneous_eigvals=True)
+    # The zeros at infinity have a vanishing beta.
+    finite = np.abs(beta) > 1e-9 * np.abs(alpha)
+    zeros = alpha[finite] / beta[finite]
+    poles = linalg.eigvals(mat_a)
+
+    n_delay = n - len(zeros)
+    if n_delay == 0:
+        gain = mat_d[0, 0]
+    else:
+        gain = (mat_c @ np.linalg.matrix_power(mat_a, n_delay - 1) @ mat_b)[0, 0]
+    return zeros, poles, gain
+
+
+def _series(sys1, sys2):
+    """
+    Returns the state space matrices of `sys2` driven by the output of `sys1`, either of which may be None.
+    """
+    if sys1 is None:
+        return sys2
+    a1, b1, c1, d1 = sys1
+    a2, b2, c2, d2 = sys2
+    mat_a = np.block([[a1, np.zeros((a1.shape[0], a2.shape[0]))], [b2 @ c1, a2]])
+    return mat_a, np.vstack((b1, b2 @ d1)), np.hstack((d2 @ c1, c2)), d2 @ d1
+
+
+class SosSystem(object):
+
+    def __init__(
+        self,
+        name,
+        fs,
+        sys,
+        input_word_length=16,
+        input_frac_length=14,
+        n_add=3,
+        cof_threshold=0.001,
+        sig_threshold=100,
+        operator='delta',
+        scaling='hinf',
+        cof_scaling_method='hinf',
+        pairing='minimal',
+        verbose=True,
+        keep_verilog=True
+    ):
+        """
+        Constructs the verilog code implementing a SISO LTI system as a cascade of second order sections. Each section
+        is a two state balanced realization generated by LtiVerilog, so the system takes O(n) instead of O(n^2)
+        multipliers.
+
+        The poles and zeros of the analog system are discretized with the bilinear transform, which maps the zeros at
+        infinity exactly to -1 rather than to a cluster of eigenvalues around it. They are paired into sections, with
+        the poles nearest the unit circle in the last section, by scipy.signal.zpk2sos. The output of every partial
+        cascade is scaled to a unit norm from the input, and the coefficient and signal formats are selected for each
+        section in turn, the input format of a section being the output format of the previous one.
+
+        Parameters
+        ----------
+        name : string
+            The name of the top module. The sections are the modules '<name>_section_<k>'.
+        fs : float
+            The sampling frequency.
+        sys : tuple of ndarray
+            The state space representation of a SISO analog system that is to be implemented in verilog.
+        input_word_length : int
+            Input word length.
+        input_frac_length : int
+            Input fractional length.
+        n_add : int
+            The number of additions that can be simulataneously performed in one cycle.
+        cof_threshold : float
+            A metric to set the coefficient fixed point formats of each section.
+        sig_threshold : float
+            A metric to set the signal formats of each section.
+        operator : 'delta' | 'shift'
+            The operator employed in the state equations of the sections.
+        scaling : 'hinf' | 'h2'
+            The norm scaling the sections and setting their signal formats.
+        cof_scaling_method : 'h2' | 'hinf' | 'impulse' | 'pole' | 'fixed'
+            The method to calculate the fixed point format of the coefficients.
+        pairing : 'minimal' | 'nearest' | 'keep_odd'
+            The pairing of the poles and zeros into sections, see scipy.signal.zpk2sos. 'minimal' adds no poles at the
+            origin, so an odd order system has a first order section.
+        verbose : bool
+            True to print a summary of the conversion process.
+        keep_verilog : bool
+            True to keep the rendered verilog in memory. Otherwise it is rendered straight to the file when printed.
+        """
+        if isinstance(sys, signal.StateSpace) is True:
+            sysa = StateSpace((sys.A, sys.B, sys.C, sys.D))
+        else:
+            sysa = StateSpace((sys[0], sys[1], sys[2], sys[3]))
+
+        if not sysa.is_siso():
+            raise ValueError('The system must be SISO.')
+        if sysa.is_asymtotically_stable() is False:
+            raise ValueError('The system must be asymtotically stable.')
+        if scaling not in ('hinf', 'h2'):
+            msg = 'Valid scaling values: hinf | h2.'
+            raise ValueError(msg)
+        if operator not in ('delta', 'shift'):
+            msg = 'Valid operator values: delta | shift.'
+            raise ValueError(msg)
+
+        self.name = name
+        self.scaling = scaling
+        zeros, poles, gain = signal.bilinear_zpk(*zeros_poles_gain(sysa), fs)
+        self.sos = signal.zpk2sos(zeros, poles, gain, pairing=pairing)
+        self.scales = self._scale_sections(self.sos)
+
+        params = {'n_add': n_add,
+                  'cof_threshold': cof_threshold,
+                  'sig_threshold': sig_threshold,
+                  'operator': operator,
+                  'cof_scaling_method': cof_scaling_method,
+                  'keep_verilog': keep_verilog}
+        self.sections = []
+        iw, if_ = input_word_length, input_frac_length
+        for k, (sos, scale) in enumerate(zip(self.sos, self.scales)):
+            section = self._gen_section('%s_section_%d' % (name, k + 1), sos, scale, 1.0 / fs, iw, if_, params)
+            self.sections.append(section)
+            iw, if_ = section['ow'], section['of']
+
+        self._context = {'name': name,
+                         'iw': input_word_length,
+                         'ow': iw,
+                         'sections': self._gen_connections()}
+        self._template = templating.get_template('sos_system.v', trim_blocks=True)
+        if keep_verilog is True:
+            modules = [self._template.render(self._context)]
+            modules += [section['lti_verilog'].verilog for section in self.sections]
+            self.verilog = '\n\n'.join(modules)
+        else:
+            self.verilog = None
+
+        if verbose is True:
+            self.print_summary()
+
+    @staticmethod
+    def _section_system(sos):
+        """
+        Returns the state space matrices of a section. The first order sections, padded with a leading zero by the
+        'minimal' pairing or with a pole and zero at the origin otherwise, are reduced to one state.
+        """
+        num, den = sos[:3], sos[3:]
+        if den[0] == 0:
+            num, den = num[1:], den[1:]
+        elif num[2] == 0 and den[2] == 0:
+            num, den = num[:2], den[:2]
+        return signal.tf2ss(num, den)
+
+    def _norm(self, sys):
+        mat_a, mat_b, mat_c, mat_d = sys
+        if self.scaling == 'hinf':
+            return mechatronics.norm_hinf_discrete(mat_a, mat_b, mat_c, mat_d)
+        return math.sqrt(mechatronics.norm_h2_discrete(mat_a, mat_b, mat_c) ** 2 + mat_d[0, 0] ** 2)
+
+    def _scale_sections(self, sos):
+        """
+        Returns the output gain of each section that scales every partial cascade to a unit norm. The last section
+        restores the gain of the system.
+        """
+        scales, cascade, total = [], None, 1.0
+        for k, section in enumerate(sos):
+            cascade = _series(cascade, self._section_system(section))
+            if k == len(sos) - 1:
+                scales.append(1.0 / total)
+                break
+            scale = 1.0 / self._norm(cascade)
+            mat_a, mat_b, mat_c, mat_d = cascade
+            cascade = (mat_a, mat_b, scale * mat_c, scale * mat_d)
+            scales.append(scale)
+            total *= scale
+        return scales
+
+    def _gen_section(self, name, sos, scale, dt, iw, if_, params):
+        """
+        Realizes a section and selects its formats the way LtiSystem does for a whole system.
+        """
+        mat_a, mat_b, mat_c, mat_d = self._section_system(sos)
+        sysz = StateSpace((mat_a, mat_b, scale * mat_c, scale * mat_d), dt=dt)
+        sysb = sysz.balanced_realization()
+        if params['operator'] == 'delta':
+            sysm = LtiSystem.sys_to_delta(sysb)
+            del_par = int(math.log(1 / sysm.delta, 2))
+        else:
+            sysm, del_par = sysb, None
+
+        cof_params = {'cof_scaling_method': params['cof_scaling_method'],
+                      'cof_word_length': None,
+                      'cof_frac_length': None,
+                      'cof_threshold': params['cof_threshold']}
+        cof_formats = LtiFormatsCoefficients(sysm, cof_params)
+
+        sig_params = {'sig_threshold': params['sig_threshold'],
+                      'sig_scaling_method': self.scaling,
+                      'input_word_length': iw,
+                      'input_frac_length': if_}
+        sig_formats = LtiFormatsSignals(sysm, sig_params, cof_formats)
+        extra = if_ - sig_formats.state_frac_length
+        if extra > 0:
+            # The input of the section is finer than its states, which buffer it, so they are widened to keep it.
+            sig_params['sig_scaling_method'] = 'fixed'
+            sig_params['state_word_length'] = sig_formats.state_word_length + extra
+            sig_params['state_frac_length'] = if_
+            sig_params['output_word_length'] = sig_formats.output_word_length + extra
+            sig_params['output_frac_length'] = sig_formats.output_frac_length + extra
+            sig_formats = LtiFormatsSignals(sysm, sig_params, cof_formats)
+
+        verilog_params = {'name': name,
+                          'n_add': params['n_add'],
+                          'iw': iw,
+                          'ow': sig_formats.output_word_length,
+                          'sw': sig_formats.state_word_length,
+                          'cw': cof_formats.cof_word_length,
+                          'cf': cof_formats.cof_frac_length,
+                          'if': if_,
+                          'sf': sig_formats.state_frac_length,
+                          'del_par': del_par,
+                          'keep_verilog': params['keep_verilog']}
+        sysf = sysm.fixed_point_system(cof_formats.cof_frac_length)
+
+        return {'name': name,
+                'sos': sos,
+                'scale': scale,
+                'iw': iw,
+                'if': if_,
+                'ow': sig_formats.output_word_length,
+                'of': sig_formats.output_frac_length,
+                'cof_formats': cof_formats,
+                'sig_formats': sig_formats,
+                'lti_verilog': LtiVerilog(sysf, verilog_params),
+                'lti_simulator': LtiSimulator(sysf, verilog_params)}
+
+    def _gen_connections(self):
+
+        connections = []
+        sig_in, ce_in = 'sig_in_1', 'ce_in'
+        for k, section in enumerate(self.sections):
+            connection = {'module': section['name'],
+                          'instance': 'section_%d' % (k + 1),
+                          'sig_in': sig_in,
+                          'ce_in': ce_in,
+                          'sig': 'sig_%d' % (k + 1),
+                          'ce': 'ce_%d' % (k + 1),
+                          'ow': section['ow'],
+                          'of': section['of']}
+            connections.append(connection)
+            sig_in, ce_in = connection['sig'], connection['ce']
+        return connections
+
+    @property
+    def output_word_length(self):
+        return self.sections[-1]['ow']
+
+    @property
+    def output_frac_length(self):
+        return self.sections[-1]['of']
+
+    def simulate(self, sig_in):
+        """
+        Simulates the generated verilog bit accurately, one section after the other. See
+        controlinverilog.lti_simulator.LtiSimulator.
+
+        Parameters
+        ----------
+        sig_in : ndarray
+            The integer input words with shape (n_samples, 1).
+
+        Returns
+        -------
+        sig_out : ndarray
+            The integer output words with shape (n_samples, 1).
+        """
+        sig = sig_in
+        for section in self.sections:
+            sig = section['lti_simulator'].simulate(sig)
+        return sig
+
+    def estimate(self):
+        """
+        Returns
+        -------
+        estimate : controlinverilog.estimate.ResourceEstimate
+            The sum of the resources of the sections. A new sample can enter once the slowest section is ready.
+        """
+        estimates = [section['lti_verilog'].estimate() for section in self.sections]
+        return ResourceEstimate(self.name,
+                                multipliers=[m for e in estimates for m in e.multipliers],
+                                register_bits=sum(e.register_bits for e in estimates),
+                                n_adders=sum(e.n_adders for e in estimates),
+                                latency=sum(e.latency for e in estimates),
+                                cycles_per_sample=max(e.cycles_per_sample for e in estimates))
+
+    def print_summary(self):
+
+        print('--- Second Order Sections ---')
+        print('%-8s %8s %12s %12s %12s %12s' % ('section', 'order', 'scale', 'coefficient', 'state', 'output'))
+        for k, section in enumerate(self.sections):
+            cof, sig = section['cof_formats'], section['sig_formats']
+            print('%-8d %8d %12.4g %12s %12s %12s' % (k + 1, section['lti_verilog'].order, section['scale'],
+                                                     's(%d,%d)' % (cof.cof_word_length, cof.cof_frac_length),
+                                                     's(%d,%d)' % (sig.state_word_length, sig.state_frac_length),
+                                                     's(%d,%d)' % (section['ow'], section['of'])))
+        print()
+        self.estimate().print_summary()
+
+    def print_verilog(self, filename=None):
+
+        if self.verilog is not None:
+            templating.write_verilog(filename, self.verilog, self._template, self._context)
+        elif isinstance(filename, str):
+            with open(filename, 'w') as fp:
+                self._write_modules(fp)
+        else:
+            self._write_modules(filename)
+
+    def _write_modules(self, fp):
+        """
+        Renders the top module and then each section straight to `fp`, None for the standard output.
+        """
+        templating.write_verilog(fp, None, self._template, self._context)
+        for section in self.sections:
+            if fp is None:
+                print()
+            else:
+                fp.write('\n\n')
+            section['lti_verilog'].print_verilog(fp)
@@ -1,26 +1,59 @@
 import numpy as np
 import scipy.linalg as linalg
 import scipy.signal as signal
+from . import csd
+from . import mechatronics
+
+
+def _read_only(mat):
+    mat.flags.writeable = False
+    return mat
 
 
 class StateSpace(object):
 
+    __slots__ = ('cofs', 'dt', 'delta', 'n_input', 'n_output', 'n_order', '_cache')
+
     def __init__(self, cofs, dt=None, delta=None):
         """
+        A system is an immutable value. The state space matrices are copied to read-only arrays, so quantities derived
+        from them, such as the poles and Gramians, are computed on first use and cached with the instance.
+
         Parameters
         ----------
+        cofs : tuple of ndarray
+            The state space matrices (A, B, C, D).
         dt : None | float
             The sampling period of the system. None for a continous time system.
         delta : None | float
             The scaling parameter for the delta operator. None when using the shift operator.
         """
-        mat_a, mat_b, mat_c, _ = cofs
-        self.cofs = cofs
-        self.dt = dt
-        self.delta = delta
-        self.n_input = mat_b.shape[1]
-        self.n_output = mat_c.shape[0]
-        self.n_order = mat_a.shape[0]
+        mats = [_read_only(np.array(mat)) for mat in cofs]
+        mat_a, mat_b, mat_c, _ = mats
+        object.__setattr__(self, 'cofs', tuple(mats))
+        object.__setattr__(self, 'dt', dt)
+        object.__setattr__(self, 'delta', delta)
+        object.__setattr__(self, 'n_input', mat_b.shape[1])
+        object.__setattr__(self, 'n_output', mat_c.shape[0])
+        object.__setattr__(self, 'n_order', mat_a.shape[0])
+        object.__setattr__(self, '_cache', {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError('StateSpace is immutable.')
+
+    def __delattr__(self, name):
+        raise AttributeError('StateSpace is immutable.')
+
+    def __reduce__(self):
+        return StateSpace, (self.cofs, self.dt, self.delta)
+
+    def _cached(self, key, func):
+        """
+        Returns the cached value of `key`, evaluating `func` on first use.
+        """
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
 
     def __neg__(self):
 
@@ -76,9 +109,85 @@ class StateSpace(object):
         """
         Returns the eigenvalues of the system.
         """
-        a, _, _, _ = self.cofs
-        e, _ = linalg.eig(a)
-        return e
+        return self._cached('poles', lambda: _read_only(linalg.eigvals(self.cofs[0])))
+
+    def schur(self):
+        """
+        Returns
+        -------
+        t : ndarray
+            The upper triangular complex Schur form of A.
+        z : ndarray
+            The unitary matrix such that A = Z T Z'.
+        """
+        def schur():
+            t, z = linalg.schur(self.cofs[0], output='complex')
+            return _read_only(t), _read_only(z)
+
+        return self._cached('schur', schur)
+
+    def with_io(self, mat_b, mat_c, mat_d):
+        """
+        Returns the system with the same A and operator and the input and output matrices `mat_b`, `mat_c` and
+        `mat_d`. The cached poles and Schur form only depend on A, so the new system shares them, and so does its
+        equivalent shift operator system if this one's was computed.
+        """
+        sys = StateSpace((self.cofs[0], mat_b, mat_c, mat_d), self.dt, self.delta)
+        for key in ('poles', 'schur'):
+            if key in self._cache:
+                sys._cache[key] = self._cache[key]
+        if 'delta2shift' in self._cache:
+            sysz = self._cache['delta2shift'].with_io(self.delta * np.asarray(mat_b), mat_c, mat_d)
+            sys._cache['delta2shift'] = sysz
+        return sys
+
+    def controllability_gramian(self):
+        """
+        Returns the controllability Gramian of a continuous or shift operator system.
+        """
+        mat_a, mat_b, _, _ = self.cofs
+        if self.is_continuous():
+            func = mechatronics.controllability_gramian_continuous
+        elif self.is_shift():
+            func = mechatronics.controllability_gramian_discrete
+        else:
+            msg = 'Gramians are for continuous or shift operator systems.'
+            raise ValueError(msg)
+        return self._cached('wc', lambda: _read_only(func(mat_a, mat_b)))
+
+    def observability_gramian(self):
+        """
+        Returns the observability Gramian of a continuous or shift operator system.
+        """
+        mat_a, _, mat_c, _ = self.cofs
+        if self.is_continuous():
+            func = mechatronics.observability_gramian_continuous
+        elif self.is_shift():
+            func = mechatronics.observability_gramian_discrete
+        else:
+            msg = 'Gramians are for continuous or shift operator systems.'
+            raise ValueError(msg)
+        return self._cached('wo', lambda: _read_only(func(mat_a, mat_c)))
+
+    def balanced_realization(self):
+        """
+        Returns the balanced realization of a shift operator system, computed from its cached Gramians.
+        """
+        if not self.is_shift():
+            msg = 'Balanced realizations are for shift operator systems.'
+            raise ValueError(msg)
+        mats = mechatronics.balanced_realization_discrete(*self.cofs, self.controllability_gramian(),
+                                                          self.observability_gramian())
+        return StateSpace(mats, self.dt)
+
+    def modal_realization(self):
+        """
+        Returns the modal realization of a shift operator system, see mechatronics.modal_realization_discrete.
+        """
+        if not self.is_shift():
+            msg = 'Modal realizations are for shift operator systems.'
+            raise ValueError(msg)
+        return StateSpace(mechatronics.modal_realization_discrete(*self.cofs), self.dt)
 
     def eval_transfer_function(self, p):
         """
@@ -94,25 +203,43 @@ class StateSpace(object):
     #     mats = [func(mat) for mat in self.cofs]
     #     return StateSpace(mats, self.dt, self.delta)
 
-    def quantized_system(self, cf):
+    def quantized_system(self, cf, max_digits=None):
         """
         Returns a system with quantized coefficients. It doesn't consider the word length only the fractional length.
-        This function is only relevent for coefficient fractional lengths greater than 0.
+        This function is only relevent for coefficient fractional lengths greater than 0. If `max_digits` is given,
+        the coefficients are rounded to at most that many nonzero canonical signed digits.
         """
         if cf <= 0:
             raise ValueError('Valid output for cf > 0.')
 
         scale = 2 ** cf
-        mats = [np.around(scale * mat) / scale for mat in self.cofs]
+        mats = [csd.round_digits(scale * mat, max_digits) / scale for mat in self.cofs]
         sys_q = StateSpace(mats, self.dt, self.delta)
         return sys_q
 
-    def fixed_point_system(self, cf):
+    def fixed_point_system(self, cf, max_digits=None, cof_frac_lengths=None):
+        """
+        Returns the system with integer coefficients of fractional length `cf`. If `cof_frac_lengths`, the fractional
+        lengths of each coefficient of A, B, C and D, are given, each coefficient is rounded to its own fractional
+        length, at most `cf`, and the integers are scaled to the common fractional length `cf`.
+        """
+        if cof_frac_lengths is not None:
+            mats = [np.around(mat * 2.0 ** cfs) * 2.0 ** (cf - cfs) for mat, cfs in zip(self.cofs, cof_frac_lengths)]
+            return StateSpace(mats, self.dt, self.delta)
+
         scale = 2 ** cf
-        mats = [np.around(scale * mat) for mat in self.cofs]
+        mats = [csd.round_digits(scale * mat, max_digits) for mat in self.cofs]
         sys_fixed = StateSpace(mats, self.dt, self.delta)
         return sys_fixed
 
+    def nonuniform_quantized_system(self, cof_frac_lengths):
+        """
+        Returns a system whose coefficients are rounded to their own fractional lengths, given for each coefficient of
+        A, B, C and D.
+        """
+        mats = [np.around(mat * 2.0 ** cfs) * 2.0 ** -cfs for mat, cfs in zip(self.cofs, cof_frac_lengths)]
+        return StateSpace(mats, self.dt, self.delta)
+
     def static_gain(self):
 
         if self.is_continuous():
@@ -140,10 +267,13 @@ class StateSpace(object):
             msg = 'System must use the delta operator to call this function.'
             raise ValueError(msg)
 
-        ad, bd, cd, dd = self.cofs
-        az = (np.identity(self.n_order) + self.delta * ad)
-        bz = self.delta * bd
-        return StateSpace((az, bz, cd, dd), dt=self.dt)
+        def delta2shift():
+            ad, bd, cd, dd = self.cofs
+            az = (np.identity(self.n_order) + self.delta * ad)
+            bz = self.delta * bd
+            return StateSpace((az, bz, cd, dd), dt=self.dt)
+
+        return self._cached('delta2shift', delta2shift)
 
     def is_asymtotically_stable(self):
         """
@@ -179,8 +309,7 @@ class StateSpace(object):
         if self.is_shift() is False:
             raise ValueError('This function is for shift operator systems.')
 
-        mat_a, _, _, _ = self.cofs
-        zeig = linalg.eigvals(mat_a)
+        zeig = self.poles()
         zeig = zeig[np.nonzero(zeig)]
         seig = np.log(zeig) / self.dt
         r = np.amin(np.abs(np.real(seig)))
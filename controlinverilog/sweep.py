@@ -0,0 +1,125 @@
+import concurrent.futures
+import inspect
+import itertools
+import os
+import time
+from .lti_system import LtiSystem
+
+
+def grid_params(grid):
+    """
+    Returns the combinations of the parameter values of a grid.
+
+    Parameters
+    ----------
+    grid : dictionary
+        The values of each swept parameter, e.g. {'operator': ['delta', 'shift'], 'n_add': [2, 3]}.
+
+    Returns
+    -------
+    params : list of dictionary
+        The parameters of each combination, the last parameter of `grid` varying fastest.
+    """
+    names = list(grid.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _build(index, sys, params, verilog_dir):
+    """
+    Constructs one LtiSystem of a sweep and summarizes it. This runs in a worker process, so only plain data is
+    returned.
+    """
+    kwargs = dict(params)
+    name = kwargs.pop('name', 'lti')
+    fs = kwargs.pop('fs')
+    result = {'index': index, 'params': params, 'error': None}
+
+    start = time.perf_counter()
+    try:
+        lti = LtiSystem(name, fs, sys, verbose=False, keep_verilog=False, **kwargs)
+    except (ValueError, ArithmeticError) as err:
+        result['error'] = '%s: %s' % (type(err).__name__, err)
+        result['time'] = time.perf_counter() - start
+        return result
+    result['time'] = time.perf_counter() - start
+
+    context = lti.lti_verilog.context
+    result['formats'] = {'input_word_length': context['iw'],
+                         'input_frac_length': context['if_'],
+                         'cof_word_length': context['cw'],
+                         'cof_frac_length': context['cf'],
+                         'state_word_length': context['sw'],
+                         'state_frac_length': context['sf'],
+                         'output_word_length': context['ow'],
+                         'output_frac_length': context['sf']}
+    result['estimate'] = lti.estimate().as_dict()
+    result['stage_times'] = dict(lti.stage_times)
+
+    if verilog_dir is not None:
+        filename = os.path.join(verilog_dir, '%s_%d.v' % (name, index))
+        lti.print_verilog(filename)
+        result['filename'] = filename
+    return result
+
+
+def design_sweep(sys, grid, workers=None, verilog_dir=None, **params):
+    """
+    Constructs an LtiSystem for each combination of the parameters of a grid in a pool of processes, and yields a
+    summary of each design as soon as it is built. The systems are built without printing and without rendering
+    their verilog, unless `verilog_dir` is given.
+
+    Parameters
+    ----------
+    sys : tuple of ndarray | scipy.signal.StateSpace
+        The analog system passed to every LtiSystem.
+    grid : dictionary
+        The values of each swept LtiSystem parameter, e.g. 'operator', 'cof_threshold', 'sig_threshold', 'n_add',
+        'sig_scaling_method' or 'cof_scaling_method'. See grid_params.
+    workers : None | int
+        The number of processes, None for the number of processors. With 1 the designs are built in this process.
+    verilog_dir : None | string
+        The directory the verilog of each design is written to as '<name>_<index>.v', None to not write it.
+    params : dictionary
+        The LtiSystem parameters common to all the designs, which must include `fs` unless it is swept. The module
+        name is `name`, 'lti' by default.
+
+    Returns
+    -------
+    results : generator of dictionary
+        The results in order of completion. Each has the `index` of the combination in grid_params(grid), the swept
+        and common `params`, and the wall `time` of the construction in seconds. If the design can't be built, i.e.
+        the construction raised a ValueError or an ArithmeticError, `error` is its type and message. Otherwise
+        `error` is None, `formats` has the word and fractional lengths, `estimate` is the ResourceEstimate as a
+        dictionary, `stage_times` are the LtiSystem.stage_times and `filename` is the verilog file if written. Closing the generator early cancels the designs not yet started.
+    """
+    if 'fs' not in params and 'fs' not in grid:
+        msg = 'The sampling frequency fs must be swept or given as a common parameter.'
+        raise ValueError(msg)
+
+    # A misspelled parameter would fail every design, so it is rejected before any work is submitted.
+    valid = set(inspect.signature(LtiSystem.__init__).parameters) - {'self', 'sys', 'verbose', 'keep_verilog'}
+    unknown = sorted((set(grid) | set(params)) - valid)
+    if unknown:
+        msg = 'Unknown LtiSystem parameters: %s.' % ', '.join(unknown)
+        raise ValueError(msg)
+
+    combinations = [dict(params, **combination) for combination in grid_params(grid)]
+    return _sweep(sys, combinations, workers, verilog_dir)
+
+
+def _sweep(sys, combinations, workers, verilog_dir):
+
+    if workers == 1:
+        for index, combination in enumerate(combinations):
+            yield _build(index, sys, combination, verilog_dir)
+        return
+
+    # A caller that stops early only waits for the designs being built, the queued ones are cancelled.
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(_build, index, sys, combination, verilog_dir)
+                   for index, combination in enumerate(combinations)]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
@@ -136,13 +136,21 @@ module {{ name }} #
     **************************************************************************/
     initial begin
         // The fine LUT format is s({{ aw }},{{ aw-1 }})
+        {% if sine_file %}
+        ${{ readmem }}("{{ sine_file }}", sin_lut);
+        {% else %}
         {% for val in sine_lut %}
         sin_lut[{{ loop.index-1 }}] = {{ val }};
         {% endfor %}
+        {% endif %}
 
         // The fine LUT format is s({{ faw }},{{ faf }})
+        {% if fine_file %}
+        ${{ readmem }}("{{ fine_file }}", fine_lut);
+        {% else %}
         {% for val in fine_lut %}
         fine_lut[{{ loop.index-1 }}] = {{ val }};
         {% endfor %}
+        {% endif %}
     end
 endmodule
\ No newline at end of file
@@ -0,0 +1,79 @@
+module {{ NAME }} #
+(
+    parameter IW = {{ IW }},
+    parameter OW = {{ OW }},
+    parameter SW = {{ SW }},    // segment address width
+    parameter LW = {{ LW }},    // interpolation width
+    parameter GW = {{ GW }},    // guard bits of the base
+    parameter BW = {{ BW }},    // base width
+    parameter DW = {{ DW }},    // delta width
+    parameter AW = {{ AW }},    // accumulator width
+    parameter N_SEG = {{ N_SEG }}
+)(
+    input clk,
+    input ce_in,
+    input [IW-1:0] sig_in,
+    output reg ce_out,
+    output reg [OW-1:0] sig_out
+);
+
+    // The upper SW bits of the input select a segment and the lower LW bits interpolate between the segment base and
+    // the base plus delta. The output is rounded from the accumulator, which has LW+GW fractional bits.
+    localparam signed [AW-1:0] RND = {{ AW }}'sd{{ RND }};
+
+    reg [2:0] ce_buf;
+    reg [IW-1:0] sig_in_buf;
+    reg signed [BW-1:0] base_lut [0:N_SEG-1];
+    reg signed [DW-1:0] delta_lut [0:N_SEG-1];
+    reg signed [BW-1:0] base;
+    reg signed [BW-1:0] base_buf;
+    reg signed [DW-1:0] delta;
+    reg [LW-1:0] frac;
+    reg signed [DW+LW:0] prod;
+
+    wire signed [AW-1:0] acc = $signed({base_buf, {LW{1'b0}}}) + prod + RND;
+
+    // Input buffer.
+    always @(posedge clk) begin
+        ce_buf[0] <= ce_in;
+        if(ce_in) sig_in_buf <= sig_in;
+    end
+
+    // Segment table read.
+    always @(posedge clk) begin
+        ce_buf[1] <= ce_buf[0];
+        base <= base_lut[sig_in_buf[IW-1:LW]];
+        delta <= delta_lut[sig_in_buf[IW-1:LW]];
+        frac <= sig_in_buf[LW-1:0];
+    end
+
+    // Interpolation product.
+    always @(posedge clk) begin
+        ce_buf[2] <= ce_buf[1];
+        base_buf <= base;
+        prod <= delta * $signed({1'b0, frac});
+    end
+
+    // Rounded output.
+    always @(posedge clk) begin
+        ce_out <= ce_buf[2];
+        sig_out <= acc[LW+GW+OW-1:LW+GW];
+    end
+
+    initial begin
+        ce_buf = 0;
+        sig_in_buf = 0;
+{% if BASE_FILE %}
+        ${{ READMEM }}("{{ BASE_FILE }}", base_lut);
+        ${{ READMEM }}("{{ DELTA_FILE }}", delta_lut);
+{% else %}
+{% for val in BASE %}
+        base_lut[{{ loop.index-1 }}] = {{ val }};
+{% endfor %}
+{% for val in DELTA %}
+        delta_lut[{{ loop.index-1 }}] = {{ val }};
+{% endfor %}
+{% endif %}
+    end
+
+endmodule
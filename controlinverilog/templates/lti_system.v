@@ -2,16 +2,16 @@ module {{ name }} #
 (
     parameter CW = {{ cw }},
     {% for p in A_params %}
-    parameter signed [CW-1:0] {{ p["name"] }} = {{ p["value"] }}, 
+    parameter signed [{{ p["width"] }}-1:0] {{ p["name"] }} = {{ p["value"] }}, 
     {% endfor %}
     {% for p in B_params %}
-    parameter signed [CW-1:0] {{ p["name"] }} = {{ p["value"] }}, 
+    parameter signed [{{ p["width"] }}-1:0] {{ p["name"] }} = {{ p["value"] }}, 
     {% endfor %}
     {% for p in C_params %}
-    parameter signed [CW-1:0] {{ p["name"] }} = {{ p["value"] }}, 
+    parameter signed [{{ p["width"] }}-1:0] {{ p["name"] }} = {{ p["value"] }}, 
     {% endfor %}
     {% for p in D_params %}
-    parameter signed [CW-1:0] {{ p["name"] }} = {{ p["value"] }}, 
+    parameter signed [{{ p["width"] }}-1:0] {{ p["name"] }} = {{ p["value"] }}, 
     {% endfor %}
     parameter IW = {{ iw }},
     parameter OW = {{ ow }},
@@ -46,7 +46,7 @@ module {{ name }} #
     reg signed [SW-1:0] {{ s }};
     {% endfor %}
     {% for s in sig_x %}
-    reg signed [SW-1:0] {{ s }};
+    reg signed [{{ x_widths[loop.index0] }}-1:0] {{ s }};
     {% endfor %}
     {% for s in sig_x_long %}
     reg signed [RW-1:0] {{ s }};
@@ -76,6 +76,9 @@ module {{ name }} #
     {% for s in output_sig_add %}
     reg signed [RW-1:0] {{ s }};
     {% endfor %}
+    {% for w in shift_add_wires %}
+    wire signed [RW-1:0] {{ w[0] }} = {{ w[1] }};
+    {% endfor %}
     
     /**************************************************************************
     * The input and quantized state buffer.
@@ -87,7 +90,7 @@ module {{ name }} #
             {{ ib[0] }} <= { {(SW-IW-SF+IF){ {{ ib[1] }}[IW-1]}}, {{ ib[1] }}, {(SF-IF){1'b0}} };
             {% endfor %}
             {% for sb in state_buffers %}
-            {{ sb[0] }} <= {{ sb[1] }}[SW+CF-1:CF];
+            {{ sb[0] }} <= {{ sb[1] }}[{{ sb[2] }}];
             {% endfor %}
         end 
     end
@@ -98,16 +101,16 @@ module {{ name }} #
     always @(posedge clk) begin
         ce_mul <= ce_buf;
         {% for p in A_prods %}
-        {{ p["o"] }} <= {{ p["a"] }} * {{ p["b"] }};
+        {{ p["o"] }} <= {{ p["expr"] }};
         {% endfor %}
         {% for p in B_prods %}
-        {{ p["o"] }} <= {{ p["a"] }} * {{ p["b"] }};
+        {{ p["o"] }} <= {{ p["expr"] }};
         {% endfor %}
         {% for p in C_prods %}
-        {{ p["o"] }} <= {{ p["a"] }} * {{ p["b"] }};
+        {{ p["o"] }} <= {{ p["expr"] }};
         {% endfor %}
         {% for p in D_prods %}
-        {{ p["o"] }} <= {{ p["a"] }} * {{ p["b"] }};
+        {{ p["o"] }} <= {{ p["expr"] }};
         {% endfor %}
     end
 
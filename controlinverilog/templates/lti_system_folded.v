@@ -0,0 +1,207 @@
+module {{ name }} #
+(
+    parameter CW = {{ cw }},
+    parameter IW = {{ iw }},
+    parameter OW = {{ ow }},
+    parameter SW = {{ sw }},
+    parameter CF = {{ cf }},
+    parameter SF = {{ sf }},
+    parameter IF = {{ if_ }},
+    {% if del is not none %}
+    parameter DEL = {{ del }},
+    {% endif %}
+    parameter N_CYCLE = {{ n_cycle }},  // multiply-accumulate cycles per sample
+    parameter NW = {{ nw }},            // cycle counter width
+    parameter RW = SW + CW - 1
+)
+(
+    {% for i in sig_in %}
+    input wire [IW-1:0] {{ i }},
+    {% endfor %}
+    {% for o in sig_out %}
+    output wire [OW-1:0] {{ o }},
+    {% endfor %}
+    input wire clk,
+    input wire ce_in,
+    output reg ce_out
+);
+
+    // Each of the {{ mults|length }} multipliers computes N_CYCLE products per sample. The coefficient and the
+    // accumulator of every cycle are read from a ROM indexed by the cycle counter.
+    reg run;
+    reg [NW-1:0] cnt;
+    reg vld_1, vld_2;
+    reg last_1, last_2, last_3;
+
+    {% for s in sig_u %}
+    reg signed [SW-1:0] {{ s }};
+    {% endfor %}
+    {% for s in sig_x %}
+    reg signed [SW-1:0] {{ s }};
+    {% endfor %}
+    {% for s in sig_x_long %}
+    reg signed [RW-1:0] {{ s }};
+    {% endfor %}
+    {% for s in sig_dx %}
+    reg signed [RW-1:0] {{ s }};
+    {% endfor %}
+    {% for s in sig_y_long %}
+    reg signed [RW-1:0] {{ s }};
+    {% endfor %}
+    {% for m in mults %}
+
+    reg signed [CW-1:0] {{ m.rom }} [0:N_CYCLE-1];
+    reg [{{ m.sel_w - 1 }}:0] {{ m.sel_rom }} [0:N_CYCLE-1];
+    reg signed [CW-1:0] {{ m.cof }};
+    reg signed [SW-1:0] {{ m.opd }};
+    reg [{{ m.sel_w - 1 }}:0] {{ m.sel }}_1, {{ m.sel }}_2;
+    reg signed [RW-1:0] {{ m.prod }};
+    {% for a in m.accs %}
+    reg signed [RW-1:0] {{ a }};
+    {% endfor %}
+    {% endfor %}
+
+    /**************************************************************************
+    * The input and quantized state buffer and the cycle counter.
+    **************************************************************************/
+    always @(posedge clk) begin
+        if(ce_in) begin
+            {% for ib in input_buffers %}
+            {{ ib[0] }} <= { {(SW-IW-SF+IF){ {{ ib[1] }}[IW-1]}}, {{ ib[1] }}, {(SF-IF){1'b0}} };
+            {% endfor %}
+            {% for sb in state_buffers %}
+            {{ sb[0] }} <= {{ sb[1] }}[SW+CF-1:CF];
+            {% endfor %}
+        end
+    end
+
+    always @(posedge clk) begin
+        if(ce_in) begin
+            run <= 1'b1;
+            cnt <= 0;
+        end else if(run) begin
+            run <= cnt != N_CYCLE - 1;
+            cnt <= cnt + 1'b1;
+        end
+    end
+
+    /**************************************************************************
+    * The coefficient and operand selection.
+    **************************************************************************/
+    always @(posedge clk) begin
+        vld_1 <= run;
+        last_1 <= run && cnt == N_CYCLE - 1;
+        {% for m in mults %}
+        {{ m.cof }} <= {{ m.rom }}[cnt];
+        {{ m.sel }}_1 <= {{ m.sel_rom }}[cnt];
+        case(cnt)
+            {% for e in m.entries %}
+            {{ e[0] }}: {{ m.opd }} <= {{ e[1] }};
+            {% endfor %}
+            default: {{ m.opd }} <= 0;
+        endcase
+        {% endfor %}
+    end
+
+    /**************************************************************************
+    * The multiplication operations.
+    **************************************************************************/
+    always @(posedge clk) begin
+        vld_2 <= vld_1;
+        last_2 <= last_1;
+        {% for m in mults %}
+        {{ m.prod }} <= {{ m.cof }} * {{ m.opd }};
+        {{ m.sel }}_2 <= {{ m.sel }}_1;
+        {% endfor %}
+    end
+
+    /**************************************************************************
+    * The accumulators.
+    **************************************************************************/
+    always @(posedge clk) begin
+        last_3 <= last_2;
+        if(ce_in) begin
+            {% for m in mults %}
+            {% for a in m.accs %}
+            {{ a }} <= 0;
+            {% endfor %}
+            {% endfor %}
+        end else if(vld_2) begin
+            {% for m in mults %}
+            case({{ m.sel }}_2)
+                {% for a in m.accs %}
+                {{ loop.index0 }}: {{ a }} <= {{ a }} + {{ m.prod }};
+                {% endfor %}
+                default: ;
+            endcase
+            {% endfor %}
+        end
+    end
+
+    /**************************************************************************
+    * The sum of the accumulators of each equation.
+    **************************************************************************/
+    always @(posedge clk) begin
+        ce_out <= last_3;
+        if(last_3) begin
+            {% for s in sums %}
+            {{ s[0] }} <= {{ s[1] }};
+            {% endfor %}
+        end
+    end
+
+    /**************************************************************************
+    * The delta/shift operator.
+    **************************************************************************/
+    always @(posedge clk) begin
+        if(ce_out) begin
+            {% for d in deltas %}
+            {% if del is not none %}
+            {{ d[0] }} <= {{ d[0] }} + { {(DEL){ {{ d[1] }}[RW-1]}}, {{ d[1] }}[RW-1:DEL] };
+            {% else %}
+            {{ d[0] }} <= {{ d[1] }};
+            {% endif %}
+            {% endfor %}
+        end
+    end
+
+    /**************************************************************************
+    * Quantization of system outputs.
+    **************************************************************************/
+    {% for o in outputs %}
+    assign {{ o[0] }} = {{ o[1] }}[OW+CF-1:CF];
+    {% endfor %}
+
+    initial begin
+        run = 0;
+        cnt = 0;
+        vld_1 = 0;
+        vld_2 = 0;
+        last_1 = 0;
+        last_2 = 0;
+        last_3 = 0;
+        ce_out = 0;
+        {% for s in sig_u %}
+        {{ s }} = 0;
+        {% endfor %}
+        {% for s in sig_x %}
+        {{ s }} = 0;
+        {% endfor %}
+        {% for s in sig_x_long %}
+        {{ s }} = 0;
+        {% endfor %}
+        {% for s in sig_dx %}
+        {{ s }} = 0;
+        {% endfor %}
+        {% for s in sig_y_long %}
+        {{ s }} = 0;
+        {% endfor %}
+        {% for m in mults %}
+        {% for r in m.rom_values %}
+        {{ m.rom }}[{{ loop.index0 }}] = {{ r[0] }};
+        {{ m.sel_rom }}[{{ loop.index0 }}] = {{ r[1] }};
+        {% endfor %}
+        {% endfor %}
+    end
+
+endmodule
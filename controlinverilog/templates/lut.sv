@@ -30,8 +30,8 @@ module {{ NAME }} #
     initial begin
         ce_buf = 0;
         sig_in_buf = 0;
-        {% for val in RAM %} 
-        func_lut[{{ loop.index-1 }}] = {{ val }}; {% endfor %}
+        {% if ROM_FILE %}${{ READMEM }}("{{ ROM_FILE }}", func_lut);{% else %}{% for val in RAM %} 
+        func_lut[{{ loop.index-1 }}] = {{ val }}; {% endfor %}{% endif %}
     end
 
 endmodule
\ No newline at end of file
@@ -0,0 +1,76 @@
+module {{ NAME }} #
+(
+    parameter IW = {{ IW }},
+    parameter OW = {{ OW }},
+    parameter AW = {{ AW }},    // ROM address width
+    parameter N_RAM = {{ N_RAM }}
+)(
+    input clk,
+    input ce_in,
+    input [IW-1:0] sig_in,
+    output reg ce_out,
+    output reg [OW-1:0] sig_out
+);
+
+    // The ROM holds the function for the input codes 0 to N_RAM-1. The other codes are folded onto the ROM with the
+    // {{ SYMMETRY }} symmetry of the function and the output is negated where the symmetry is odd. The input codes
+    // that don't fold onto the ROM are decoded separately.
+    reg ce_buf;
+    reg ce_lut;
+    reg [IW-1:0] sig_in_buf;
+    reg [OW-1:0] func_lut [0:N_RAM-1];
+    reg [OW-1:0] lut_out;
+    reg [OW-1:0] const_out;
+    reg use_const;
+    reg negate;
+
+    wire neg = sig_in_buf[IW-1];
+    wire [IW-1:0] mag = neg ? -sig_in_buf : sig_in_buf;
+{% if QUARTER %}
+    wire mirror = mag[IW-2];
+    wire [AW-1:0] addr = mirror ? -mag[AW-1:0] : mag[AW-1:0];
+    wire flip = {% if ZERO_ODD %}neg{% elif QUARTER_ODD %}mirror{% else %}1'b0{% endif %};
+{% else %}
+    wire [AW-1:0] addr = mag[AW-1:0];
+    wire flip = {% if ZERO_ODD %}neg{% else %}1'b0{% endif %};
+{% endif %}
+
+    // Input buffer.
+    always @(posedge clk) begin
+        ce_buf <= ce_in;
+        if(ce_in) sig_in_buf <= sig_in;
+    end
+
+    // Lookup table read.
+    always @(posedge clk) begin
+        ce_lut <= ce_buf;
+        lut_out <= func_lut[addr];
+        negate <= flip;
+        case (sig_in_buf)
+{% for code, val in SPECIALS %}
+            {{ IW }}'d{{ code }}: begin use_const <= 1'b1; const_out <= {{ val }}; end
+{% endfor %}
+            default: begin use_const <= 1'b0; const_out <= 0; end
+        endcase
+    end
+
+    // Output sign.
+    always @(posedge clk) begin
+        ce_out <= ce_lut;
+        sig_out <= use_const ? const_out : (negate ? -lut_out : lut_out);
+    end
+
+    initial begin
+        ce_buf = 0;
+        ce_lut = 0;
+        sig_in_buf = 0;
+{% if ROM_FILE %}
+        ${{ READMEM }}("{{ ROM_FILE }}", func_lut);
+{% else %}
+{% for val in RAM %}
+        func_lut[{{ loop.index-1 }}] = {{ val }};
+{% endfor %}
+{% endif %}
+    end
+
+endmodule
@@ -0,0 +1,34 @@
+module {{ name }} #
+(
+    parameter IW = {{ iw }},
+    parameter OW = {{ ow }}
+)
+(
+    input wire [IW-1:0] sig_in_1,
+    output wire [OW-1:0] sig_out_1,
+    input wire clk,
+    input wire ce_in,
+    output wire ce_out
+);
+
+    // A cascade of {{ sections|length }} second order sections. Each section starts when the previous one's output is
+    // valid, the formats of the signals between the sections are given in the comments.
+    {% for s in sections %}
+    wire [{{ s.ow - 1 }}:0] {{ s.sig }};  // s({{ s.ow }},{{ s.of }})
+    wire {{ s.ce }};
+    {% endfor %}
+
+    {% for s in sections %}
+    {{ s.module }} {{ s.instance }} (
+        .sig_in_1({{ s.sig_in }}),
+        .sig_out_1({{ s.sig }}),
+        .clk(clk),
+        .ce_in({{ s.ce_in }}),
+        .ce_out({{ s.ce }})
+    );
+
+    {% endfor %}
+    assign sig_out_1 = {{ sections[-1].sig }};
+    assign ce_out = {{ sections[-1].ce }};
+
+endmodule
@@ -0,0 +1,130 @@
+import os
+import sys
+import jinja2
+
+
+# The environment options of each template configuration. The generators written before the whitespace control
+# options were introduced rely on the default options, so both configurations are kept.
+_OPTIONS = {'default': {},
+            'trim': {'trim_blocks': True, 'lstrip_blocks': True}}
+
+# Set this environment variable to a directory written by `compile_templates` to load precompiled templates at import.
+PRECOMPILED_ENV_VAR = 'CONTROLINVERILOG_PRECOMPILED_TEMPLATES'
+
+_environments = {}
+_precompiled = os.environ.get(PRECOMPILED_ENV_VAR)
+
+
+def _key(trim_blocks):
+    return 'trim' if trim_blocks else 'default'
+
+
+def _environment(trim_blocks):
+    """
+    Returns the shared environment of a template configuration, creating it on first use. The environment caches the
+    compiled templates and auto reload is disabled, so each template is parsed once per process.
+    """
+    key = _key(trim_blocks)
+    if key not in _environments:
+        loader = jinja2.PackageLoader('controlinverilog', 'templates')
+        if _precompiled is not None:
+            module_loader = jinja2.ModuleLoader(os.path.join(_precompiled, key))
+            loader = jinja2.ChoiceLoader([module_loader, loader])
+        _environments[key] = jinja2.Environment(loader=loader, auto_reload=False, **_OPTIONS[key])
+    return _environments[key]
+
+
+def get_template(name, trim_blocks=False):
+    """
+    Parameters
+    ----------
+    name : string
+        The file name of the template in the `templates` directory.
+    trim_blocks : bool
+        True to remove the whitespace around block tags, enabling both `trim_blocks` and `lstrip_blocks`.
+
+    Returns
+    -------
+    template : jinja2.Template
+        The compiled template from the shared environment.
+    """
+    return _environment(trim_blocks).get_template(name)
+
+
+def compile_templates(target):
+    """
+    Compiles every template to python bytecode for both configurations. The output can be shipped with an application
+    and loaded with `load_precompiled` so that no template is parsed at run time.
+
+    Parameters
+    ----------
+    target : string
+        The directory to write the compiled templates to.
+    """
+    for key, options in _OPTIONS.items():
+        loader = jinja2.PackageLoader('controlinverilog', 'templates')
+        env = jinja2.Environment(loader=loader, **options)
+        env.compile_templates(os.path.join(target, key), zip=None)
+
+
+def load_precompiled(target):
+    """
+    Loads templates from a directory written by `compile_templates`, falling back to the template sources for any
+    template that isn't found.
+
+    Parameters
+    ----------
+    target : None | string
+        The directory of precompiled templates, None to only use the template sources.
+    """
+    global _precompiled
+    _precompiled = target
+    _environments.clear()
+
+
+def write_verilog(filename, verilog, template, context, chunk_size=1 << 16):
+    """
+    Writes the verilog of a generator. If the generator didn't keep its verilog in memory, the template is rendered
+    with `template.generate` and written in chunks of about `chunk_size` characters, so the memory used doesn't depend
+    on the size of the module.
+
+    Parameters
+    ----------
+    filename : None | string | file object
+        The file to write to. None prints to the standard output.
+    verilog : None | string
+        The rendered verilog, None to render it from the template.
+    template : jinja2.Template
+        The template of the generator.
+    context : dictionary
+        The variables the template is rendered with.
+    chunk_size : int
+        The number of characters buffered before each write.
+    """
+    if filename is None:
+        if verilog is not None:
+            print(verilog)
+        else:
+            _write_chunks(sys.stdout, template, context, chunk_size)
+            sys.stdout.write('\n')
+    elif not isinstance(filename, str):
+        _write_chunks(filename, template, context, chunk_size, verilog)
+    else:
+        with open(filename, 'w') as text_file:
+            _write_chunks(text_file, template, context, chunk_size, verilog)
+
+
+def _write_chunks(fp, template, context, chunk_size, verilog=None):
+
+    if verilog is not None:
+        fp.write(verilog)
+        return
+
+    chunk, size = [], 0
+    for text in template.generate(context):
+        chunk.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            fp.write(''.join(chunk))
+            chunk, size = [], 0
+    fp.write(''.join(chunk))
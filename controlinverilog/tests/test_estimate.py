@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+import controlinverilog as civ
+from controlinverilog.lti_verilog import LtiVerilog
+from controlinverilog.lti_verilog_folded import LtiVerilogFolded
+from controlinverilog.state_space import StateSpace
+from controlinverilog.tests.test_lti_verilog import verilog_params
+
+
+class TestEstimate(unittest.TestCase):
+
+    def test_tables(self):
+        dds = civ.DDS('dds', 100e6, n_amplitude=16, n_sine=8, n_fine=6, n_fine_word=8, keep_verilog=False)
+        estimate = dds.estimate()
+        self.assertEqual(estimate.rom_bits, 256 * 16 + 64 * 8)
+        self.assertEqual(estimate.multipliers, [(8, 16), (8, 16)])
+        self.assertEqual(estimate.latency, 4)
+
+        func = civ.NonlinearFunction('func', np.sin, 10, 8, 12, keep_verilog=False)
+        full = func.estimate()
+        folded = civ.NonlinearFunction('func', np.sin, 10, 8, 12, symmetry='odd', keep_verilog=False).estimate()
+        self.assertEqual(full.rom_bits, 1024 * func.ow)
+        self.assertEqual(folded.rom_bits, 512 * func.ow)
+        self.assertEqual(folded.latency, full.latency + 1)
+
+        delay = civ.TimeDelay('delay', 16, 10, keep_verilog=False).estimate()
+        self.assertEqual(delay.ram_bits, 16 * 1024)
+        self.assertEqual(delay.as_dict()['max_sample_rate'], 1.0)
+
+    def test_lti(self):
+        rng = np.random.default_rng(0)
+        mats = [rng.integers(-2 ** 12, 2 ** 12, shape) for shape in ((3, 3), (3, 1), (1, 3), (1, 1))]
+        mats[0][0, 0] = 0
+        mats[1][1, 0] = 256
+        sys = StateSpace(mats, dt=1.0)
+
+        lti = LtiVerilog(sys, verilog_params(keep_verilog=False))
+        estimate = lti.estimate()
+        self.assertEqual(estimate.multipliers, [(16, 18)] * 14)
+        self.assertEqual(estimate.latency, lti.latency)
+        self.assertEqual(estimate.max_sample_rate, 1.0 / (lti.latency + 1))
+        # The equations of four terms take three adders, the first state equation has three terms and takes two.
+        self.assertEqual(estimate.n_adders, 11)
+
+        folded = LtiVerilogFolded(sys, verilog_params(n_dsp=2, keep_verilog=False)).estimate()
+        self.assertEqual(folded.n_multipliers, 2)
+        self.assertEqual(folded.rom_bits, 2 * 8 * (16 + 2))
+        self.assertEqual(folded.cycles_per_sample, 8 + 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
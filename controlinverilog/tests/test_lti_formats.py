@@ -0,0 +1,120 @@
+import itertools
+import unittest
+import numpy as np
+import scipy.signal as signal
+from controlinverilog import mechatronics
+from controlinverilog.lti_system import LtiSystem
+from controlinverilog.lti_formats_coefficients import LtiFormatsCoefficients
+from controlinverilog.state_space import StateSpace
+from controlinverilog.lti_formats_signals import LtiFormatsSignals
+from controlinverilog.tests.test_mechatronics import get_system2
+
+
+class TestLtiFormats(unittest.TestCase):
+
+    def test_signal_frac_length(self):
+        sysd = get_system2().cont2shift(1 / 122.88e6)
+        ab, bb, cb, db = mechatronics.balanced_realization_discrete(*sysd.cofs)
+        sysb = StateSpace((ab, bb, cb, db), dt=sysd.dt)
+        sysm = LtiSystem.sys_to_delta(sysb)
+        sys_norm = mechatronics.norm_hinf_discrete(*sysm.delta2shift().cofs)
+
+        for sys, cf, threshold in itertools.product((sysb, sysm), (12, 16), (60, 100, 140)):
+            fmt = LtiFormatsSignals.__new__(LtiFormatsSignals)
+            fmt._sig_threshold = threshold
+            gains = fmt.noise_gains(sys, cf)
+            sf = fmt._min_frac_length(gains, sys_norm)
+            expected = next(s for s in itertools.count(0) if fmt._dynamic_range(sys, s, cf, sys_norm) > threshold)
+            self.assertEqual(sf, expected)
+
+    def test_state_noise_gains(self):
+        sysd = get_system2().cont2shift(1 / 122.88e6)
+        sysb = StateSpace(mechatronics.balanced_realization_discrete(*sysd.cofs), dt=sysd.dt)
+        sysm = LtiSystem.sys_to_delta(sysb)
+
+        # The per state gains and the output roundoff add up to the gains of the uniform noise model.
+        gains = LtiFormatsSignals.state_noise_gains(sysb)
+        self.assertTrue(np.allclose(np.sum(gains, axis=1) + 1, LtiFormatsSignals._noise_gains_shift(sysb)))
+        gains = LtiFormatsSignals.state_noise_gains(sysm)
+        self.assertTrue(np.allclose(np.sum(gains, axis=1) + 1, LtiFormatsSignals._noise_gains_delta(sysm)[0]))
+
+        # With more outputs than states the Gramians are solved per state, the gains are the same.
+        a, b, c, d = sysb.cofs
+        mat_c = np.vstack((c, np.random.default_rng(0).standard_normal((sysb.n_order, sysb.n_order))))
+        sysw = StateSpace((a, b, mat_c, np.zeros((mat_c.shape[0], 1))), dt=sysb.dt)
+        gains = LtiFormatsSignals.state_noise_gains(sysw)
+        for o in range(sysw.n_output):
+            sys_o = StateSpace((a, b, mat_c[[o], :], d), dt=sysb.dt)
+            self.assertTrue(np.allclose(gains[o], LtiFormatsSignals.state_noise_gains(sys_o)[0]))
+
+    def test_coefficient_frac_length_search(self):
+        for cf_min, boundary in ((1, 1), (1, 2), (1, 24), (-3, 7), (5, 40)):
+            evaluated = []
+
+            def accept(cf):
+                evaluated.append(cf)
+                return cf >= boundary
+
+            cf = LtiFormatsCoefficients._search_frac_length(accept, cf_min)
+            self.assertEqual(cf, boundary)
+            self.assertTrue(len(evaluated) <= 2 * np.log2(boundary - cf_min + 1) + 4)
+
+        # An isolated accepted format just below the bisected boundary is found by the verification step.
+        cf = LtiFormatsCoefficients._search_frac_length(lambda x: x >= 24 or x == 22, 1)
+        self.assertEqual(cf, 22)
+
+        # The steps that can't be decided are bisected back.
+        cf = LtiFormatsCoefficients._search_frac_length(lambda x: None if x >= 32 else x >= 17, 1)
+        self.assertEqual(cf, 17)
+        self.assertIsNone(LtiFormatsCoefficients._search_frac_length(lambda x: None if x >= 5 else False, 1))
+
+    def test_coefficient_frac_length_metric(self):
+        # The H2 norm of the error system is lost to roundoff from a fractional length of about 30.
+        a = np.array([[0.0, 165558.8856577929], [-165558.8856577929, -196352.2147510052]])
+        b = np.array([[-0.2569458347020473, -0.3102867448877188], [-412.11300850544256, 307.41352792918843]])
+        c = np.array([[-0.05970141849331839, 0.3923985674788292], [-0.10340713438106983, 0.4872622954260445]])
+        sysb = StateSpace((a, b, c, np.zeros((2, 2)))).cont2shift(1e-6).balanced_realization()
+
+        for method in ('h2', 'hinf'):
+            fmt = LtiFormatsCoefficients(sysb, {'cof_scaling_method': method, 'cof_threshold': 1e-3})
+            metric = LtiFormatsCoefficients.cof_metric(method)
+            expected = next(cf for cf in itertools.count(1) if metric(sysb, sysb.quantized_system(cf)) < 1e-3)
+            self.assertEqual(fmt.cof_frac_length, expected)
+
+        # A quantized system that isn't stable is rejected rather than raised.
+        sysb = get_system2().cont2shift(1 / 122.88e6).balanced_realization()
+        a, b, c, d = sysb.cofs
+        sys_q = StateSpace((2 * a, b, c, d), dt=sysb.dt)
+        self.assertEqual(LtiFormatsCoefficients.metric_impulse(sysb, sys_q), np.inf)
+
+    def test_step_scaling_methods(self):
+        # The step response of the filter overshoots, and must not overflow the output.
+        zeros, poles, gain = signal.butter(4, 2 * np.pi * 0.01, analog=True, output='zpk')
+        sysa = signal.zpk2ss(zeros, poles, gain)
+        sig_in = np.where(np.arange(3000) >= 100, 2 ** 14 - 1, 0)
+        _, y, _ = signal.dlsim(signal.cont2discrete(sysa, 1.0, method='bilinear'), sig_in * 2.0 ** -14)
+
+        for method, operator in itertools.product(('overshoot', 'safe'), ('delta', 'shift')):
+            lti = LtiSystem('lti', 1.0, sysa, operator=operator, sig_scaling_method=method, verbose=False)
+            sig_out = lti.simulate(sig_in)[:, 0] * 2.0 ** -lti.lti_verilog.context['sf']
+            self.assertTrue(np.amax(np.abs(sig_out - y[:, 0])) < 1e-2 * np.amax(np.abs(y)))
+
+    def test_format_ranges(self):
+        # A feedthrough larger than the other coefficients, and a state norm far below the input range.
+        w = 2 * np.pi * 10e3
+        for c, d in ((1.0, 6.0), (1e-3, 0.0), (1.0, 0.0)):
+            sys = (np.array([[-w]]), np.array([[w]]), np.array([[c]]), np.array([[d]]))
+            ctx = LtiSystem('lti', 1e6, sys, verbose=False).lti_verilog.context
+            cw, cf, sw, sf = ctx['cw'], ctx['cf'], ctx['sw'], ctx['sf']
+
+            # Every coefficient, D included, fits in the coefficient word.
+            for p in itertools.chain(*(ctx[x + '_params'] for x in 'ABCD')):
+                self.assertTrue(-2 ** (cw - 1) <= p['value'] < 2 ** (cw - 1))
+            # The inputs are buffered in the state format.
+            self.assertTrue(sw - sf >= ctx['iw'] - ctx['if_'])
+            # The outputs are sliced from the accumulator registers of the state times the coefficient format.
+            self.assertTrue(sw + cw - 1 - sf - cf >= ctx['ow'] - sf)
+
+
+if __name__ == '__main__':
+    unittest.main()
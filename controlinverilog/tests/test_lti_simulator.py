@@ -0,0 +1,117 @@
+import unittest
+import numpy as np
+import scipy.signal as signal
+import controlinverilog as civ
+from controlinverilog.tests.test_mechatronics import get_system2
+
+
+def simulate_reference(lti, sig_in):
+    """
+    A direct transcription of templates/lti_system.v on python integers, one register at a time.
+    """
+    ctx = lti.lti_verilog.context
+    iw, ow, sw, cw, cf, if_, sf, dp = (ctx[k] for k in ('iw', 'ow', 'sw', 'cw', 'cf', 'if_', 'sf', 'del'))
+    rw = sw + cw - 1
+    sim = lti.lti_simulator
+    a, b, c, d = (m.tolist() for m in (sim.mat_a, sim.mat_b, sim.mat_c, sim.mat_d))
+
+    def signed(v, w):
+        v &= (1 << w) - 1
+        return v - (1 << w) if v >> (w - 1) else v
+
+    x_long = [0] * len(a)
+    sig_out = []
+    for s in sig_in:
+        u = [signed(signed(int(v), iw) << (sf - if_), sw) for v in s]
+        x = [signed(v >> cf, sw) for v in x_long]
+        dx = [signed(sum(signed(ai * xi, rw) for ai, xi in zip(a[r], x))
+                     + sum(signed(bi * ui, rw) for bi, ui in zip(b[r], u)), rw) for r in range(len(a))]
+        y = [signed(sum(signed(ci * xi, rw) for ci, xi in zip(c[r], x))
+                    + sum(signed(di * ui, rw) for di, ui in zip(d[r], u)), rw) for r in range(len(c))]
+        sig_out.append([signed(v >> cf, ow) for v in y])
+        if dp is None:
+            x_long = dx
+        else:
+            x_long = [signed(xl + (v >> dp), rw) for xl, v in zip(x_long, dx)]
+    return np.array(sig_out)
+
+
+class TestLtiSimulator(unittest.TestCase):
+
+    def test_bit_accurate(self):
+        sysa = get_system2()
+        rng = np.random.default_rng(0)
+        for operator in ('delta', 'shift'):
+            lti = civ.LtiSystem('example', 122.88e6, sysa.cofs, operator=operator, verbose=False)
+            sig_in = rng.integers(-2 ** 15, 2 ** 15, (300, 1))
+            sig_in[:100] = -2 ** 15
+            self.assertTrue(np.array_equal(lti.simulate(sig_in), simulate_reference(lti, sig_in)))
+
+    def test_wide_registers(self):
+        # The registers of this design are wider than 64 bits, so they are simulated with python integers.
+        lti = civ.LtiSystem('example', 122.88e6, get_system2().cofs, operator='shift', cof_threshold=1e-5,
+                            sig_threshold=200, verbose=False)
+        self.assertTrue(lti.lti_simulator.rw > 64)
+        rng = np.random.default_rng(0)
+        sig_in = rng.integers(-2 ** 15, 2 ** 15, (300, 1))
+        sig_in[:100] = -2 ** 15
+        self.assertTrue(np.array_equal(lti.simulate(sig_in), simulate_reference(lti, sig_in)))
+
+    def test_floating_point(self):
+        sysa = get_system2()
+        fs = 122.88e6
+        lti = civ.LtiSystem('example', fs, sysa.cofs, operator='delta', verbose=False)
+        n = np.arange(20000)
+        sig_in = np.round(0.5 * np.sin(2 * np.pi * 1e4 / fs * n) * 2 ** 14).astype(int)
+        sig_out = lti.simulate(sig_in)[:, 0] * 2.0 ** -lti.lti_verilog.context['sf']
+
+        sysd = sysa.cont2shift(1 / fs)
+        _, y, _ = signal.dlsim(sysd.cofs + (1 / fs,), sig_in * 2.0 ** -14)
+        self.assertTrue(np.amax(np.abs(sig_out - y[:, 0])) < 1e-3 * np.amax(np.abs(y)))
+
+    def test_nonuniform_word_lengths(self):
+        zeros, poles, gain = signal.butter(6, 2 * np.pi * 0.01, analog=True, output='zpk')
+        sysa = signal.zpk2ss(zeros, poles, gain)
+        n = np.arange(5000)
+        sig_in = np.round(0.5 * np.sin(2 * np.pi * 0.005 * n) * 2 ** 14).astype(int)
+        _, y, _ = signal.dlsim(signal.cont2discrete(sysa, 1.0, method='bilinear'), sig_in * 2.0 ** -14)
+
+        for operator in ('delta', 'shift'):
+            uniform = civ.LtiSystem('example', 1.0, sysa, operator=operator, verbose=False)
+            lti = civ.LtiSystem('example', 1.0, sysa, operator=operator, verbose=False, word_lengths='nonuniform')
+            estimate, uniform_estimate = lti.estimate().as_dict(), uniform.estimate().as_dict()
+            self.assertTrue(estimate['multiplier_bits'] < uniform_estimate['multiplier_bits'])
+
+            # No coefficient, state or register is wider than with the uniform formats.
+            ctx, uniform_ctx = lti.lti_verilog.context, uniform.lti_verilog.context
+            widths = [p['width'] for key in ('A_params', 'B_params', 'C_params', 'D_params') for p in ctx[key]]
+            self.assertTrue(max(w for w in widths if w != 'CW') <= uniform_ctx['cw'])
+            self.assertEqual((ctx['cw'], ctx['sw']), (uniform_ctx['cw'], uniform_ctx['sw']))
+            self.assertTrue(max(lti.lti_verilog.state_word_lengths) <= uniform_ctx['sw'])
+            self.assertTrue(estimate['register_bits'] <= uniform_estimate['register_bits'])
+
+            sig_out = lti.simulate(sig_in)[:, 0] * 2.0 ** -lti.lti_verilog.context['sf']
+            self.assertTrue(np.amax(np.abs(sig_out - y[:, 0])) < 1e-2 * np.amax(np.abs(y)))
+
+        with self.assertRaises(ValueError):
+            civ.LtiSystem('example', 1.0, sysa, verbose=False, word_lengths='nonuniform', n_dsp=4)
+
+    def test_batch_chunks(self):
+        lti = civ.LtiSystem('example', 122.88e6, get_system2().cofs, operator='delta', verbose=False)
+        sim = lti.lti_simulator
+        rng = np.random.default_rng(1)
+        sig_in = rng.integers(-2 ** 15, 2 ** 15, (5, 3000))
+
+        sig_out, state = sim.simulate_batch(sig_in)
+        self.assertEqual(sig_out.shape, (5, 3000, 1))
+        self.assertEqual(state.shape, (5, sim.n_order))
+        for k in range(5):
+            self.assertTrue(np.array_equal(sig_out[k], sim.simulate(sig_in[k])))
+
+        chunks = np.array_split(sig_in, 7, axis=1)
+        sig_out_chunks = np.concatenate(list(sim.simulate_chunks(chunks)), axis=1)
+        self.assertTrue(np.array_equal(sig_out, sig_out_chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()
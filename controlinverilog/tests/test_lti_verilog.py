@@ -0,0 +1,125 @@
+import unittest
+import numpy as np
+from controlinverilog import csd
+from controlinverilog import timing
+from controlinverilog.lti_verilog import LtiVerilog
+from controlinverilog.lti_verilog_folded import LtiVerilogFolded
+from controlinverilog.state_space import StateSpace
+
+
+def verilog_params(**kwargs):
+    params = {'name': 'lti', 'n_add': 3, 'iw': 16, 'ow': 16, 'sw': 18, 'cw': 16, 'cf': 14, 'if': 14, 'sf': 15,
+              'del_par': None}
+    params.update(kwargs)
+    return params
+
+
+class TestLtiVerilog(unittest.TestCase):
+
+    def test_elision(self):
+        mat_a = np.array([[1000, 0], [-512, 3]])
+        mat_b = np.array([[0], [1]])
+        mat_c = np.array([[0, 0]])
+        mat_d = np.array([[2]])
+        lti = LtiVerilog(StateSpace((mat_a, mat_b, mat_c, mat_d), dt=1.0), verilog_params())
+
+        self.assertEqual(lti.n_multipliers, 2)
+        self.assertEqual(lti.n_shifts, 3)
+        self.assertNotIn('ax_1_2', lti.verilog)
+        self.assertNotIn('bu_1_1', lti.verilog)
+        self.assertIn('ax_2_1 <= -x_1 <<< 9;', lti.verilog)
+        self.assertIn('bu_2_1 <= u_1;', lti.verilog)
+        self.assertIn('dx_1 <= ax_1_1;', lti.verilog)
+        self.assertIn('dx_2 <= ax_2_1 + ax_2_2 + bu_2_1;', lti.verilog)
+        self.assertIn('y_long_1 <= du_1_1;', lti.verilog)
+
+    def test_csd(self):
+        rng = np.random.default_rng(0)
+        values = rng.integers(-2 ** 15, 2 ** 15, 200)
+        for v in values:
+            digits = csd.csd_digits(v)
+            self.assertEqual(sum(sign * 2 ** shift for shift, sign in digits), v)
+            shifts = sorted(shift for shift, _ in digits)
+            self.assertTrue(all(b - a > 1 for a, b in zip(shifts, shifts[1:])))
+
+        x = rng.uniform(-1000, 1000, 100)
+        np.testing.assert_array_equal(csd.round_digits(x, 20), np.around(x))
+        self.assertTrue(all(len(csd.csd_digits(v)) <= 2 for v in csd.round_digits(x, 2)))
+
+        mats = [rng.integers(-2 ** 12, 2 ** 12, shape) for shape in ((3, 3), (3, 1), (2, 3), (2, 1))]
+        lti = LtiVerilog(StateSpace(mats, dt=1.0), verilog_params(multiplier='csd'))
+        self.assertEqual(lti.n_multipliers, 0)
+        self.assertNotIn(' * x_', lti.verilog)
+        self.assertNotIn(' * u_', lti.verilog)
+
+        # Evaluate the shift-add networks on integers, the shifts bind like python shifts once parenthesized.
+        env = {'x_%d' % (ii + 1): int(v) for ii, v in enumerate(rng.integers(-2 ** 17, 2 ** 17, 3))}
+        env['u_1'] = int(rng.integers(-2 ** 17, 2 ** 17))
+        for name, expr in lti.context['shift_add_wires']:
+            env[name] = eval(expr.replace('<<<', '<<'), {}, dict(env))
+        for key, mat in zip(('A_prods', 'B_prods', 'C_prods', 'D_prods'), mats):
+            for product in lti.context[key]:
+                self.assertEqual(eval(product['expr'].replace('<<<', '<<'), {}, dict(env)),
+                                 product['value'] * env[product['b']])
+
+    def test_folded(self):
+        rng = np.random.default_rng(1)
+        mats = [rng.integers(-2 ** 12, 2 ** 12, shape) for shape in ((3, 3), (3, 2), (1, 3), (1, 2))]
+        mats[0][0, 1] = 0
+        mats[3][0, 0] = 0
+        sys = StateSpace(mats, dt=1.0)
+
+        for n_dsp, n_mult, n_cycle in ((1, 1, 18), (4, 4, 5), (5, 5, 4), (50, 18, 1)):
+            lti = LtiVerilogFolded(sys, verilog_params(n_dsp=n_dsp))
+            self.assertEqual(lti.n_multipliers, n_mult)
+            self.assertEqual(lti.n_cycle, n_cycle)
+            self.assertEqual(lti.max_sample_rate(100e6), 100e6 / (n_cycle + 5))
+
+            # Every nonzero product is scheduled once, on a cycle of a multiplier that accumulates into its equation.
+            sums = dict(lti.context['sums'])
+            scheduled = []
+            for m in lti.context['mults']:
+                self.assertEqual(len(m['rom_values']), n_cycle)
+                for (t, operand), (value, sel) in zip(m['entries'], m['rom_values']):
+                    equation = [name for name, expr in sums.items() if m['accs'][sel] in expr.split(' + ')]
+                    scheduled.append((equation[0], operand, value))
+            expected = []
+            equations = ((['dx_1', 'dx_2', 'dx_3'], mats[0], mats[1]), (['y_long_1'], mats[2], mats[3]))
+            for names, mat_x, mat_u in equations:
+                for r, name in enumerate(names):
+                    expected += [(name, 'x_%d' % (c + 1), v) for c, v in enumerate(mat_x[r]) if v != 0]
+                    expected += [(name, 'u_%d' % (c + 1), v) for c, v in enumerate(mat_u[r]) if v != 0]
+            self.assertEqual(sorted(scheduled), sorted(expected))
+
+        with self.assertRaises(ValueError):
+            LtiVerilogFolded(sys, verilog_params(n_dsp=0))
+
+    def test_timing(self):
+        self.assertEqual(timing.balanced_fan_ins(10, 3), [3, 2, 2])
+        self.assertEqual(timing.balanced_fan_ins(100, 5), [5, 5, 4])
+        self.assertEqual(timing.balanced_fan_ins(1, 3), [1])
+        self.assertEqual(timing.uniform_fan_ins(10, 3), [3, 3, 3])
+
+        model = timing.AdderDelayModel(t_carry=0.1e-9, t_reg=1e-9)
+        self.assertEqual(model.max_fan_in(10, 1 / 3.5e-9), 3)
+        self.assertEqual(model.max_fan_in(10, 1e9), 1)
+
+        rng = np.random.default_rng(2)
+        mats = [rng.integers(1, 2 ** 12, shape) * 3 for shape in ((7, 7), (7, 2), (1, 7), (1, 2))]
+        sys = StateSpace(mats, dt=1.0)
+        width = 18 + 16 - 1
+        for f_clk, fan_ins in ((1 / model.delay(width, 9), [9]), (1 / model.delay(width, 4), [3, 3]),
+                               (1 / model.delay(width, 2), [2, 2, 2, 2])):
+            lti = LtiVerilog(sys, verilog_params(f_clk=f_clk * (1 - 1e-9), delay_model=model))
+            self.assertEqual(lti.fan_ins, fan_ins)
+            self.assertEqual(lti.latency, len(fan_ins) + 2)
+            self.assertTrue(all(r['delay'] * f_clk <= 1 for r in lti.timing_report()))
+            for _, expr in lti.context['state_adders'] + lti.context['output_adders']:
+                self.assertLessEqual(len(expr.split(' + ')), max(fan_ins))
+
+        with self.assertRaises(ValueError):
+            LtiVerilog(sys, verilog_params(f_clk=1e10, delay_model=model))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -92,6 +92,86 @@ class TestLtiSystem(unittest.TestCase):
         self.assertTrue(np.all(np.isclose(Cd, C, rtol=1e-3)))
         self.assertTrue(np.all(np.isclose(Dd, D, rtol=1e-3)))
 
+    def test_freqresp(self):
+        sys1 = get_system1()
+        phis = np.linspace(0, np.pi, 17)
+        resp = mechatronics.freqresp_discrete(*sys1.cofs, phis)
+        expected = np.array([sys1.eval_transfer_function(np.exp(1j * phi)) for phi in phis])
+        self.assertEqual(resp.shape, (17, 1, 1))
+        self.assertTrue(np.all(np.isclose(resp, expected, rtol=1e-9)))
+
+        sysa = get_system2()
+        ws = np.logspace(2, 6, 17)
+        resp = mechatronics.freqresp_continuous(*sysa.cofs, ws)
+        expected = np.array([sysa.eval_transfer_function(1j * w) for w in ws])
+        self.assertTrue(np.all(np.isclose(resp, expected, rtol=1e-9)))
+
+    def test_hinf_context(self):
+        sysa = get_system2()
+        sysd = sysa.cont2shift(1 / 122.88e6)
+        ctx = mechatronics.HinfNormContext()
+        phis = np.concatenate(([0], np.logspace(-8, np.log10(np.pi), 20000)))
+        for cf in (18, 22, 26):
+            sys_diff = sysd - sysd.quantized_system(cf)
+            norm_ctx = ctx.norm(*sys_diff.cofs)
+            norm = mechatronics.norm_hinf_discrete(*sys_diff.cofs)
+            resp = mechatronics.freqresp_discrete(*sys_diff.cofs, phis)
+            norm_grid = np.amax(np.linalg.svd(resp, compute_uv=False))
+            self.assertTrue(abs(norm_ctx - norm) / norm < 1e-6)
+            self.assertTrue(norm_ctx >= norm_grid * (1 - 1e-6))
+        self.assertTrue(len(ctx.peak_frequencies) > 0)
+
+    def test_batched_norms(self):
+        sysd = get_system2().cont2shift(1 / 122.88e6)
+        a, b, c, d = sysd.cofs
+        cs = np.vstack((c, np.identity(sysd.n_order)))
+        ds = np.vstack((d, np.zeros((sysd.n_order, 1))))
+        norms_inf = mechatronics.norms_hinf_discrete(a, b, cs, ds)
+        norms_2 = mechatronics.norms_h2_discrete(a, b, cs)
+        for i in range(cs.shape[0]):
+            norm_inf = mechatronics.norm_hinf_discrete(a, b, cs[[i], :], ds[[i], :])
+            norm_2 = mechatronics.norm_h2_discrete(a, b, cs[[i], :])
+            self.assertTrue(abs(norms_inf[i] - norm_inf) / norm_inf < 1e-6)
+            self.assertTrue(abs(norms_2[i] - norm_2) / norm_2 < 1e-6)
+
+    def test_modal_realization(self):
+        # Two resonances and a real pole.
+        mat_a = np.zeros((5, 5))
+        mat_a[:2, :2] = [[0, 3e4], [-3e4, -6e3]]
+        mat_a[2:4, 2:4] = [[0, 8e4], [-8e4, -4e4]]
+        mat_a[4, 4] = -5e4
+        rng = np.random.default_rng(0)
+        mat_a = np.linalg.solve(np.identity(5) + rng.uniform(-0.3, 0.3, (5, 5)), mat_a) @ \
+            (np.identity(5) + rng.uniform(-0.3, 0.3, (5, 5)))
+        sysa = StateSpace((mat_a, rng.standard_normal((5, 2)), rng.standard_normal((1, 5)), np.zeros((1, 2))))
+        sysd = sysa.cont2shift(1 / 1e6)
+
+        am, bm, cm, dm = mechatronics.modal_realization_discrete(*sysd.cofs)
+        self.assertEqual(np.count_nonzero(am), 9)
+        self.assertTrue(np.all(am[np.abs(np.subtract.outer(np.arange(5), np.arange(5))) > 1] == 0))
+        phis = np.linspace(0, np.pi, 33)
+        resp = mechatronics.freqresp_discrete(am, bm, cm, dm, phis)
+        expected = mechatronics.freqresp_discrete(*sysd.cofs, phis)
+        self.assertTrue(np.allclose(resp, expected, rtol=1e-8, atol=1e-12))
+
+        # Each block is balanced, so its gramians are equal and diagonal.
+        wc = mechatronics.controllability_gramian_discrete(am, bm)
+        wo = mechatronics.observability_gramian_discrete(am, cm)
+        hsv = [wc[0, 0], wc[2, 2], wc[4, 4]]
+        for block in (slice(0, 2), slice(2, 4), slice(4, 5)):
+            self.assertTrue(np.allclose(wc[block, block], wo[block, block], rtol=1e-6))
+        self.assertEqual(hsv, sorted(hsv, reverse=True))
+
+        lti = civ.LtiSystem('lti', 1e6, sysa.cofs, realization='modal', verbose=False)
+        self.assertEqual(len(lti.lti_verilog.context['A_prods']), 9)
+        self.assertIn('realization', lti.stage_times)
+
+        # The two resonances of system 2 are too close to be decoupled.
+        am, _, _, _ = mechatronics.modal_realization_discrete(*get_system2().cont2shift(1 / 2e5).cofs)
+        self.assertEqual(np.count_nonzero(am), 16)
+        with self.assertRaises(ValueError):
+            civ.LtiSystem('lti', 2e5, get_system2().cofs, realization='schur', verbose=False)
+
 
 def get_system1():
     A = np.array([[0.9688, 0.2048], [-0.2048, 0.9678]])
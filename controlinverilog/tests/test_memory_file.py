@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import controlinverilog as civ
+from controlinverilog import memory_file
+
+
+class TestMemoryFile(unittest.TestCase):
+
+    def test_format(self):
+        values = np.array([0, 1, -1, 127, -128])
+        self.assertEqual(memory_file.format_memory(values, 8), '00\n01\nff\n7f\n80\n')
+        self.assertEqual(memory_file.format_memory(values[:3], 3, 'bin'), '000\n001\n111\n')
+        self.assertEqual(memory_file.format_memory([-1], 64), 'f' * 16 + '\n')
+        with self.assertRaises(ValueError):
+            memory_file.format_memory(values, 8, 'oct')
+
+    def test_readmem(self):
+        inline = civ.NonlinearFunction('func', np.tanh, 8, 6, 12)
+        hexa = civ.NonlinearFunction('func', np.tanh, 8, 6, 12, rom_format='hex')
+        self.assertNotIn('$readmemh', inline.verilog)
+        self.assertIn('$readmemh("func.mem", func_lut);', hexa.verilog)
+        with tempfile.TemporaryDirectory() as directory:
+            hexa.print_verilog(os.path.join(directory, 'func.v'))
+            with open(os.path.join(directory, 'func.mem')) as fp:
+                words = [int(line, 16) for line in fp.read().split()]
+        words = np.array(words)
+        words[words >= 2 ** (hexa.ow - 1)] -= 2 ** hexa.ow
+        np.testing.assert_array_equal(words, hexa.ram)
+        with self.assertRaises(ValueError):
+            civ.NonlinearFunction('func', np.tanh, 8, 6, 12, rom_format='mif')
+
+
+if __name__ == '__main__':
+    unittest.main()
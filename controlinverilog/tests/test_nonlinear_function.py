@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+import controlinverilog as civ
+
+
+class TestNonlinearFunction(unittest.TestCase):
+
+    def test_symmetry(self):
+        cases = ((np.tanh, 'odd', 128), (np.square, 'even', 128), (np.exp, None, 256),
+                 (lambda x: np.sin(np.pi * x), 'sine', 64), (lambda x: np.cos(np.pi * x), 'cosine', 64))
+        for func, symmetry, n_ram in cases:
+            nonlinear = civ.NonlinearFunction('func', func, 8, 7, 10, symmetry='auto')
+            self.assertEqual(nonlinear.symmetry, symmetry)
+            self.assertEqual(nonlinear.n_ram, n_ram)
+            if symmetry is not None:
+                addr, flip, _ = nonlinear._fold(symmetry)
+                folded = np.where(flip, -nonlinear.ram[addr], nonlinear.ram[addr])
+                for code, val in nonlinear.specials:
+                    folded[code] = val
+                np.testing.assert_array_equal(folded, nonlinear.table)
+
+        with self.assertRaises(ValueError):
+            civ.NonlinearFunction('func', np.exp, 8, 7, 10, symmetry='odd')
+        with self.assertRaises(ValueError):
+            civ.NonlinearFunction('func', np.exp, 8, 7, 10, symmetry='half')
+
+    def test_interpolate(self):
+        nonlinear = civ.NonlinearFunction('func', np.tanh, 12, 10, 12, interpolate=True, max_error=2 ** -12)
+        interpolator = nonlinear.interpolator
+        out = interpolator.evaluate(np.arange(2 ** 12))
+        self.assertLessEqual(np.amax(np.abs(2.0 ** -12 * out - nonlinear._y)), 2 ** -12)
+        self.assertLess(interpolator.n_rom_bits, nonlinear.n_ram * nonlinear.ow / 10)
+        self.assertIn('base_lut[%d] = ' % (interpolator.n_segments - 1), nonlinear.verilog)
+
+        values = 0.9 * np.sin(np.linspace(0, np.pi, 1000))
+        lut = civ.LookUpTable('lut', values, 12, interpolate=True)
+        out = lut.interpolator.evaluate(np.arange(1000))
+        self.assertLessEqual(np.amax(np.abs(2.0 ** -12 * out - values)), 2 ** -12)
+
+        with self.assertRaises(ValueError):
+            civ.NonlinearFunction('func', np.tanh, 12, 10, 12, symmetry='odd', interpolate=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
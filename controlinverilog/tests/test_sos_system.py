@@ -0,0 +1,58 @@
+import contextlib
+import io
+import unittest
+import numpy as np
+import scipy.signal as signal
+import controlinverilog as civ
+
+
+def get_butterworth(n, wc):
+    return signal.StateSpace(*signal.zpk2ss(*signal.butter(n, wc, analog=True, output='zpk')))
+
+
+class TestSosSystem(unittest.TestCase):
+
+    def test_sections(self):
+        fs = 1.0
+        sysa = get_butterworth(8, 2 * np.pi * 0.01)
+        sos = civ.SosSystem('filt', fs, sysa, verbose=False)
+        self.assertEqual(len(sos.sections), 4)
+        # The zeros at infinity map to -1 exactly.
+        for section in sos.sos[1:]:
+            self.assertTrue(np.allclose(section[:3], [1, 2, 1]))
+        # Each two state section takes at most 9 products, the dense realization takes 81.
+        self.assertLessEqual(sos.estimate().n_multipliers, 4 * 9)
+        self.assertEqual(sos.estimate().latency, sum(s['lti_verilog'].latency for s in sos.sections))
+
+        n = np.arange(4000)
+        sig_in = np.round(0.5 * np.sin(2 * np.pi * 0.002 * n) * 2 ** 14).astype(int)
+        sig_out = sos.simulate(sig_in)[:, 0] * 2.0 ** -sos.output_frac_length
+        _, y, _ = signal.dlsim(signal.cont2discrete((sysa.A, sysa.B, sysa.C, sysa.D), 1 / fs, method='bilinear'),
+                               sig_in * 2.0 ** -14)
+        self.assertTrue(np.amax(np.abs(sig_out - y[:, 0])) < 1e-2 * np.amax(np.abs(y)))
+
+    def test_odd_order(self):
+        sos = civ.SosSystem('filt', 1.0, get_butterworth(5, 2 * np.pi * 0.01), operator='shift', verbose=False)
+        self.assertEqual([s['lti_verilog'].order for s in sos.sections], [1, 2, 2])
+        self.assertIn('module filt_section_3', sos.verilog)
+
+    def test_print_verilog(self):
+        sysa = get_butterworth(4, 2 * np.pi * 0.01)
+        kept = civ.SosSystem('filt', 1.0, sysa, verbose=False)
+        streamed = civ.SosSystem('filt', 1.0, sysa, verbose=False, keep_verilog=False)
+
+        # The modules streamed to the standard output are separated as in the kept verilog.
+        for sos in (kept, streamed):
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                sos.print_verilog()
+            self.assertEqual(out.getvalue(), kept.verilog + '\n')
+
+    def test_invalid(self):
+        sysa = get_butterworth(2, 1.0)
+        mimo = (sysa.A, np.hstack((sysa.B, sysa.B)), sysa.C, np.zeros((1, 2)))
+        self.assertRaises(ValueError, civ.SosSystem, 'filt', 100.0, mimo, verbose=False)
+        self.assertRaises(ValueError, civ.SosSystem, 'filt', 100.0, sysa, scaling='safe', verbose=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
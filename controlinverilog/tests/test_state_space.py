@@ -0,0 +1,61 @@
+import pickle
+import unittest
+import numpy as np
+from controlinverilog import mechatronics
+from controlinverilog.lti_formats_signals import LtiFormatsSignals
+from controlinverilog.lti_system import LtiSystem
+from controlinverilog.tests.test_mechatronics import get_system1, get_system2
+
+
+class TestStateSpace(unittest.TestCase):
+
+    def test_immutable(self):
+        sys = get_system1()
+        with self.assertRaises(AttributeError):
+            sys.dt = 1.0
+        with self.assertRaises(AttributeError):
+            sys.extra = 1.0
+        with self.assertRaises(ValueError):
+            sys.cofs[0][0, 0] = 1.0
+        with self.assertRaises(ValueError):
+            sys.poles()[0] = 1.0
+
+        a = np.array(sys.cofs[0])
+        a[0, 0] = 0.0
+        self.assertEqual(get_system1().cofs[0][0, 0], sys.cofs[0][0, 0])
+
+    def test_cached(self):
+        sysd = get_system2().cont2shift(1 / 122.88e6)
+        self.assertIs(sysd.poles(), sysd.poles())
+        self.assertTrue(np.allclose(np.sort_complex(sysd.poles()), np.sort_complex(np.linalg.eigvals(sysd.cofs[0]))))
+
+        t, z = sysd.schur()
+        self.assertTrue(np.allclose(z @ t @ z.conj().T, sysd.cofs[0]))
+
+        wc = mechatronics.controllability_gramian_discrete(*sysd.cofs[:2])
+        self.assertTrue(np.allclose(sysd.controllability_gramian(), wc))
+        self.assertIs(sysd.observability_gramian(), sysd.observability_gramian())
+
+    def test_with_io(self):
+        sysb = get_system2().cont2shift(1 / 122.88e6).balanced_realization()
+        sysm = LtiSystem.sys_to_delta(sysb)
+        t, _ = sysm.delta2shift().schur()
+
+        # The systems to the states share the Schur form of their shift operator equivalent.
+        sys_states = sysm.with_io(sysm.cofs[1], np.identity(sysm.n_order), np.zeros((sysm.n_order, 1)))
+        self.assertIs(sys_states.delta2shift().schur()[0], t)
+        self.assertTrue(np.array_equal(sys_states.delta2shift().cofs[1], sysm.delta2shift().cofs[1]))
+        self.assertTrue(np.allclose(LtiFormatsSignals.state_norms(sysm, LtiFormatsSignals._discrete_hinf_gains),
+                                    mechatronics.norms_hinf_discrete(*sys_states.delta2shift().cofs)))
+
+    def test_pickle(self):
+        sys = get_system1()
+        sys.poles()
+        sys_copy = pickle.loads(pickle.dumps(sys))
+        self.assertEqual(sys_copy.dt, sys.dt)
+        self.assertTrue(np.array_equal(sys_copy.cofs[0], sys.cofs[0]))
+        self.assertFalse(sys_copy.cofs[0].flags.writeable)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+import controlinverilog as civ
+from controlinverilog.sweep import grid_params
+from controlinverilog.tests.test_mechatronics import get_system2
+
+
+class TestSweep(unittest.TestCase):
+
+    def test_design_sweep(self):
+        sysa = get_system2()
+        grid = {'operator': ['delta', 'shift'], 'multiplier': ['dsp', 'csd'], 'n_dsp': [None, 4]}
+        self.assertEqual(len(grid_params(grid)), 8)
+        self.assertEqual(grid_params(grid)[1], {'operator': 'delta', 'multiplier': 'dsp', 'n_dsp': 4})
+
+        with tempfile.TemporaryDirectory() as verilog_dir:
+            serial = list(civ.design_sweep(sysa.cofs, grid, workers=1, fs=122.88e6, verilog_dir=verilog_dir))
+            self.assertTrue(all(r['error'] is not None or os.path.isfile(r['filename']) for r in serial))
+        pool = sorted(civ.design_sweep(sysa.cofs, grid, workers=2, fs=122.88e6), key=lambda r: r['index'])
+
+        self.assertEqual([r['index'] for r in serial], list(range(8)))
+        for r1, r2 in zip(serial, pool):
+            self.assertEqual(r1['params'], dict(grid_params(grid)[r1['index']], fs=122.88e6))
+            self.assertEqual(r1['error'], r2['error'])
+            if r1['error'] is None:
+                self.assertEqual(r1['formats'], r2['formats'])
+                self.assertEqual(r1['estimate'], r2['estimate'])
+        # A design that can't be built, the folded datapath with csd multipliers, is reported, not raised.
+        self.assertEqual([r['error'] is None for r in serial], [True, True, True, False] * 2)
+        self.assertTrue(serial[3]['error'].startswith('ValueError'))
+
+    def test_errors_and_close(self):
+        sysa = get_system2()
+
+        # A parameter LtiSystem doesn't take is raised before any design is built.
+        self.assertRaises(ValueError, civ.design_sweep, sysa.cofs, {'n_add': [2], 'no_such_param': [1]}, fs=122.88e6)
+        self.assertRaises(ValueError, civ.design_sweep, sysa.cofs, {'n_add': [2]}, fs=122.88e6, verbose=True)
+
+        # Stopping early cancels the queued designs.
+        results = civ.design_sweep(sysa.cofs, {'n_add': [2, 3, 4, 5, 6, 7, 8, 9]}, workers=2, fs=122.88e6)
+        self.assertIsNone(next(results)['error'])
+        results.close()
+
+    def test_missing_fs(self):
+        self.assertRaises(ValueError, civ.design_sweep, get_system2().cofs, {'n_add': [2, 3]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import io
+import tempfile
+import unittest
+from unittest import mock
+import jinja2
+import numpy as np
+import controlinverilog as civ
+from controlinverilog import templating
+
+
+class TestTemplating(unittest.TestCase):
+
+    def test_shared_environment(self):
+        self.assertIs(templating.get_template('delay.v'), templating.get_template('delay.v'))
+        self.assertIsNot(templating.get_template('delay.v'), templating.get_template('delay.v', trim_blocks=True))
+
+    def test_precompiled(self):
+        expected = civ.DDS('dds', 122.88e6).verilog
+        # Without the template sources, only the precompiled templates can be loaded.
+        no_sources = mock.patch.object(jinja2.PackageLoader, 'get_source', side_effect=jinja2.TemplateNotFound('dds'))
+        with tempfile.TemporaryDirectory() as target:
+            templating.compile_templates(target)
+            templating.load_precompiled(target)
+            try:
+                with no_sources:
+                    verilog = civ.DDS('dds', 122.88e6).verilog
+            finally:
+                templating.load_precompiled(None)
+        self.assertEqual(verilog, expected)
+
+        with no_sources:
+            self.assertRaises(jinja2.TemplateNotFound, civ.DDS, 'dds', 122.88e6)
+
+    def test_streaming(self):
+        kept = civ.NonlinearFunction('func', np.tanh, 10, 8, 12)
+        streamed = civ.NonlinearFunction('func', np.tanh, 10, 8, 12, keep_verilog=False)
+        self.assertIsNone(streamed.verilog)
+        for _ in range(2):
+            fp = io.StringIO()
+            templating.write_verilog(fp, None, streamed._template, streamed._context, chunk_size=100)
+            self.assertEqual(fp.getvalue(), kept.verilog)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+import controlinverilog as civ
+from controlinverilog.word_length_explorer import pareto_set
+from controlinverilog.tests.test_mechatronics import get_system2
+
+
+class TestWordLengthExplorer(unittest.TestCase):
+
+    def test_pareto_set(self):
+        points = [{'a': 1, 'b': 3}, {'a': 2, 'b': 2}, {'a': 2, 'b': 3}, {'a': 3, 'b': 1}, {'a': 3, 'b': 1}]
+        self.assertEqual(pareto_set(points, ['a', 'b']), [points[0], points[1], points[3], points[4]])
+
+    def test_explore(self):
+        fs = 122.88e6
+        sysa = get_system2()
+        explorer = civ.WordLengthExplorer(fs, sysa.cofs)
+        points = explorer.explore(range(6, 20), range(14, 30))
+        self.assertEqual(len(points), 14 * 16)
+
+        # The formats LtiSystem selects are a point of the explorer.
+        lti = civ.LtiSystem('lti', fs, sysa.cofs, verbose=False)
+        ctx = lti.lti_verilog.context
+        point = explorer.point(ctx['cf'], ctx['sf'])
+        self.assertEqual((point['cw'], point['sw'], point['ow']), (ctx['cw'], ctx['sw'], ctx['ow']))
+
+        pareto = explorer.pareto()
+        costs = [p['datapath_bits'] for p in pareto]
+        snrs = [p['snr'] for p in pareto]
+        self.assertTrue(np.all(np.diff(costs) > 0) and np.all(np.diff(snrs) > 0))
+
+        # Each point builds the design it describes.
+        lti = civ.LtiSystem('lti', fs, sysa.cofs, verbose=False, **pareto[len(pareto) // 2]['params'])
+        ctx = lti.lti_verilog.context
+        self.assertEqual((ctx['cw'], ctx['sw']), (pareto[len(pareto) // 2]['cw'], pareto[len(pareto) // 2]['sw']))
+        self.assertRaises(ValueError, explorer.point, 8, 10)
+
+    def test_datapath_bits(self):
+        fs = 122.88e6
+        sysa = get_system2()
+        explorer = civ.WordLengthExplorer(fs, sysa.cofs)
+        explorer.explore(range(6, 14), range(14, 22))
+
+        # The cost the Pareto set is ranked on is that of the multipliers of the design it builds.
+        for point in explorer.pareto()[:3]:
+            lti = civ.LtiSystem('lti', fs, sysa.cofs, verbose=False, **point['params'])
+            self.assertEqual(point['n_multipliers'], lti.lti_verilog.n_multipliers)
+            self.assertEqual(point['datapath_bits'], lti.estimate().as_dict()['multiplier_bits'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,19 +1,20 @@
-import jinja2
+from . import templating
+from .estimate import ResourceEstimate
 
 
 class TimeDelay(object):
 
-    def __init__(self, name, dw, aw):
+    def __init__(self, name, dw, aw, keep_verilog=True):
 
+        self.name = name
         self.aw = aw
         self.dw = dw
 
         context = {'name': name, 'dw': dw, 'aw': aw}
 
-        loader = jinja2.PackageLoader('controlinverilog', 'templates')
-        env = jinja2.Environment(loader=loader)
-        template = env.get_template('delay.v')
-        self.verilog = template.render(context)
+        self._template = templating.get_template('delay.v')
+        self._context = context
+        self.verilog = self._template.render(context) if keep_verilog is True else None
 
     def print_summary(self):
 
@@ -22,10 +23,19 @@ class TimeDelay(object):
         print('Max delay (s): %d/<fexe>' % (2 ** self.aw))
         print('Data word length: %d' % self.dw)
 
+    def estimate(self):
+        """
+        Returns
+        -------
+        estimate : controlinverilog.estimate.ResourceEstimate
+            The buffer, the pointers and the output register, which is one cycle behind the input.
+        """
+        return ResourceEstimate(self.name,
+                                register_bits=2 * self.aw + self.dw + 1,
+                                n_adders=2,
+                                ram_bits=self.dw * 2 ** self.aw,
+                                latency=1)
+
     def print_verilog(self, filename=None):
 
-        if filename is None:
-            print(self.verilog)
-        else:
-            with open(filename, 'w') as text_file:
-                text_file.write(self.verilog)
+        templating.write_verilog(filename, self.verilog, self._template, self._context)
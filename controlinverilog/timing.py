@@ -0,0 +1,73 @@
+import math
+
+
+class AdderDelayModel(object):
+
+    def __init__(self, t_carry=0.03e-9, t_reg=1.0e-9):
+        """
+        A local delay model of a registered addition. A sum of `fan_in` words is a chain of `fan_in - 1` ripple
+        carry adders, so the delay between two registers grows with the adder width times the fan-in.
+
+        Parameters
+        ----------
+        t_carry : float
+            The carry propagation delay of one bit, in seconds.
+        t_reg : float
+            The clock to output, setup and routing delay of a register to register path, in seconds.
+        """
+        self.t_carry = t_carry
+        self.t_reg = t_reg
+
+    def delay(self, width, fan_in):
+        """
+        Returns
+        -------
+        delay : float
+            The register to register delay of a sum of `fan_in` words of `width` bits, in seconds.
+        """
+        return self.t_reg + self.t_carry * width * max(fan_in - 1, 0)
+
+    def max_fan_in(self, width, f_clk):
+        """
+        Returns
+        -------
+        fan_in : int
+            The largest fan-in whose sum of `width` bit words meets the clock frequency `f_clk`, 1 if even two words
+            can't be added in one clock period.
+        """
+        slack = 1.0 / f_clk - self.t_reg
+        if slack < self.t_carry * width:
+            return 1
+        return 1 + int(math.floor(slack / (self.t_carry * width)))
+
+
+def uniform_fan_ins(n_terms, n_add):
+    """
+    Returns the fan-ins of the stages of an adder tree summing `n_terms` words with at most `n_add` words per stage.
+    """
+    n_stages = max(1, int(math.ceil(math.log(max(n_terms, 1), n_add))))
+    return [n_add] * n_stages
+
+
+def balanced_fan_ins(n_terms, max_fan_in):
+    """
+    Returns the fan-ins of the stages of an adder tree summing `n_terms` words. The tree has the fewest stages allowed
+    by `max_fan_in`, and the terms are spread evenly over the stages so that each fan-in is as small as possible.
+    """
+    if max_fan_in < 2 and n_terms > 1:
+        msg = 'A fan-in of at least 2 is required to sum %d terms.' % n_terms
+        raise ValueError(msg)
+
+    n_stages = 1
+    while max_fan_in ** n_stages < n_terms:
+        n_stages += 1
+
+    fan_ins = []
+    for jj in range(n_stages):
+        remaining = n_stages - jj
+        fan_in = 1
+        while fan_in ** remaining < n_terms:
+            fan_in += 1
+        fan_ins.append(fan_in)
+        n_terms = (n_terms - 1) // fan_in + 1
+    return fan_ins
@@ -0,0 +1,255 @@
+import numpy as np
+import scipy.signal as signal
+from .lti_formats_coefficients import LtiFormatsCoefficients
+from .lti_formats_signals import LtiFormatsSignals
+from .lti_system import LtiSystem
+from .lti_verilog import is_shift
+from .state_space import StateSpace
+
+
+def pareto_set(points, objectives):
+    """
+    Returns the points that no other point dominates, i.e. that no other point is at least as good as in every
+    objective and better in one.
+
+    Parameters
+    ----------
+    points : list of dictionary
+        The candidate points.
+    objectives : list of string
+        The keys of the objectives, which are minimized.
+
+    Returns
+    -------
+    pareto : list of dictionary
+        The nondominated points, in the order of the objectives.
+    """
+    values = np.array([[point[key] for key in objectives] for point in points], dtype=float)
+    pareto = []
+    for ii, value in enumerate(values):
+        dominated = np.all(values <= value, axis=1) & np.any(values < value, axis=1)
+        if not np.any(dominated):
+            pareto.append(ii)
+    pareto.sort(key=lambda ii: tuple(values[ii]))
+    return [points[ii] for ii in pareto]
+
+
+class WordLengthExplorer(object):
+
+    def __init__(
+        self,
+        fs,
+        sys,
+        input_word_length=16,
+        input_frac_length=14,
+        operator='delta',
+        sig_scaling_method='hinf',
+        cof_scaling_method='hinf',
+        realization='balanced'
+    ):
+        """
+        Maps the trade-off between the word lengths of an LTI system and its quantization error, instead of choosing
+        one design from `cof_threshold` and `sig_threshold` as LtiSystem does. Each design point is a coefficient and
+        a state fractional length. It is scored with the coefficient metric of LtiFormatsCoefficients, a relative
+        error of the transfer function, and the dynamic range of LtiFormatsSignals, the ratio of the largest signal
+        to the roundoff noise. Taking the square of the relative error as a noise power, both combine into an SNR.
+
+        The realization and the norms don't depend on the formats and are computed once. The quantized system, its
+        metric and the noise gains are memoized per coefficient fractional length, so a point only costs a closed form
+        evaluation of the dynamic range once its coefficient format has been seen.
+
+        Parameters
+        ----------
+        fs : float
+            The sampling frequency.
+        sys : tuple of ndarray
+            The state space representation of an analog system.
+        input_word_length : int
+            Input word length.
+        input_frac_length : int
+            Input fractional length.
+        operator : 'delta' | 'shift'
+            The operator employed in the state equations.
+        sig_scaling_method : 'hinf' | 'h2' | 'overshoot' | 'safe'
+            The method to calculate the word growth of the state and output signals.
+        cof_scaling_method : 'h2' | 'hinf' | 'impulse' | 'pole'
+            The metric of the error of the quantized coefficients.
+        realization : 'balanced' | 'modal'
+            The realization of the system, see LtiSystem.
+        """
+        if isinstance(sys, signal.StateSpace) is True:
+            sysa = StateSpace((sys.A, sys.B, sys.C, sys.D))
+        else:
+            sysa = StateSpace((sys[0], sys[1], sys[2], sys[3]))
+
+        realizations = {'balanced': StateSpace.balanced_realization,
+                        'modal': StateSpace.modal_realization}
+        if realization not in realizations:
+            msg = 'Valid realization values: %s.' % ' | '.join(realizations.keys())
+            raise ValueError(msg)
+        if operator not in ('delta', 'shift'):
+            msg = 'Valid operator values: delta | shift.'
+            raise ValueError(msg)
+        if cof_scaling_method == 'fixed':
+            msg = 'Valid cof_scaling_method values: hinf | h2 | pole | impulse.'
+            raise ValueError(msg)
+
+        sysd = sysa.cont2shift(1.0 / fs)
+        sysb = realizations[realization](sysd)
+        self.system = LtiSystem.sys_to_delta(sysb) if operator == 'delta' else sysb
+
+        self.params = {'input_word_length': input_word_length,
+                       'input_frac_length': input_frac_length,
+                       'operator': operator,
+                       'realization': realization}
+        self._iw = input_word_length
+        self._if = input_frac_length
+
+        self._metric = LtiFormatsCoefficients.cof_metric(cof_scaling_method)
+        self._int_w = LtiFormatsCoefficients.integer_length(self.system)
+
+        norm_func, norms_func = LtiFormatsSignals.select_signal_scaling_method(sig_scaling_method)
+        self._state_norm = np.amax(LtiFormatsSignals.state_norms(self.system, norms_func))
+        self._output_norm = np.amax(LtiFormatsSignals.output_norms(self.system, norms_func))
+        self._sys_norm = norm_func(self.system)
+
+        self._cof_points = {}
+        self._points = {}
+
+    @property
+    def min_cof_frac_length(self):
+        """
+        The smallest coefficient fractional length, that of a one bit fraction below the largest coefficient.
+        """
+        return max(1 - self._int_w, 1)
+
+    def _cof_point(self, cf):
+        """
+        Returns the quantities of a design point that only depend on the coefficient format. The products by plus or
+        minus a power of two are shifts in LtiVerilog, so they aren't multipliers.
+        """
+        if cf not in self._cof_points:
+            sys_q = self.system.quantized_system(cf)
+            values = np.concatenate([mat.ravel() for mat in self.system.fixed_point_system(cf).cofs])
+            self._cof_points[cf] = {'cof_error': self._metric(self.system, sys_q),
+                                    'n_multipliers': sum(1 for v in values if v != 0 and not is_shift(int(v))),
+                                    'noise_gains': LtiFormatsSignals.noise_gains(self.system, cf)}
+        return self._cof_points[cf]
+
+    def point(self, cf, sf):
+        """
+        Parameters
+        ----------
+        cf : int
+            The coefficient fractional length.
+        sf : int
+            The state and output fractional length, at least the input fractional length.
+
+        Returns
+        -------
+        point : dictionary
+            The formats `cw`, `cf`, `sw`, `sf` and `ow`, the relative coefficient error `cof_error`, the `dynamic_range`
+            of the signals in dB, the combined `snr` in dB and its negation `noise_floor`, the number of coefficients
+            that are neither zero nor a power of two `n_multipliers`, the operand bits of each multiplier
+            `multiplier_bits` = cw * sw and of the whole datapath `datapath_bits` = n_multipliers * cw * sw. `params` are
+            the LtiSystem parameters that build the design.
+        """
+        if cf < self.min_cof_frac_length:
+            msg = 'The coefficient fractional length must be at least %d.' % self.min_cof_frac_length
+            raise ValueError(msg)
+        if sf < self._if:
+            msg = 'The state fractional length must be at least the input fractional length %d.' % self._if
+            raise ValueError(msg)
+
+        if (cf, sf) not in self._points:
+            cof_point = self._cof_point(cf)
+            cw = 1 + self._int_w + cf
+            ns, no = LtiFormatsSignals.integer_growth(self._state_norm, self._output_norm, cw, cf)
+            sw = self._iw + ns + sf - self._if
+            ow = self._iw + no + sf - self._if
+            dynamic_range = LtiFormatsSignals.dynamic_range_from_gains(cof_point['noise_gains'], sf,
+                                                                        self._sys_norm)
+            snr = -10 * np.log10(cof_point['cof_error'] ** 2 + 10 ** (-dynamic_range / 10))
+
+            params = dict(self.params)
+            params.update({'cof_scaling_method': 'fixed',
+                           'cof_word_length': cw,
+                           'cof_frac_length': cf,
+                           'sig_scaling_method': 'fixed',
+                           'state_word_length': sw,
+                           'state_frac_length': sf,
+                           'output_word_length': ow,
+                           'output_frac_length': sf})
+            self._points[cf, sf] = {'cw': cw,
+                                    'cf': cf,
+                                    'sw': sw,
+                                    'sf': sf,
+                                    'ow': ow,
+                                    'cof_error': cof_point['cof_error'],
+                                    'dynamic_range': dynamic_range,
+                                    'snr': snr,
+                                    'noise_floor': -snr,
+                                    'n_multipliers': cof_point['n_multipliers'],
+                                    'multiplier_bits': cw * sw,
+                                    'datapath_bits': cof_point['n_multipliers'] * cw * sw,
+                                    'params': params}
+        return self._points[cf, sf]
+
+    def explore(self, cof_frac_lengths=None, state_frac_lengths=None):
+        """
+        Evaluates the design points of a grid of formats.
+
+        Parameters
+        ----------
+        cof_frac_lengths : None | iterable of int
+            The coefficient fractional lengths, None for the 24 smallest.
+        state_frac_lengths : None | iterable of int
+            The state fractional lengths, None for the 24 smallest.
+
+        Returns
+        -------
+        points : list of dictionary
+            The design points, see `point`.
+        """
+        if cof_frac_lengths is None:
+            cof_frac_lengths = range(self.min_cof_frac_length, self.min_cof_frac_length + 24)
+        if state_frac_lengths is None:
+            state_frac_lengths = range(self._if, self._if + 24)
+        return [self.point(cf, sf) for cf in cof_frac_lengths for sf in state_frac_lengths]
+
+    def pareto(self, points=None, cost='datapath_bits'):
+        """
+        Returns the Pareto set of the cost against the SNR. The points whose quantized system has a pole at 1, and so
+        an infinite coefficient error, are left out.
+
+        Parameters
+        ----------
+        points : None | list of dictionary
+            The candidate points, None for all the points evaluated so far.
+        cost : 'datapath_bits' | 'multiplier_bits'
+            The cost of a design point.
+
+        Returns
+        -------
+        pareto : list of dictionary
+            The nondominated design points by increasing cost.
+        """
+        if cost not in ('datapath_bits', 'multiplier_bits'):
+            msg = 'Valid cost values: datapath_bits | multiplier_bits.'
+            raise ValueError(msg)
+        if points is None:
+            points = list(self._points.values())
+        points = [point for point in points if np.isfinite(point['snr'])]
+        return pareto_set(points, [cost, 'noise_floor'])
+
+    def print_summary(self, points=None, cost='datapath_bits'):
+
+        print('--- Word Length Pareto Set ---')
+        print('%12s %12s %16s %16s %16s %10s' % ('coefficient', 'state', cost, 'coefficient err', 'dynamic range',
+                                                 'snr'))
+        for point in self.pareto(points, cost):
+            print('%12s %12s %16d %16.3g %13.1f dB %7.1f dB' % ('s(%d,%d)' % (point['cw'], point['cf']),
+                                                                's(%d,%d)' % (point['sw'], point['sf']),
+                                                                point[cost], point['cof_error'],
+                                                                point['dynamic_range'], point['snr']))
+        print()
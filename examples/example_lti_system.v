@@ -1,35 +1,35 @@
 module example_lti_system #
 (
-    parameter CW = 10,
-    parameter signed [CW-1:0] A_1_1 = -16, 
-    parameter signed [CW-1:0] A_1_2 = 59, 
-    parameter signed [CW-1:0] A_1_3 = 24, 
-    parameter signed [CW-1:0] A_1_4 = 9, 
-    parameter signed [CW-1:0] A_2_1 = -59, 
-    parameter signed [CW-1:0] A_2_2 = -72, 
-    parameter signed [CW-1:0] A_2_3 = -109, 
-    parameter signed [CW-1:0] A_2_4 = -32, 
-    parameter signed [CW-1:0] A_3_1 = 24, 
-    parameter signed [CW-1:0] A_3_2 = 109, 
-    parameter signed [CW-1:0] A_3_3 = -179, 
-    parameter signed [CW-1:0] A_3_4 = -136, 
-    parameter signed [CW-1:0] A_4_1 = -9, 
-    parameter signed [CW-1:0] A_4_2 = -32, 
-    parameter signed [CW-1:0] A_4_3 = 136, 
-    parameter signed [CW-1:0] A_4_4 = -350, 
-    parameter signed [CW-1:0] B_1_1 = 107, 
-    parameter signed [CW-1:0] B_2_1 = 132, 
-    parameter signed [CW-1:0] B_3_1 = -83, 
-    parameter signed [CW-1:0] B_4_1 = 30, 
-    parameter signed [CW-1:0] C_1_1 = 107, 
-    parameter signed [CW-1:0] C_1_2 = -132, 
-    parameter signed [CW-1:0] C_1_3 = -83, 
-    parameter signed [CW-1:0] C_1_4 = -30, 
+    parameter CW = 13,
+    parameter signed [CW-1:0] A_1_1 = -127, 
+    parameter signed [CW-1:0] A_1_2 = 474, 
+    parameter signed [CW-1:0] A_1_3 = 188, 
+    parameter signed [CW-1:0] A_1_4 = 71, 
+    parameter signed [CW-1:0] A_2_1 = -474, 
+    parameter signed [CW-1:0] A_2_2 = -579, 
+    parameter signed [CW-1:0] A_2_3 = -869, 
+    parameter signed [CW-1:0] A_2_4 = -257, 
+    parameter signed [CW-1:0] A_3_1 = 188, 
+    parameter signed [CW-1:0] A_3_2 = 869, 
+    parameter signed [CW-1:0] A_3_3 = -1432, 
+    parameter signed [CW-1:0] A_3_4 = -1091, 
+    parameter signed [CW-1:0] A_4_1 = -71, 
+    parameter signed [CW-1:0] A_4_2 = -257, 
+    parameter signed [CW-1:0] A_4_3 = 1091, 
+    parameter signed [CW-1:0] A_4_4 = -2801, 
+    parameter signed [CW-1:0] B_1_1 = 854, 
+    parameter signed [CW-1:0] B_2_1 = 1056, 
+    parameter signed [CW-1:0] B_3_1 = -665, 
+    parameter signed [CW-1:0] B_4_1 = 237, 
+    parameter signed [CW-1:0] C_1_1 = 854, 
+    parameter signed [CW-1:0] C_1_2 = -1056, 
+    parameter signed [CW-1:0] C_1_3 = -665, 
+    parameter signed [CW-1:0] C_1_4 = -237, 
     parameter signed [CW-1:0] D_1_1 = 0, 
     parameter IW = 16,
     parameter OW = 20,
     parameter SW = 22,
-    parameter CF = 9,
+    parameter CF = 12,
     parameter SF = 18,
     parameter IF = 14,
     parameter DEL = 10,
@@ -85,7 +85,6 @@ module example_lti_system #
     reg signed [RW-1:0] cx_1_2;
     reg signed [RW-1:0] cx_1_3;
     reg signed [RW-1:0] cx_1_4;
-    reg signed [RW-1:0] du_1_1;
     
     reg signed [RW-1:0] sumS_0_0_0;
     reg signed [RW-1:0] sumS_0_0_1;
@@ -141,7 +140,6 @@ module example_lti_system #
         cx_1_2 <= C_1_2 * x_2;
         cx_1_3 <= C_1_3 * x_3;
         cx_1_4 <= C_1_4 * x_4;
-        du_1_1 <= D_1_1 * u_1;
     end
 
 
@@ -163,8 +161,8 @@ module example_lti_system #
         sumS_3_0_0 <= ax_4_1 + ax_4_2 + ax_4_3;
         sumS_3_0_1 <= ax_4_4 + bu_4_1;
         dx_4 <= sumS_3_0_0 + sumS_3_0_1;
-        sumO_0_0_0 <= cx_1_1 + cx_1_2 + cx_1_3;
-        sumO_0_0_1 <= cx_1_4 + du_1_1;
+        sumO_0_0_0 <= cx_1_1 + cx_1_2;
+        sumO_0_0_1 <= cx_1_3 + cx_1_4;
         y_long_1 <= sumO_0_0_0 + sumO_0_0_1;
     end
     
@@ -223,7 +221,6 @@ module example_lti_system #
         cx_1_2 = 0;
         cx_1_3 = 0;
         cx_1_4 = 0;
-        du_1_1 = 0;
     end
 
 endmodule
\ No newline at end of file